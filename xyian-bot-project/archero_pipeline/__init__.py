@@ -0,0 +1,7 @@
+"""
+Shared building blocks for the Archero 2 data pipeline scripts
+(data-cleaner.py, research-tools/comprehensive-data-extractor.py, scripts/*.py)
+
+Submodules are imported explicitly by the scripts that need them so that
+light commands never pay for heavy optional dependencies.
+"""
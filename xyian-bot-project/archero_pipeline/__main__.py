@@ -0,0 +1,3 @@
+from archero_pipeline.cli import main
+
+main()
@@ -0,0 +1,259 @@
+"""
+Bounded, mergeable per-entity aggregates
+TopK keeps only the k best items under a total ordering, RunningStats keeps
+count/sum/min/max and ScoreSketch adds variance, a histogram and quantiles, so
+memory grows with the number of entities instead of the number of mentions.
+All of them merge order-independently and round-trip through JSON.
+"""
+
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class _Ranked:
+    __slots__ = ('key', 'item')
+
+    def __init__(self, key: Tuple, item: Any):
+        self.key = key
+        self.item = item
+
+    def __lt__(self, other: '_Ranked') -> bool:
+        return self.key < other.key
+
+
+class TopK:
+    """The k items with the largest distinct keys seen so far (a min-heap of size k)
+
+    Keys must be totally ordered tuples that identify their item (include the
+    item's text), so the kept set does not depend on insertion or merge order;
+    an item whose key is already kept is ignored.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[_Ranked] = []
+        self.keys = set()
+
+    def add(self, key: Tuple, item: Any):
+        if self.k <= 0 or key in self.keys:
+            return
+        ranked = _Ranked(key, item)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, ranked)
+        elif self.heap[0] < ranked:
+            self.keys.discard(heapq.heapreplace(self.heap, ranked).key)
+        else:
+            return
+        self.keys.add(key)
+
+    def merge(self, other: 'TopK'):
+        for ranked in other.heap:
+            self.add(ranked.key, ranked.item)
+
+    def pairs(self) -> List[Tuple[Tuple, Any]]:
+        """Kept (key, item) pairs, best first"""
+        return [(ranked.key, ranked.item) for ranked in sorted(self.heap, key=lambda ranked: ranked.key, reverse=True)]
+
+    def items(self) -> List[Any]:
+        """Kept items, best first"""
+        return [item for key, item in self.pairs()]
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def to_json(self) -> Dict:
+        return {'k': self.k, 'items': [[list(ranked.key), ranked.item] for ranked in self.heap]}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'TopK':
+        top = cls(data['k'])
+        for key, item in data['items']:
+            top.add(tuple(key), item)
+        return top
+
+
+def _add_exact(partials: List[float], value: float):
+    """Add a value to a sum kept as non-overlapping float partials
+    (Shewchuk's algorithm, as in math.fsum)"""
+    kept = 0
+    for partial in partials:
+        if abs(value) < abs(partial):
+            value, partial = partial, value
+        high = value + partial
+        low = partial - (high - value)
+        if low:
+            partials[kept] = low
+            kept += 1
+        value = high
+    partials[kept:] = [value]
+
+
+class RunningStats:
+    """Count, sum, min and max of a stream of numbers
+
+    The sum is kept exactly as float partials, so it is correctly rounded
+    whatever order the values arrive or partial stats are merged in.
+    """
+
+    __slots__ = ('count', 'partials', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.partials: List[float] = []
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+    def _add_bounds(self, value: Optional[float]):
+        if value is not None:
+            self.minimum = value if self.minimum is None else min(self.minimum, value)
+            self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def add(self, value: float):
+        self.count += 1
+        _add_exact(self.partials, value)
+        self._add_bounds(value)
+
+    def merge(self, other: 'RunningStats'):
+        self.count += other.count
+        for partial in other.partials:
+            _add_exact(self.partials, partial)
+        self._add_bounds(other.minimum)
+        self._add_bounds(other.maximum)
+
+    @property
+    def total(self) -> float:
+        return math.fsum(self.partials)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict:
+        """Count, sum, mean, min and max for reports"""
+        return {'count': self.count, 'sum': self.total, 'mean': self.mean,
+                'min': self.minimum, 'max': self.maximum}
+
+    def to_json(self) -> Dict:
+        return {'count': self.count, 'partials': self.partials, 'min': self.minimum, 'max': self.maximum}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'RunningStats':
+        stats = cls()
+        stats.count, stats.partials = data['count'], list(data['partials'])
+        stats.minimum, stats.maximum = data['min'], data['max']
+        return stats
+
+
+class ScoreSketch(RunningStats):
+    """Constant-size streaming summary of scores in a known range
+
+    Adds an exact sum of squares (variance) and counts per fixed-width bin to
+    RunningStats. Quantiles are interpolated within the fine bins, so they are
+    within (high - low) / resolution of the exact value. Unlike a t-digest the
+    state is a set of integer counts, so merged sketches are identical for any
+    merge order.
+    """
+
+    __slots__ = ('square_partials', 'low', 'high', 'resolution', 'bins')
+
+    QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+    def __init__(self, low: float = 0.0, high: float = 1.0, resolution: int = 1000):
+        super().__init__()
+        self.square_partials: List[float] = []
+        self.low = low
+        self.high = high
+        self.resolution = resolution
+        self.bins: Dict[int, int] = {}
+
+    def _bin(self, value: float) -> int:
+        position = (value - self.low) / (self.high - self.low) * self.resolution
+        return min(max(int(position), 0), self.resolution - 1)
+
+    def add(self, value: float):
+        super().add(value)
+        _add_exact(self.square_partials, value * value)
+        index = self._bin(value)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def merge(self, other: 'ScoreSketch'):
+        if (other.low, other.high, other.resolution) != (self.low, self.high, self.resolution):
+            raise ValueError("Cannot merge sketches with different ranges or resolutions")
+        super().merge(other)
+        for partial in other.square_partials:
+            _add_exact(self.square_partials, partial)
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    @property
+    def variance(self) -> float:
+        """Population variance"""
+        if not self.count:
+            return 0.0
+        return max(math.fsum(self.square_partials) / self.count - self.mean ** 2, 0.0)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile, interpolated linearly inside its bin"""
+        if not self.count:
+            return None
+        width = (self.high - self.low) / self.resolution
+        target = q * self.count
+        seen = 0
+        for index in sorted(self.bins):
+            count = self.bins[index]
+            if seen + count >= target:
+                value = self.low + (index + (target - seen) / count) * width
+                return min(max(value, self.minimum), self.maximum)
+            seen += count
+        return self.maximum
+
+    def histogram(self, buckets: int = 10) -> Dict:
+        """Counts over `buckets` equal-width ranges covering [low, high]"""
+        counts = [0] * buckets
+        for index, count in self.bins.items():
+            counts[index * buckets // self.resolution] += count
+        edges = [self.low + (self.high - self.low) * i / buckets for i in range(buckets + 1)]
+        return {'edges': edges, 'counts': counts}
+
+    def summary(self) -> Dict:
+        """RunningStats summary plus variance, quantiles and a coarse histogram"""
+        summary = super().summary()
+        summary['variance'] = self.variance
+        summary['std'] = math.sqrt(self.variance)
+        summary['quantiles'] = {f"p{round(q * 100):02d}": self.quantile(q) for q in self.QUANTILES}
+        summary['histogram'] = self.histogram()
+        return summary
+
+    def to_json(self) -> Dict:
+        return dict(super().to_json(), squares=self.square_partials, low=self.low, high=self.high,
+                    resolution=self.resolution, bins=sorted(self.bins.items()))
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'ScoreSketch':
+        sketch = cls(data['low'], data['high'], data['resolution'])
+        sketch.count, sketch.partials = data['count'], list(data['partials'])
+        sketch.minimum, sketch.maximum = data['min'], data['max']
+        sketch.square_partials = list(data['squares'])
+        sketch.bins = {index: count for index, count in data['bins']}
+        return sketch
+
+
+# Types that may appear inside partial aggregates cached as JSON
+AGGREGATE_TYPES = {cls.__name__: cls for cls in (TopK, RunningStats, ScoreSketch)}
+
+
+def encode_aggregate(value: Any) -> Dict:
+    """json.dump `default` hook for aggregate objects"""
+    name = type(value).__name__
+    if name not in AGGREGATE_TYPES:
+        raise TypeError(f"Object of type {name} is not JSON serializable")
+    return {'__aggregate__': name, 'state': value.to_json()}
+
+
+def decode_aggregate(data: Dict) -> Any:
+    """json.load `object_hook` restoring aggregate objects"""
+    name = data.get('__aggregate__')
+    if name in AGGREGATE_TYPES and len(data) == 2:
+        return AGGREGATE_TYPES[name].from_json(data['state'])
+    return data
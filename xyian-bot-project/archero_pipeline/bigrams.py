@@ -0,0 +1,182 @@
+r"""
+Token-stream matcher for the extractor's pattern families
+A text is split once into lowercase tokens (digit runs and letter runs, with
+their offsets) and every rule is answered by looking up adjacent tokens in
+hash maps of anchor words, instead of one regex scan per rule. Each rule
+stands for a regex of one of three shapes, matched case-insensitively:
+
+    word_before('a', 'b')           (\w+)\s+(?:a|b)
+    word_after('a')                 a\s+(\w+)
+    word_after('a', colons=True)    a[:\s]+(\w+)
+    number_before('a', 'b')         (\d+(?:\.\d+)?)\s*%?\s*(?:a|b)
+
+and finds exactly what re.findall finds for it: anchors match the start (or,
+for word_after, the end) of a word, and a rule resumes after its previous
+match, so its matches never overlap.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+WORD_BEFORE = 'word_before'
+WORD_AFTER = 'word_after'
+NUMBER_BEFORE = 'number_before'
+
+# Digit runs and runs of other word characters; a \w+ word is a chain of
+# tokens with nothing between them
+_TOKEN = re.compile(r'(\d+)|[^\W\d]+')
+
+# Characters re.IGNORECASE matches to an ASCII letter that str.lower() does not
+# turn into it (and 'İ', which lowercases to two characters)
+_FOLD = str.maketrans({'İ': 'i', 'ı': 'i', 'ſ': 's'})
+
+
+def fold(text: str) -> str:
+    """Lowercase text so ASCII words compare as under re.IGNORECASE; the
+    result has the same length, so offsets carry over to the original"""
+    return text.lower() if text.isascii() else text.translate(_FOLD).lower()
+
+
+class Rule(NamedTuple):
+    shape: str
+    anchors: Tuple[str, ...]
+    colons: bool = False
+
+
+def word_before(*anchors: str) -> Rule:
+    """The word right before an anchor, across whitespace"""
+    return Rule(WORD_BEFORE, anchors)
+
+
+def word_after(anchor: str, colons: bool = False) -> Rule:
+    """The word right after an anchor, across whitespace (and colons)"""
+    return Rule(WORD_AFTER, (anchor,), colons)
+
+
+def number_before(*anchors: str) -> Rule:
+    """An integer or decimal before an anchor, optionally with a '%' between"""
+    return Rule(NUMBER_BEFORE, anchors)
+
+
+class _AnchorIndex:
+    """Anchors of one rule shape, looked up by the prefixes (or suffixes) of a token"""
+
+    def __init__(self, rules: List[Tuple[int, Rule]], suffix: bool = False):
+        self.suffix = suffix
+        self.by_anchor: Dict[str, List[Tuple[int, int]]] = {}
+        for rule_id, rule in rules:
+            for rank, anchor in enumerate(rule.anchors):
+                self.by_anchor.setdefault(fold(anchor), []).append((rule_id, rank))
+        self.lengths = sorted({len(anchor) for anchor in self.by_anchor})
+        # Cheap first test: the token must start (end) like some anchor
+        self.edge = self.lengths[0] if self.lengths else 0
+        self.edges = {self._cut(anchor, self.edge) for anchor in self.by_anchor}
+
+    def _cut(self, token: str, length: int) -> str:
+        return token[-length:] if self.suffix else token[:length]
+
+    def hits(self, token: str) -> Dict[int, int]:
+        """{rule id: anchor length} for the rules with an anchor at the token's
+        start (end); a rule's earliest alternative wins, as in a regex"""
+        found: Dict[int, Tuple[int, int]] = {}
+        if not self.edge or self._cut(token, self.edge) not in self.edges:
+            return {}
+        for length in self.lengths:
+            if length > len(token):
+                break
+            for rule_id, rank in self.by_anchor.get(self._cut(token, length), ()):
+                if rule_id not in found or rank < found[rule_id][0]:
+                    found[rule_id] = (rank, length)
+        return {rule_id: length for rule_id, (rank, length) in found.items()}
+
+
+class BigramMatcher:
+    """Families of rules matched together in one pass over a text's tokens"""
+
+    def __init__(self, families: Dict[str, List[Rule]]):
+        self.families = list(families)
+        self.rule_families: List[str] = []
+        self.rules: List[Rule] = []
+        shapes: Dict[str, List[Tuple[int, Rule]]] = {WORD_BEFORE: [], WORD_AFTER: [], NUMBER_BEFORE: []}
+        for family, rules in families.items():
+            for rule in rules:
+                shapes[rule.shape].append((len(self.rule_families), rule))
+                self.rule_families.append(family)
+                self.rules.append(rule)
+
+        self.before = _AnchorIndex(shapes[WORD_BEFORE])
+        self.after = _AnchorIndex(shapes[WORD_AFTER], suffix=True)
+        self.numbers = _AnchorIndex(shapes[NUMBER_BEFORE])
+
+    def scan(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """(start, end) spans of the captured words and numbers, per family, in text order"""
+        starts, ends, lowers, digits = [], [], [], []
+        for token in _TOKEN.finditer(text):
+            starts.append(token.start())
+            ends.append(token.end())
+            lowers.append(fold(token.group()))
+            digits.append(token.lastindex == 1)
+
+        count = len(starts)
+        spans: Dict[str, List[Tuple[int, int]]] = {family: [] for family in self.families}
+        # Where each rule's next match may start (re.findall resumes after a match)
+        resume = [0] * len(self.rule_families)
+
+        def capture(rule_id, start, end, next_start):
+            spans[self.rule_families[rule_id]].append((start, end))
+            resume[rule_id] = next_start
+
+        def word_end(i):
+            while i + 1 < count and starts[i + 1] == ends[i]:
+                i += 1
+            return ends[i]
+
+        def number_anchor(end_token):
+            """Anchor hits of the token after a number ending at end_token, when only
+            whitespace and at most one '%' stand between them"""
+            following = end_token + 1
+            if following == count or digits[following]:
+                return following, {}
+            if text[ends[end_token]:starts[following]].strip() not in ('', '%'):
+                return following, {}
+            return following, self.numbers.hits(lowers[following])
+
+        word_start = starts[0] if count else 0
+        for i in range(count):
+            if i and starts[i] != ends[i - 1]:
+                gap = text[ends[i - 1]:starts[i]]
+
+                # (\w+)\s+anchor: the previous word, or what is left of it after
+                # the anchor of this rule's previous match
+                spaces = gap.isspace()
+                if not digits[i] and spaces:
+                    for rule_id, length in self.before.hits(lowers[i]).items():
+                        start = max(word_start, resume[rule_id])
+                        if start < ends[i - 1]:
+                            capture(rule_id, start, ends[i - 1], starts[i] + length)
+
+                # anchor[:\s]+(\w+): the next word, unless the anchor lies inside
+                # this rule's previous match
+                if not digits[i - 1] and (spaces or ':' in gap and gap.replace(':', ' ').isspace()):
+                    for rule_id, length in self.after.hits(lowers[i - 1]).items():
+                        if (spaces or self.rules[rule_id].colons) and ends[i - 1] - length >= resume[rule_id]:
+                            end = word_end(i)
+                            capture(rule_id, starts[i], end, end)
+
+                word_start = starts[i]
+
+            # (\d+(?:\.\d+)?)\s*%?\s*anchor: a rule tries the decimal first and
+            # falls back to the integer part alone
+            if digits[i]:
+                candidates = []
+                if i + 1 < count and digits[i + 1] and text[ends[i]:starts[i + 1]] == '.':
+                    candidates.append((ends[i + 1],) + number_anchor(i + 1))
+                candidates.append((ends[i],) + number_anchor(i))
+                matched = set()
+                for end, following, hits in candidates:
+                    for rule_id, length in hits.items():
+                        if rule_id not in matched and starts[i] >= resume[rule_id]:
+                            matched.add(rule_id)
+                            capture(rule_id, starts[i], end, starts[following] + length)
+
+        return {family: sorted(found) for family, found in spans.items()}
@@ -0,0 +1,172 @@
+"""
+Prebuilt BM25 inverted index over the cleaned entries
+Postings, document frequencies, document lengths and the BM25 parameters are
+written once by the pipeline; queries only touch the postings of their terms
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+MAGIC = b'ARBM25\x00\x01'
+FORMAT_VERSION = 1
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens, shared by indexing and querying"""
+    return _TOKEN.findall(text.lower())
+
+
+def term_counts(text: str) -> Dict[str, int]:
+    return dict(Counter(tokenize(text)))
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed document set
+
+    File layout: MAGIC, a little-endian uint64 header length, a JSON header
+    (parameters, vocabulary with posting offsets and document frequencies,
+    per-document metadata), then 8-byte aligned uint32 arrays of document
+    lengths, posting document ids and posting term frequencies. The arrays are
+    memory-mapped on load.
+    """
+
+    def __init__(self, terms: Dict[str, Tuple[int, int]], doc_ids: np.ndarray, term_freqs: np.ndarray,
+                 doc_lengths: np.ndarray, documents: List[Dict], k1: float = 1.2, b: float = 0.75):
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(doc_lengths)
+        self.avg_doc_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+
+    @classmethod
+    def build(cls, documents: Iterable[Dict], k1: float = 1.2, b: float = 0.75) -> 'BM25Index':
+        """Index documents given as dicts with a 'terms' {term: count} mapping;
+        every other key is kept as the document's metadata"""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths, metadata = [], []
+        for doc_id, document in enumerate(documents):
+            counts = document['terms']
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((doc_id, count))
+            lengths.append(sum(counts.values()))
+            metadata.append({key: value for key, value in document.items() if key != 'terms'})
+
+        terms, doc_ids, term_freqs = {}, [], []
+        for term in sorted(postings):
+            terms[term] = (len(doc_ids), len(postings[term]))
+            for doc_id, count in postings[term]:
+                doc_ids.append(doc_id)
+                term_freqs.append(count)
+
+        return cls(terms, np.array(doc_ids, dtype=np.uint32), np.array(term_freqs, dtype=np.uint32),
+                   np.array(lengths, dtype=np.uint32), metadata, k1, b)
+
+    def save(self, path):
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'k1': self.k1,
+            'b': self.b,
+            'num_docs': self.num_docs,
+            'num_postings': len(self.doc_ids),
+            'terms': self.terms,
+            'documents': self.documents
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        header += b' ' * (-(len(MAGIC) + 8 + len(header)) % 8)
+
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for array in (self.doc_lengths, self.doc_ids, self.term_freqs):
+                f.write(array.astype('<u4').tobytes())
+
+    @classmethod
+    def load(cls, path) -> 'BM25Index':
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a BM25 index")
+            header_length = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_length))
+
+        offset = len(MAGIC) + 8 + header_length
+        arrays = []
+        for size in (header['num_docs'], header['num_postings'], header['num_postings']):
+            arrays.append(np.memmap(path, dtype='<u4', mode='r', offset=offset, shape=(size,)) if size
+                          else np.zeros(0, dtype='<u4'))
+            offset += 4 * size
+        doc_lengths, doc_ids, term_freqs = arrays
+
+        terms = {term: tuple(entry) for term, entry in header['terms'].items()}
+        return cls(terms, doc_ids, term_freqs, doc_lengths, header['documents'], header['k1'], header['b'])
+
+    def idf(self, document_frequency: int) -> float:
+        return math.log(1.0 + (self.num_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-k (document id, score) pairs, best first; cost depends on the
+        postings of the query terms, not on the number of documents"""
+        ids, scores = [], []
+        for term in set(tokenize(query)):
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            offset, document_frequency = entry
+            doc_ids = self.doc_ids[offset:offset + document_frequency]
+            tf = self.term_freqs[offset:offset + document_frequency].astype(np.float64)
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[doc_ids] / self.avg_doc_length)
+            ids.append(doc_ids)
+            scores.append(self.idf(document_frequency) * tf * (self.k1 + 1.0) / (tf + norm))
+
+        if not ids:
+            return []
+        if len(ids) == 1:
+            doc_ids, totals = ids[0], scores[0]
+        else:
+            doc_ids, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate(scores))
+
+        if k < len(totals):
+            top = np.argpartition(-totals, k - 1)[:k]
+        else:
+            top = np.arange(len(totals))
+        # Highest score first, lower document id breaks ties
+        top = top[np.lexsort((doc_ids[top], -totals[top]))]
+        return [(int(doc_ids[i]), float(totals[i])) for i in top]
+
+    def document(self, doc_id: int) -> Dict:
+        """Metadata stored for a document id"""
+        return self.documents[doc_id]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query a prebuilt BM25 index")
+    parser.add_argument('index', type=Path, help='path to search-index.bm25')
+    parser.add_argument('query', help='free-text query')
+    parser.add_argument('-k', type=int, default=5, help='number of results')
+    args = parser.parse_args(argv)
+
+    index = BM25Index.load(args.index)
+    for doc_id, score in index.search(args.query, args.k):
+        document = index.document(doc_id)
+        print(f"{doc_id:>6}  {score:7.3f}  {document.get('source_file', '')}  {document.get('preview', '')[:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Single entry point for the data pipeline tools, run from the project directory
+
+    python -m archero_pipeline clean --stage-cache
+    python -m archero_pipeline extract --incremental
+    python -m archero_pipeline extract-all
+    python -m archero_pipeline parse-structured
+    python -m archero_pipeline train
+    python -m archero_pipeline query data/cleaned-database/search-index.bm25 "dragoon crossbow"
+
+A subcommand loads only its own tool and hands it the remaining arguments.
+The tools defer pandas, numpy, pyarrow and the training stack until they are
+used, so --help, argument errors and fully cached reruns start about as fast
+as a bare interpreter (see benchmarks/cli_startup.py)
+"""
+
+import argparse
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Subcommand: (script relative to the project directory, or module, and its help)
+COMMANDS = {
+    'clean': ('data-cleaner.py', "clean the scraped knowledge base into the RAG database"),
+    'extract': ('research-tools/comprehensive-data-extractor.py', "extract the structured tables"),
+    'extract-real': ('scripts/extract-real-data.py', "extract the clean gear, rune and character data"),
+    'extract-all': ('archero_pipeline.scan', "clean, extract and extract-real from one scan of the data"),
+    'parse-structured': ('scripts/parse-real-game-data.py', "save the curated game data tables"),
+    'train': ('scripts/archive/train-archero-model.py', "fine-tune the local Q&A model"),
+    'query': ('archero_pipeline.bm25', "search a prebuilt BM25 index")
+}
+
+
+def load_command(command: str):
+    """Import the module implementing a subcommand"""
+    target = COMMANDS[command][0]
+    if not target.endswith('.py'):
+        return importlib.import_module(target)
+
+    # Registered under its own name so worker processes can unpickle its classes
+    name = Path(target).stem.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, PROJECT_DIR / target)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = argparse.ArgumentParser(
+        prog='python -m archero_pipeline', description="Archero 2 data pipeline",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<18}{help}" for name, (_, help) in COMMANDS.items())
+              + "\n\nrun 'python -m archero_pipeline <command> --help' for the options of a command")
+    parser.add_argument('command', choices=list(COMMANDS), metavar='command', help='one of the commands below')
+
+    # Options after the command belong to the command's own parser
+    if not argv or argv[0].startswith('-'):
+        parser.parse_args(argv)
+    command = parser.parse_args(argv[:1]).command
+
+    sys.argv[0] = f"{parser.prog} {command}"
+    return load_command(command).main(argv[1:])
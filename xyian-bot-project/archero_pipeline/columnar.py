@@ -0,0 +1,75 @@
+"""
+Parquet export and column-wise loading of the structured tables
+Lists are written as Arrow list<string> columns and low-cardinality names as
+dictionary-encoded (categorical) columns, so readers get them back typed
+instead of re-parsing stringified CSV cells. Needs pyarrow (optional).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+try:
+    pa = lazy_import('pyarrow')
+except ImportError:
+    pa = None
+
+COMPRESSION = 'zstd'
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow is not installed (pip install pyarrow) - needed for Parquet output")
+
+
+def _arrow_type(frame: pd.DataFrame, column: str, list_columns, categorical_columns):
+    dtype = frame[column].dtype
+    if column in list_columns:
+        return pa.list_(pa.string())
+    if column in categorical_columns or isinstance(dtype, pd.CategoricalDtype):
+        return pa.dictionary(pa.int32(), pa.string())
+    if pd.api.types.is_integer_dtype(dtype):
+        return pa.int64()
+    # pandas gives empty columns of strings a float dtype
+    if pd.api.types.is_float_dtype(dtype) and len(frame):
+        return pa.float64()
+    return pa.string()
+
+
+def to_arrow(frame: pd.DataFrame, list_columns: Iterable[str] = (), categorical_columns: Iterable[str] = ()):
+    """An Arrow table with an explicit schema, so empty tables and columns of
+    empty lists get the same types as full ones"""
+    require_pyarrow()
+    list_columns, categorical_columns = set(list_columns), set(categorical_columns)
+    schema = pa.schema([(column, _arrow_type(frame, column, list_columns, categorical_columns))
+                        for column in frame.columns])
+    arrays = []
+    for field in schema:
+        values = frame[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values.astype('category'), type=field.type))
+        else:
+            values = values.astype(object).where(values.notna(), None)
+            arrays.append(pa.array(values.tolist(), type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_parquet(frame: pd.DataFrame, path, list_columns: Iterable[str] = (),
+                  categorical_columns: Iterable[str] = (), compression: str = COMPRESSION):
+    """Write a DataFrame as one compressed Parquet file"""
+    import pyarrow.parquet as pq
+    pq.write_table(to_arrow(frame, list_columns, categorical_columns), Path(path), compression=compression)
+
+
+def read_columns(path, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Load some (or all) columns of a Parquet file through a memory map; only
+    the requested column chunks are read and decoded"""
+    require_pyarrow()
+    import pyarrow.parquet as pq
+    table = pq.read_table(Path(path), columns=None if columns is None else list(columns), memory_map=True)
+    return table.to_pandas()
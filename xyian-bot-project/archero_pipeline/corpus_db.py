@@ -0,0 +1,107 @@
+"""
+SQLite export of the cleaned corpus
+Entries, entities and the mentions linking them go into normalized tables with
+indexes, plus an FTS5 index over the cleaned text, so single questions become
+indexed queries instead of loads of the whole JSON database:
+
+    SELECT e.source_file, m.confidence, e.content
+    FROM mentions m JOIN entities n ON n.id = m.entity_id JOIN entries e ON e.id = m.entry_id
+    WHERE n.name = 'otta' AND m.confidence > 0.5;
+
+    SELECT rowid, snippet(entries_fts, 0, '[', ']', '…', 12)
+    FROM entries_fts WHERE entries_fts MATCH 'dragoon AND crossbow' ORDER BY rank;
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Sequence, Tuple
+
+from archero_pipeline.parallel import chunked
+
+SCHEMA = """
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE TABLE entities (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mentions INTEGER NOT NULL,
+    avg_confidence REAL
+);
+CREATE TABLE mentions (
+    entry_id INTEGER NOT NULL REFERENCES entries(id),
+    entity_id INTEGER NOT NULL REFERENCES entities(id),
+    span_start INTEGER NOT NULL,
+    span_end INTEGER NOT NULL,
+    confidence REAL NOT NULL
+);
+CREATE VIRTUAL TABLE entries_fts USING fts5(content, content='entries', content_rowid='id');
+"""
+
+# Built after the bulk load, which is faster than maintaining them row by row
+INDEXES = """
+CREATE UNIQUE INDEX entities_by_name ON entities(name, category);
+CREATE INDEX mentions_by_entity ON mentions(entity_id, confidence);
+CREATE INDEX mentions_by_entry ON mentions(entry_id);
+CREATE INDEX entries_by_source ON entries(source_file);
+"""
+
+# Entries inserted per executemany call
+BATCH_SIZE = 4096
+
+
+def write_corpus_db(path, entries: Sequence[Sequence], entities: Iterable[Tuple]):
+    """Load the rows in one transaction, then build the indexes and the FTS5
+    index; `path` is replaced atomically once the file is complete
+
+    entries: [source_file, confidence, content, [[category, name, start, end], ...]]
+    entities: (category, name, mention count, average confidence)
+    """
+    path = Path(path)
+    temp_path = path.with_name(path.name + '.tmp')
+    if temp_path.exists():
+        temp_path.unlink()
+
+    connection = sqlite3.connect(temp_path)
+    try:
+        # A half-written file is never renamed into place, so skip the journal
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.executescript(SCHEMA)
+
+        with connection:
+            entity_ids = {}
+            for category, name, mentions, avg_confidence in entities:
+                entity_ids[(category, name)] = len(entity_ids) + 1
+                connection.execute('INSERT INTO entities VALUES (?, ?, ?, ?, ?)',
+                                   (len(entity_ids), category, name, mentions, avg_confidence))
+
+            entry_id = 0
+            for batch in chunked(entries, BATCH_SIZE):
+                entry_rows: List[Tuple] = []
+                mention_rows: List[Tuple] = []
+                for source_file, confidence, content, mentions in batch:
+                    entry_id += 1
+                    entry_rows.append((entry_id, source_file, confidence, content))
+                    for category, name, start, end in mentions:
+                        if (category, name) not in entity_ids:
+                            entity_ids[(category, name)] = len(entity_ids) + 1
+                            connection.execute('INSERT INTO entities VALUES (?, ?, ?, 0, NULL)',
+                                               (len(entity_ids), category, name))
+                        mention_rows.append((entry_id, entity_ids[(category, name)], start, end, confidence))
+                connection.executemany('INSERT INTO entries VALUES (?, ?, ?, ?)', entry_rows)
+                connection.executemany('INSERT INTO mentions VALUES (?, ?, ?, ?, ?)', mention_rows)
+
+        connection.executescript(INDEXES)
+        with connection:
+            connection.execute("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')")
+        connection.execute('ANALYZE')
+    finally:
+        connection.close()
+
+    os.replace(temp_path, path)
@@ -0,0 +1,150 @@
+"""
+Compiled gazetteer for Archero 2 entity detection
+Finds every known gear set, gear piece, rune, character and weapon mention
+(with its span) in a single scan per text
+"""
+
+import importlib.util
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+GAME_DATA_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "parse-real-game-data.py"
+
+# Curated tables in parse-real-game-data.py and the mention kind they seed
+GAME_DATA_TABLES = [
+    ('GEAR_SETS', 'gear_set'),
+    ('RUNES', 'rune'),
+    ('CHARACTERS', 'character'),
+    ('WEAPONS', 'weapon'),
+]
+
+_NEXT_TOKEN = re.compile(r'\s+(\w+)')
+
+
+class Mention(NamedTuple):
+    """One gazetteer hit: the entity kind, its canonical name and the matched span"""
+    kind: str
+    name: str
+    start: int
+    end: int
+
+
+class _PhraseNode:
+    __slots__ = ('children', 'payloads')
+
+    def __init__(self):
+        self.children = {}
+        self.payloads = []
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a character trie so matching cost
+    depends on word length rather than on the number of words"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            body = '(?:' + body + ')?'
+        return body
+
+    return emit(trie)
+
+
+class Gazetteer:
+    """Dictionary of (possibly multi-word) terms mapped to (kind, canonical name)
+
+    All first words are compiled into one trie-shaped, case-insensitive regex;
+    follow-on words of phrases are resolved through a token trie, so each text
+    is scanned once no matter how many entities are registered.
+    """
+
+    def __init__(self):
+        self._roots: Dict[str, _PhraseNode] = {}
+        self._names: Dict[str, List[str]] = {}
+        self._pattern = None
+
+    def add(self, term: str, kind: str, name: Optional[str] = None):
+        """Register a term (canonical name or alias) for an entity"""
+        name = name or term
+        tokens = term.replace('_', ' ').lower().split()
+        if not tokens:
+            return
+
+        node = self._roots.setdefault(tokens[0], _PhraseNode())
+        for token in tokens[1:]:
+            node = node.children.setdefault(token, _PhraseNode())
+        if (kind, name) not in node.payloads:
+            node.payloads.append((kind, name))
+
+        names = self._names.setdefault(kind, [])
+        if name not in names:
+            names.append(name)
+        self._pattern = None
+
+    def names(self, kind: str) -> List[str]:
+        """Canonical names registered for a kind, in registration order"""
+        return list(self._names.get(kind, []))
+
+    def compile(self):
+        """Compile the first-word alternation (done lazily on first scan)"""
+        body = _trie_pattern(self._roots)
+        self._pattern = re.compile(r'\b(?:' + body + r')\b', re.IGNORECASE) if body else None
+        return self
+
+    def scan(self, text: str) -> List[Mention]:
+        """Return every mention in text ordered by start offset, including
+        overlapping ones (e.g. "oracle spear" and "oracle")"""
+        if self._pattern is None:
+            self.compile()
+        if self._pattern is None or not text:
+            return []
+
+        mentions = []
+        for match in self._pattern.finditer(text):
+            node = self._roots.get(match.group().lower())
+            start, end = match.span()
+            while node is not None:
+                for kind, name in node.payloads:
+                    mentions.append(Mention(kind, name, start, end))
+                if not node.children:
+                    break
+                following = _NEXT_TOKEN.match(text, end)
+                if following is None:
+                    break
+                node = node.children.get(following.group(1).lower())
+                end = following.end()
+        return mentions
+
+
+def load_game_data(path: Path = GAME_DATA_SCRIPT):
+    """Import the curated tables from scripts/parse-real-game-data.py"""
+    spec = importlib.util.spec_from_file_location("parse_real_game_data", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def seed_game_entities(gazetteer: Gazetteer, game_data=None) -> Gazetteer:
+    """Add canonical names and their `aka` aliases from the curated game data"""
+    if game_data is None:
+        game_data = load_game_data()
+
+    for table_name, kind in GAME_DATA_TABLES:
+        for name, info in getattr(game_data, table_name, {}).items():
+            gazetteer.add(name, kind, name)
+            aliases = info.get('aka', []) if isinstance(info, dict) else []
+            if isinstance(aliases, str):
+                aliases = [aliases]
+            for alias in aliases:
+                gazetteer.add(alias, kind, name)
+    return gazetteer
@@ -0,0 +1,179 @@
+"""
+Streaming JSON ingestion shared by the raw-data loaders
+Yields entries one at a time instead of json.load-ing whole scrape dumps
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+try:
+    import ijson
+    if ijson.backend not in ('yajl2_c', 'yajl2_cffi'):
+        ijson = None  # the pure-Python backend is slower than the stdlib path
+except ImportError:
+    ijson = None
+
+CHUNK_SIZE = 1 << 20
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+class _JsonStream:
+    """Incremental reader over a text file that decodes one JSON value at a time
+    with json.JSONDecoder.raw_decode, keeping only a bounded window in memory"""
+
+    def __init__(self, handle, chunk_size: int = CHUNK_SIZE):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: Optional[int] = None) -> bool:
+        chunk = self.handle.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {self.peek()!r}")
+        self.pos += 1
+
+    def decode(self) -> Any:
+        """Decode the next complete JSON value"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut off by the window edge may continue in the next chunk
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"Malformed array near offset {self.pos}")
+
+    def iter_object(self) -> Iterator[str]:
+        """Yield member keys; the caller must consume each value before resuming"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Malformed object near offset {self.pos}")
+
+
+def _walk(stream: _JsonStream, keys: Optional[Iterable[str]], depth: int, level: int = 0,
+          path: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """(path, item) pairs, path being the dict keys leading to the item's list"""
+    char = stream.peek()
+    if char == '[':
+        for item in stream.iter_array():
+            yield path, item
+    elif char == '{' and depth > level:
+        for key in stream.iter_object():
+            value_start = stream.peek()
+            if level == 0 and keys is not None and key not in keys:
+                stream.decode()
+            elif value_start == '[':
+                for item in stream.iter_array():
+                    yield path + (key,), item
+            elif value_start == '{' and depth > level + 1:
+                yield from _walk(stream, None, depth, level + 1, path + (key,))
+            else:
+                stream.decode()
+    elif char == '{' and level == 0:
+        yield path, stream.decode()
+    else:
+        stream.decode()
+
+
+def _first_byte(path: Path) -> bytes:
+    with open(path, 'rb') as handle:
+        while True:
+            byte = handle.read(1)
+            if not byte or not byte.isspace():
+                return byte
+
+
+def _iter_with_ijson(path: Path, keys: Iterable[str]) -> Iterator[Any]:
+    prefixes = ['item'] if _first_byte(path) == b'[' else [f"{key}.item" for key in keys]
+    for prefix in prefixes:
+        with open(path, 'rb') as handle:
+            yield from ijson.items(handle, prefix, use_float=True)
+
+
+def iter_json_entries(path, keys: Optional[Iterable[str]] = None, depth: int = 1,
+                      backend: str = 'auto') -> Iterator[Any]:
+    """Yield entries from a JSON file one at a time
+
+    - a bare list yields its items
+    - a dict yields the items of its list values (only `keys`, if given);
+      with depth=2 it also yields items of lists one dict level further down,
+      and with depth=0 the dict itself is the single entry
+    backend='auto' uses ijson's C parser when installed for the common
+    fixed-layout case ({"data": [...]} files and bare lists).
+    """
+    path = Path(path)
+    if backend == 'ijson' and ijson is None:
+        raise ImportError("ijson with a C backend is not installed")
+    use_ijson = ijson is not None and backend != 'json' and keys is not None and depth == 1
+
+    if use_ijson:
+        yield from _iter_with_ijson(path, keys)
+        return
+
+    with open(path, 'r', encoding='utf-8') as handle:
+        for _, item in _walk(_JsonStream(handle), None if keys is None else set(keys), depth):
+            yield item
+
+
+def iter_json_items(path, depth: int = 1) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """Yield (path, item) pairs from a JSON file, reading it like
+    iter_json_entries without a key filter; path is the tuple of dict keys
+    leading to the item's list (() for a bare list or a depth=0 dict), so
+    readers that want different lists can share one parse of the file"""
+    with open(path, 'r', encoding='utf-8') as handle:
+        yield from _walk(_JsonStream(handle), None, depth)
+
@@ -0,0 +1,150 @@
+"""
+Per-stage instrumentation for the pipelines
+Wall and CPU time, entries and bytes per stage, match counts per pattern
+family and the slowest entries of each stage, reported as plain JSON. Stages
+nest: a stage's time excludes the stages running inside it, including the
+stages feeding a timed iterator, so the stage times add up to the run.
+"""
+
+import cProfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from archero_pipeline.aggregates import TopK
+
+# Slowest entries kept per stage
+SLOWEST_ENTRIES = 5
+
+
+class _StageStats:
+    __slots__ = ('wall', 'cpu', 'entries', 'bytes', 'slowest')
+
+    def __init__(self, slowest: int):
+        self.wall = self.cpu = 0.0
+        self.entries = self.bytes = 0
+        self.slowest = TopK(slowest)
+
+
+class _Frame:
+    """One running stage; the times of stages started inside it are set aside
+    so that only its own time is recorded"""
+    __slots__ = ('owner', 'name', 'entries', 'bytes', 'entry', 'wall', 'cpu', 'child_wall', 'child_cpu')
+
+    def __init__(self, owner: 'Instrumentation', name: Optional[str], entries: int, nbytes: int, entry: Optional[Dict]):
+        self.owner = owner
+        self.name = name
+        self.entries = entries
+        self.bytes = nbytes
+        self.entry = entry
+
+    def __enter__(self):
+        self.child_wall = self.child_cpu = 0.0
+        self.owner._stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        stack = self.owner._stack
+        stack.pop()
+        if stack:
+            stack[-1].child_wall += wall
+            stack[-1].child_cpu += cpu
+        if self.name is not None:
+            self.owner._record(self.name, wall - self.child_wall, cpu - self.child_cpu,
+                               self.entries, self.bytes, self.entry)
+
+
+class Instrumentation:
+    """Collects stage timings and match counts for one pipeline run"""
+
+    def __init__(self, slowest: int = SLOWEST_ENTRIES):
+        self.slowest = slowest
+        self.stages: Dict[str, _StageStats] = {}
+        self.matches: Dict[str, int] = {}
+        self._stack: List[_Frame] = []
+
+    def _record(self, name: str, wall: float, cpu: float, entries: int, nbytes: int, entry: Optional[Dict]):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = _StageStats(self.slowest)
+        stats.wall += wall
+        stats.cpu += cpu
+        stats.entries += entries
+        stats.bytes += nbytes
+        if entry is not None:
+            stats.slowest.add((wall, entry.get('source', ''), entry.get('preview', '')), dict(entry, seconds=wall))
+
+    def stage(self, name: str, entries: int = 0, nbytes: int = 0, entry: Optional[Dict] = None) -> _Frame:
+        """Context manager timing a stage, or one entry of it when `entry`
+        ({'source': ..., 'preview': ...}) is given"""
+        return _Frame(self, name, entries, nbytes, entry)
+
+    def paused(self) -> _Frame:
+        """Context manager whose time is left out of the running stage and not
+        recorded, for work another Instrumentation times"""
+        return _Frame(self, None, 0, 0, None)
+
+    def iterate(self, name: str, iterable: Iterable, size: Optional[Callable[[Any], int]] = None) -> Iterator:
+        """Yield the items of iterable, timing the production of each one as an
+        entry of stage `name` (with size(item) bytes)"""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as frame:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                frame.entries = 1
+                if size is not None:
+                    frame.bytes = size(item)
+            yield item
+
+    def count(self, family: str, matches: int = 1):
+        """Add to the match count of a pattern family"""
+        if matches:
+            self.matches[family] = self.matches.get(family, 0) + matches
+
+    def report(self) -> Dict:
+        stages = {}
+        for name, stats in self.stages.items():
+            stages[name] = {
+                'wall_seconds': round(stats.wall, 6),
+                'cpu_seconds': round(stats.cpu, 6),
+                'entries': stats.entries,
+                'bytes': stats.bytes,
+                'entries_per_sec': round(stats.entries / stats.wall, 1) if stats.entries and stats.wall > 0 else None,
+                'mb_per_sec': round(stats.bytes / 1e6 / stats.wall, 3) if stats.bytes and stats.wall > 0 else None,
+                'slowest_entries': [dict(entry, seconds=round(entry['seconds'], 6))
+                                    for entry in stats.slowest.items()]
+            }
+        return {
+            'wall_seconds': round(sum(stats.wall for stats in self.stages.values()), 6),
+            'cpu_seconds': round(sum(stats.cpu for stats in self.stages.values()), 6),
+            'stages': stages,
+            'matches': dict(sorted(self.matches.items()))
+        }
+
+
+def content_bytes(entry: Dict) -> int:
+    """UTF-8 size of a raw entry's content"""
+    content = entry.get('content')
+    return len(content.encode('utf-8')) if isinstance(content, str) else 0
+
+
+def entry_label(source: str, content: str) -> Dict[str, str]:
+    """How an entry is identified among a stage's slowest entries"""
+    return {'source': source, 'preview': content[:80]}
+
+
+def run_profiled(fn: Callable, path) -> Any:
+    """Call fn under cProfile and dump the stats to path (read them with
+    `python -m pstats path` or pstats.Stats)"""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        profiler.dump_stats(Path(path))
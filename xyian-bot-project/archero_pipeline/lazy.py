@@ -0,0 +1,29 @@
+"""
+Deferred imports for the heavy dependencies
+A lazily imported module is registered right away but only executed on its
+first attribute access, so entry points that never touch pandas, numpy or
+pyarrow (--help, argument errors, cached reruns) do not pay for importing them
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """The module `name`, executed on first attribute access; raises
+    ModuleNotFoundError right away when it is not installed
+
+    Only top-level packages stay deferred: finding a submodule imports its
+    parent package."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
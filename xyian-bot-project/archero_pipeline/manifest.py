@@ -0,0 +1,94 @@
+"""
+Source-file manifest for incremental rebuilds
+Records the content hash of every source file together with its cached
+contribution to the aggregates, so reruns only reprocess new or changed files
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .aggregates import decode_aggregate, encode_aggregate
+
+MANIFEST_VERSION = 1
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_fingerprint(*paths, settings: Optional[Dict] = None) -> str:
+    """Hash of the code (and run settings) that produced the cached
+    contributions; any change to them invalidates the whole manifest"""
+    digest = hashlib.sha256(str(MANIFEST_VERSION).encode())
+    for path in paths:
+        digest.update(file_digest(path).encode())
+    if settings:
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class SourceManifest:
+    """Per-source-file hashes and cached contributions stored in a directory:
+    manifest.json holds the hashes and metadata, contributions/ one JSON
+    document per source file"""
+
+    def __init__(self, directory, fingerprint: str):
+        self.directory = Path(directory)
+        self.fingerprint = fingerprint
+        self.contributions_dir = self.directory / "contributions"
+        self.sources: Dict[str, Dict] = {}
+
+        manifest_path = self.directory / "manifest.json"
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('fingerprint') == fingerprint:
+                self.sources = manifest.get('sources', {})
+
+    def _contribution_path(self, key: str) -> Path:
+        return self.contributions_dir / (hashlib.sha1(key.encode()).hexdigest() + ".json")
+
+    def lookup(self, key: str, digest: str) -> Optional[Dict]:
+        """Metadata recorded for a source file, if its content is unchanged"""
+        record = self.sources.get(key)
+        if record is None or record['sha256'] != digest:
+            return None
+        if not self._contribution_path(key).exists():
+            return None
+        return record
+
+    def load_contribution(self, key: str) -> Any:
+        with open(self._contribution_path(key), 'r', encoding='utf-8') as f:
+            return json.load(f, object_hook=decode_aggregate)
+
+    def store(self, key: str, digest: str, contribution: Any, **metadata):
+        """Record a freshly processed source file and its contribution"""
+        self.contributions_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._contribution_path(key), 'w', encoding='utf-8') as f:
+            json.dump(contribution, f, ensure_ascii=False, default=encode_aggregate)
+        self.sources[key] = {'sha256': digest, **metadata}
+
+    def prune(self, keep: Iterable[str]) -> List[str]:
+        """Forget source files that no longer exist; returns their keys"""
+        keep = set(keep)
+        removed = [key for key in self.sources if key not in keep]
+        for key in removed:
+            del self.sources[key]
+            self._contribution_path(key).unlink(missing_ok=True)
+        return removed
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "manifest.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'fingerprint': self.fingerprint,
+                'sources': self.sources
+            }, f, indent=2)
@@ -0,0 +1,121 @@
+"""
+MinHash signatures with LSH banding for near-duplicate detection
+A text is reduced to a fixed-size signature whose agreement rate with another
+signature estimates the Jaccard similarity of their word shingles; banding the
+signatures finds candidate pairs in roughly linear time instead of comparing
+every pair
+"""
+
+import base64
+import re
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+SEED = 1
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN = re.compile(r'\w+')
+_BLOCK_ROWS = 4096
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Word n-grams of a text (the whole text when it is shorter than one n-gram)"""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def optimal_bands(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """(bands, rows per band) minimizing the false positive plus false negative
+    probability mass around the Jaccard threshold"""
+    similarity = np.linspace(0.0, 1.0, 1001)
+    best, best_error = (1, num_perm), None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        candidate = 1.0 - (1.0 - similarity ** rows) ** bands
+        below = similarity < threshold
+        error = np.mean(np.where(below, candidate, 1.0 - candidate))
+        if best_error is None or error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class MinHasher:
+    """Computes MinHash signatures with fixed, seeded permutations so
+    signatures are stable across runs and processes"""
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE, seed: int = SEED):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # (a * x + b) mod p, with uint64 wrap-around, truncated to 32 bits
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None when it has no words to compare"""
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+
+        hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _BLOCK_ROWS):
+            block = hashes[start:start + _BLOCK_ROWS, None]
+            permuted = ((block * self.a + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature
+
+
+class NearDuplicateIndex:
+    """LSH index over MinHash signatures of the texts kept so far"""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = NUM_PERM):
+        self.threshold = threshold
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self.signatures: List[np.ndarray] = []
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows].tobytes() for band in range(self.bands)]
+
+    def check_and_add(self, signature: Optional[np.ndarray]) -> bool:
+        """True if the signature is a near duplicate of an indexed one;
+        otherwise index it and return False"""
+        if signature is None:
+            return False
+
+        keys = self._band_keys(signature)
+        candidates = set()
+        for bucket, key in zip(self.buckets, keys):
+            candidates.update(bucket.get(key, ()))
+        # Banding only proposes candidates; confirm with the estimated Jaccard
+        for candidate in sorted(candidates):
+            if np.mean(self.signatures[candidate] == signature) >= self.threshold:
+                return True
+
+        position = len(self.signatures)
+        self.signatures.append(signature)
+        for bucket, key in zip(self.buckets, keys):
+            bucket.setdefault(key, []).append(position)
+        return False
+
+
+def signature_to_text(signature: Optional[np.ndarray]) -> Optional[str]:
+    """Compact JSON-safe form of a signature"""
+    if signature is None:
+        return None
+    return base64.b64encode(signature.astype('<u8').tobytes()).decode('ascii')
+
+
+def signature_from_text(text: Optional[str]) -> Optional[np.ndarray]:
+    if text is None:
+        return None
+    return np.frombuffer(base64.b64decode(text), dtype='<u8').astype(np.uint64)
@@ -0,0 +1,53 @@
+"""
+Newline-delimited JSON output and input
+Records are serialized and written one at a time, so saving never builds the
+serialized form of a whole result, and readers can process a file record by
+record instead of json.load-ing it
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+
+class NdjsonWriter:
+    """Writes one compact JSON record per line to `path`, which is replaced
+    atomically when the writer is closed without an error"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.temp_path = self.path.with_name(self.path.name + '.tmp')
+        self.handle = open(self.temp_path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, record: Dict[str, Any]):
+        self.handle.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        self.handle.write('\n')
+        self.count += 1
+
+    def close(self):
+        self.handle.close()
+        os.replace(self.temp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.handle.close()
+            self.temp_path.unlink()
+
+
+def iter_ndjson(path, record: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the records of an NDJSON file one at a time, optionally only those
+    whose 'record' field equals `record` (such as 'entity' or 'entry')"""
+    with open(path, 'r', encoding='utf-8') as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if record is None or item.get('record') == record:
+                yield item
@@ -0,0 +1,102 @@
+"""
+Single-file category database with byte-offset access to each entity
+Every entity is stored once as compact JSON; a small header maps categories
+and entity keys to the byte ranges of their values, so a reader decodes only
+the entities it asks for
+"""
+
+import argparse
+import json
+import mmap
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+MAGIC = b'ARPACK\x00\x01'
+FORMAT_VERSION = 1
+
+
+def write_packed(path, categories: Dict[str, Dict[str, Any]]):
+    """File layout: MAGIC, a little-endian uint64 header length, a JSON header
+    ({category: {key: [offset, length]}} with offsets into the body), then the
+    body: the compact JSON values one after another
+
+    Values are encoded one at a time into a temporary file that is copied in
+    after the header, so the encoded database is never held in memory"""
+    index: Dict[str, Dict[str, List[int]]] = {}
+    with tempfile.TemporaryFile(dir=Path(path).parent) as body:
+        offset = 0
+        for category, entities in categories.items():
+            index[category] = {}
+            for key, value in entities.items():
+                encoded = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                index[category][key] = [offset, len(encoded)]
+                body.write(encoded)
+                offset += len(encoded)
+
+        header = json.dumps({'version': FORMAT_VERSION, 'categories': index},
+                            ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        body.seek(0)
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            shutil.copyfileobj(body, f)
+
+
+class PackedDatabase:
+    """Memory-mapped reader for write_packed files"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a packed database")
+            header_length = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_length))
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {header['version']}, expected {FORMAT_VERSION}")
+        self.index = header['categories']
+        self.body_offset = len(MAGIC) + 8 + header_length
+
+    def categories(self) -> List[str]:
+        return list(self.index)
+
+    def keys(self, category: str) -> List[str]:
+        return list(self.index[category])
+
+    def get(self, category: str, key: str) -> Any:
+        """Decode one entity; raises KeyError for unknown categories or keys"""
+        offset, length = self.index[category][key]
+        start = self.body_offset + offset
+        return json.loads(self.data[start:start + length])
+
+    def category(self, category: str) -> Dict[str, Any]:
+        return {key: self.get(category, key) for key in self.index[category]}
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print entities from a packed database")
+    parser.add_argument('database', type=Path, help='path to clean-archero-database.pack')
+    parser.add_argument('category', nargs='?', help='category to list or read from')
+    parser.add_argument('key', nargs='?', help='entity to print')
+    args = parser.parse_args()
+
+    with PackedDatabase(args.database) as database:
+        if args.category is None:
+            for category in database.categories():
+                print(f"{category}: {len(database.keys(category))} entities")
+        elif args.key is None:
+            print('\n'.join(database.keys(args.category)))
+        else:
+            print(json.dumps(database.get(args.category, args.key), indent=2, ensure_ascii=False))
@@ -0,0 +1,62 @@
+"""
+Process-pool helpers for sharded pipeline stages
+Results come back in submission order and partial aggregates merge
+deterministically, so a sharded run reproduces the serial one exactly
+"""
+
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split an iterable into consecutive lists of at most `size` items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def imap_ordered(executor, fn: Callable, items: Iterable[Any], window: int) -> Iterator[Tuple[Any, Any]]:
+    """Yield (item, fn(item)) in input order, keeping at most `window` tasks in
+    flight so the input is consumed lazily (unlike Executor.map)"""
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def to_plain(value: Any) -> Any:
+    """Turn nested defaultdicts (whose factories may be unpicklable lambdas)
+    into plain dicts so partial aggregates can cross process boundaries"""
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    return value
+
+
+def merge_into(target: Dict, partial: Dict) -> Dict:
+    """Fold a partial aggregate into target: numbers add, lists extend,
+    dicts merge recursively and objects with a merge() method merge themselves.
+    Merging partials in shard order keeps first-seen key order and list order
+    identical to a single serial pass."""
+    for key, value in partial.items():
+        if key not in target:
+            target[key] = value
+            continue
+        current = target[key]
+        if isinstance(current, dict):
+            merge_into(current, value)
+        elif isinstance(current, list):
+            current.extend(value)
+        elif hasattr(current, 'merge'):
+            current.merge(value)
+        else:
+            target[key] = current + value
+    return target
@@ -0,0 +1,99 @@
+"""
+Linear-time quantity parser
+Finds (number, material phrase, unit) triples such as "40 epic shards" or
+"1,200 gems" in a single left-to-right pass over the tokens of a text, instead
+of regexes whose nested word groups backtrack over long runs of words
+"""
+
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+# Numbers, words (starting with a letter or underscore, so "500g" splits into
+# "500" and "g") and single punctuation characters; whitespace is skipped.
+# Every alternative consumes its characters exactly once, so tokenizing is linear.
+_TOKEN = re.compile(r'(?P<number>\d+(?:,\d+)*(?:\.\d+)?)|(?P<word>[^\W\d]\w*)|(?P<other>[^\w\s])')
+
+# Longest material phrase between a quantity and its unit, in words
+MAX_PHRASE_WORDS = 3
+
+
+class Quantity(NamedTuple):
+    """A number, the words between it and its unit ('' when the unit follows
+    the number directly), the unit as written and its kind"""
+    number: str
+    phrase: str
+    unit: str
+    kind: str
+    start: int
+    end: int
+
+    @property
+    def name(self) -> str:
+        """What is being counted: the phrase and the unit ("epic shards")"""
+        return f"{self.phrase} {self.unit}" if self.phrase else self.unit
+
+
+class QuantityParser:
+    """Matches unit words (case-insensitively, as whole tokens) against a
+    vocabulary mapping each spelling to a kind such as 'material' or 'cost'
+
+    Kinds listed in `phrase_kinds` allow a phrase of up to max_phrase_words
+    words between the number and the unit ("40 shards", "40 epic shards");
+    every other kind requires the unit right after the number. Punctuation
+    ends a pending quantity, a new number replaces it, numbers right after a
+    ':' (clock times) start none, and each token is looked at once.
+    """
+
+    def __init__(self, units: Dict[str, str], phrase_kinds=('material',), max_phrase_words: int = MAX_PHRASE_WORDS):
+        self.units = {unit.lower(): kind for unit, kind in units.items()}
+        self.phrase_kinds = set(phrase_kinds)
+        self.max_phrase_words = max_phrase_words
+
+    def parse(self, text: str) -> Iterator[Quantity]:
+        number: Optional[re.Match] = None
+        phrase: List[re.Match] = []
+        colon_end = -1
+
+        for token in _TOKEN.finditer(text):
+            after_colon = token.start() == colon_end
+            colon_end = token.end() if token.group() == ':' else -1
+            if token.lastgroup == 'number':
+                number, phrase = (None if after_colon else token), []
+                continue
+            if token.lastgroup == 'other' or number is None:
+                number = None
+                continue
+
+            kind = self.units.get(token.group().lower())
+            if kind is not None and (kind in self.phrase_kinds or not phrase):
+                yield Quantity(number.group(), ' '.join(word.group() for word in phrase),
+                               token.group(), kind, number.start(), token.end())
+                if kind in self.phrase_kinds:
+                    number = None
+                    continue
+            # A unit that directly follows its number ("10 gold") may still
+            # start the phrase of a longer quantity ("10 gold shards")
+            if len(phrase) < self.max_phrase_words:
+                phrase.append(token)
+            else:
+                number = None
+
+
+def plural_units(kind: str, *singulars: str, invariant=()) -> Dict[str, str]:
+    """Unit vocabulary entries for singular words, their "-s" plurals and
+    words that do not take a plural"""
+    units = {}
+    for word in singulars:
+        units[word] = kind
+        units[word + 's'] = kind
+    for word in invariant:
+        units[word] = kind
+    return units
+
+
+# Costs ("1,200 gems", "500g") and upgrade materials ("40 shards", "86 soul crystals")
+GAME_UNITS = {
+    **plural_units('cost', 'gem', 'coin', 'lure', 'kilogram', invariant=['gold', 'g', 'kg', 'xp', 'experience']),
+    **plural_units('material', 'shard', 'fragment', 'core', 'stone', 'crystal', 'key', 'token',
+                   invariant=['essence', 'dust', 'powder'])
+}
@@ -0,0 +1,110 @@
+"""
+One scan of the knowledge base feeding all three extractors
+
+    python -m archero_pipeline extract-all
+
+Run separately, clean, extract and extract-real each parse every knowledge
+base file. Here each file is parsed once and its items are handed to every
+tool that reads them: the items of its "data" list (or of a bare list) to the
+cleaner and the table extractor, every item of a list at most two dict levels
+down to the real-data extractor. The cleaner pulls its entries as usual, so
+its batching, worker processes and stage cache are unchanged, and the other
+two accumulate along the way, outside the cleaner's stage timings. Each tool
+then saves its own outputs, identical to those of a separate run
+"""
+
+import argparse
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from .cli import load_command
+from .ingest import iter_json_items
+from .instrument import Instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Paths of the lists holding the cleaner's and table extractor's entries
+ENTRY_PATHS = {(), ('data',)}
+
+
+class SharedScan:
+    """Parses the knowledge base files once each, feeding the table and
+    real-data extractors while the cleaner pulls its entries"""
+
+    def __init__(self, knowledge_base, extractor, real_extractor, instrumentation: Instrumentation):
+        self.knowledge_base = Path(knowledge_base)
+        self.extractor = extractor
+        self.real_extractor = real_extractor
+        # The cleaner's: the extractors' work is paused out of its running stage
+        self.instrumentation = instrumentation
+        self.scanned = set()
+
+    def read_entries(self, json_file: Path) -> Iterator[Dict[str, Any]]:
+        """The cleaner's entries of one file, passed to load_all_raw_data; the
+        extractors get their items of the file as it is parsed"""
+        self.scanned.add(json_file)
+        # The table extractor only reads the top-level files
+        top_level = json_file.parent == self.knowledge_base
+        for path, item in iter_json_items(json_file, depth=2):
+            entry = top_level and path in ENTRY_PATHS
+            with self.instrumentation.paused():
+                self.real_extractor.entries_loaded += 1
+                self.real_extractor.extract_text(item)
+                if entry:
+                    self.extractor.extract_raw_entry(item)
+            if entry:
+                yield item
+
+    def finish(self):
+        """Scan the files the cleaner did not read: those in subdirectories, or
+        all of them when its stage cache already held the prepared entries.
+        Top-level files come first in both globs, so every tool still sees its
+        files in the order of a separate run"""
+        for json_file in self.knowledge_base.glob('**/*.json'):
+            if json_file in self.scanned:
+                continue
+            try:
+                for _ in self.read_entries(json_file):
+                    pass
+            except Exception as e:
+                logger.error(f"Error loading {json_file}: {e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run clean, extract and extract-real from a single scan of the knowledge base")
+    parser.add_argument('--data-dir', default='data',
+                        help='directory containing comprehensive-knowledge-base/; every tool writes '
+                             'its outputs next to it')
+    parser.add_argument('--raw-data-dir', type=Path,
+                        help='raw scraped files, read by the table extractor only '
+                             '(default: research-tools/raw-scraped-data)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='shard cleaning and extraction across N worker processes')
+    parser.add_argument('--stage-cache', action='store_true',
+                        help="reuse the cleaner's cached stage outputs (see clean --stage-cache)")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.stage_cache and args.workers > 1:
+        parser.error('--stage-cache runs the serial fused pass; drop --workers')
+
+    cleaner = load_command('clean').ArcheroDataCleaner(args.data_dir, workers=args.workers,
+                                                       stage_cache=args.stage_cache)
+    extractor = load_command('extract').ArcheroDataExtractor(cleaner.raw_data_dir)
+    if args.raw_data_dir:
+        extractor.raw_data_dir = args.raw_data_dir
+    real_extractor = load_command('extract-real').RealDataExtractor()
+    scan = SharedScan(cleaner.raw_data_dir, extractor, real_extractor, cleaner.instrumentation)
+
+    cleaner.run_cleaning_pipeline(scan.read_entries)
+    scan.finish()
+    logger.info(f"Scanned {len(scan.scanned)} knowledge base files once for all three extractors")
+
+    # The raw scraped files follow the knowledge base, as in a separate extract run
+    extractor.extract_structured_data(extractor.load_all_data(extractor.iter_raw_sources()))
+    extractor.save_results()
+
+    print(f"✅ Processed {real_extractor.entries_loaded} raw entries")
+    real_extractor.save_structured_data(Path(args.data_dir) / "structured-clean")
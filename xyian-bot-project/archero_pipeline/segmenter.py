@@ -0,0 +1,128 @@
+"""
+Message-level segmentation of scraped Discord dumps
+Knowledge base entries are whole conversations flattened into one string
+("<speaker> <role> <timestamp> <text> ..."); this splits them back into
+individual messages with speaker, role, timestamp and text fields
+"""
+
+import re
+from collections import defaultdict
+from typing import List, NamedTuple, Optional
+
+# Message header timestamps: "10/2/25, 6:50 PM", "Yesterday at 8:12 AM", "12:43 AM".
+# Bare times preceded by "at " belong to long-form edit markers.
+TIMESTAMP = re.compile(
+    r'(?:\b\d{1,2}/\d{1,2}/\d{2,4},\s+|\b(?:Yesterday|Today)\s+at\s+|(?<!at ))'
+    r'\b\d{1,2}:\d{2}\s?[AP]M\b'
+)
+
+# Server role titles printed between the speaker and the timestamp
+ROLE = re.compile(
+    r'(?:\b(?:ARC2\s+)?Chat\s+Mod|\bHead\s+Moderator|\bModerator'
+    r'|\b(?:Legendary|Mythic|Elite|Senior|Junior|Novice)\s+Archer|\bArcher\s+Booster'
+    r'|\bNovice\s+Explorer|\bArchero\s+2\s+Helper|\bRange\s+Master|\bWiki\s+Contributor'
+    r'|\bHunting\s+Ace|\bFusion\s+Guide|\bRetired\s+Staff|\b(?:Bots\s+)?APP)\s*$'
+)
+
+# "(edited) Thursday, May 22, 2025 at 7:37 PM" markers inside message text
+EDIT_MARKER = re.compile(r'\s*\(edited\)(?:\s+\w+day,\s+\w+\s+\d{1,2},\s+\d{4}\s+at\s+\d{1,2}:\d{2}\s?[AP]M)?')
+
+# "October 4, 2025" day separators that end up between messages
+DAY_SEPARATOR = re.compile(
+    r'\s*\b(?:January|February|March|April|May|June|July|August|September|October|November|December)'
+    r'\s+\d{1,2},\s+\d{4}\s*$'
+)
+
+_WORD = re.compile(r'\S+')
+_NOT_A_NAME = re.compile(r'^\d+$|[.?!,:;)\]]$')
+
+# Longest speaker name considered, in words
+MAX_SPEAKER_WORDS = 6
+
+
+class Message(NamedTuple):
+    """One chat message; speaker, role and timestamp are None for text that
+    precedes the first header of a dump (or for entries without headers)"""
+    speaker: Optional[str]
+    role: Optional[str]
+    timestamp: Optional[str]
+    text: str
+    start: int
+    end: int
+
+
+def _clean_text(text: str) -> str:
+    text = EDIT_MARKER.sub('', text)
+    return DAY_SEPARATOR.sub('', text).strip()
+
+
+def _speaker_candidates(author_area: str, offset: int) -> List[tuple]:
+    """(name, start offset, preceding word) for the 1..MAX_SPEAKER_WORDS word
+    suffixes of the text before a role/timestamp, stopping at tokens that end
+    a sentence"""
+    words = list(_WORD.finditer(author_area))[-MAX_SPEAKER_WORDS - 1:]
+    candidates = []
+    for index in range(len(words) - 1, max(len(words) - MAX_SPEAKER_WORDS, 0) - 1, -1):
+        if _NOT_A_NAME.search(words[index].group()):
+            break
+        start = words[index].start()
+        preceding = words[index - 1].group() if index > 0 else ''
+        candidates.append((author_area[start:words[-1].end()], offset + start, preceding))
+    return candidates
+
+
+def segment_messages(content: str) -> List[Message]:
+    """Split a flattened chat dump into messages
+
+    Headers are found by their timestamps. The speaker name in front of each
+    header is grown word by word to the left while, across all headers of the
+    dump that carry it (under different timestamps, since dumps repeat whole
+    passages), it is always preceded by the same word; a name stops where the
+    text before it starts to vary.
+    """
+    if not content:
+        return []
+
+    headers = []
+    previous_end = 0
+    for match in TIMESTAMP.finditer(content):
+        area = content[previous_end:match.start()]
+        role_match = ROLE.search(area)
+        role = ' '.join(role_match.group().split()) if role_match else None
+        author_area = area[:role_match.start()] if role_match else area
+        headers.append((match, role, _speaker_candidates(author_area, previous_end), role_match, previous_end))
+        previous_end = match.end()
+
+    if not headers:
+        return [Message(None, None, None, content.strip(), 0, len(content))]
+
+    predecessors = defaultdict(set)
+    timestamps = defaultdict(set)
+    for match, _, candidates, _, _ in headers:
+        for name, _, preceding in candidates:
+            predecessors[name].add(preceding)
+            timestamps[name].add(match.group())
+
+    resolved = []
+    for match, role, candidates, role_match, area_start in headers:
+        speaker, author_start = None, None
+        for name, start, _ in candidates:
+            speaker, author_start = name, start
+            if len(timestamps[name]) < 2 or len(predecessors[name]) != 1:
+                break
+        if author_start is None:
+            author_start = area_start + role_match.start() if role_match else match.start()
+        resolved.append((speaker, role, match, author_start))
+
+    messages = []
+    lead = _clean_text(content[:resolved[0][3]])
+    if lead:
+        messages.append(Message(None, None, None, lead, 0, resolved[0][3]))
+
+    for index, (speaker, role, match, author_start) in enumerate(resolved):
+        end = resolved[index + 1][3] if index + 1 < len(resolved) else len(content)
+        text = _clean_text(content[match.end():end])
+        timestamp = ' '.join(match.group().split())
+        messages.append(Message(speaker, role, timestamp, text, author_start, end))
+
+    return messages
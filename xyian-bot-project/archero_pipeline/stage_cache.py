@@ -0,0 +1,81 @@
+"""
+Content-addressed cache of pipeline stage outputs
+A stage's key hashes everything its output depends on: the keys of the stages
+feeding it, the source of the code it runs and its settings. Outputs are
+stored under their key, so a rerun reuses every stage whose key is unchanged
+and a run that crashed resumes after the last stage it completed
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .aggregates import decode_aggregate, encode_aggregate
+from .manifest import file_digest
+
+CACHE_VERSION = 1
+
+
+def _encode_dependency(value: Any) -> Any:
+    """json.dumps `default` hook: compiled patterns by pattern and flags, files
+    by content hash, functions and methods by their source"""
+    if isinstance(value, re.Pattern):
+        return [value.pattern, value.flags]
+    if isinstance(value, Path):
+        return file_digest(value)
+    if inspect.isroutine(value):
+        return inspect.getsource(value)
+    raise TypeError(f"Cannot hash stage dependency of type {type(value).__name__}")
+
+
+def stage_key(*dependencies: Any) -> str:
+    """sha256 over the dependencies of a stage: upstream keys, settings,
+    patterns, functions (by source) and files (by content)"""
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    digest.update(json.dumps(dependencies, sort_keys=True, default=_encode_dependency).encode())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Stage outputs stored in a directory, one subdirectory per stage:
+    <key>.json holds a stage's metadata and is written last, so it marks the
+    output files stored next to it (<key>.<suffix>) as complete"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def path(self, stage: str, key: str, suffix: str) -> Path:
+        """Where a stage stores an output file under its key"""
+        stage_dir = self.directory / stage
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        return stage_dir / f"{key}{suffix}"
+
+    def lookup(self, stage: str, key: str) -> Optional[Dict]:
+        """Metadata of a completed stage run with this key, if cached"""
+        metadata_path = self.directory / stage / f"{key}.json"
+        if not metadata_path.exists():
+            return None
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            return json.load(f, object_hook=decode_aggregate)
+
+    def store(self, stage: str, key: str, **metadata):
+        """Mark a stage run as complete, after its output files are written"""
+        metadata_path = self.path(stage, key, '.json')
+        temp_path = metadata_path.with_name(metadata_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, default=encode_aggregate)
+        os.replace(temp_path, metadata_path)
+
+    def prune(self, stage: str, key: str) -> int:
+        """Delete a stage's outputs stored under any other key; returns how many files went"""
+        stage_dir = self.directory / stage
+        if not stage_dir.exists():
+            return 0
+        stale = [path for path in stage_dir.iterdir() if not path.name.startswith(key + '.')]
+        for path in stale:
+            path.unlink()
+        return len(stale)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start of the unified CLI (python -m archero_pipeline)
+Times the light paths (help of the CLI and of every subcommand) in fresh
+interpreters against a bare `python -c pass`, checks that none of them
+executes pandas, numpy, pyarrow or the training stack, and fails when a path
+starts more than the target slower than the bare interpreter
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Paths that must not import the heavy dependencies
+LIGHT_PATHS = [
+    ['--help'],
+    ['clean', '--help'],
+    ['extract', '--help'],
+    ['extract-real', '--help'],
+    ['extract-all', '--help'],
+    ['parse-structured', '--help'],
+    ['train', '--help'],
+    ['query', '--help']
+]
+
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'torch', 'transformers', 'datasets']
+
+# Runs the CLI in-process, then reports which heavy modules were executed
+# (lazily imported ones stay registered but unexecuted)
+LOADED_CHECK = f"""
+import json, sys
+from archero_pipeline.cli import main
+try:
+    main(sys.argv[1:])
+except SystemExit:
+    pass
+loaded = [name for name in {HEAVY_MODULES!r}
+          if name in sys.modules and type(sys.modules[name]).__name__ != '_LazyModule']
+print(json.dumps(loaded), file=sys.stderr)
+"""
+
+# Milliseconds over a bare interpreter allowed for a light path
+TARGET_MS = 100
+
+
+def best_of(repeats, command):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def loaded_heavy_modules(args):
+    child = subprocess.run([sys.executable, '-c', LOADED_CHECK, *args], cwd=PROJECT_DIR,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return json.loads(child.stderr.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for python -m archero_pipeline")
+    parser.add_argument('--repeats', type=int, default=5, help='runs per command; the fastest is reported')
+    parser.add_argument('--target-ms', type=float, default=TARGET_MS,
+                        help='fail if a light path starts more than this many ms slower than a bare interpreter')
+    args = parser.parse_args()
+
+    bare = best_of(args.repeats, [sys.executable, '-c', 'pass'])
+    print(f"{'bare interpreter':<56}{bare * 1000:8.1f}ms")
+
+    # The scripts run directly, for comparison
+    for script in ('data-cleaner.py', 'research-tools/comprehensive-data-extractor.py'):
+        elapsed = best_of(args.repeats, [sys.executable, script, '--help'])
+        print(f"{script + ' --help':<56}{elapsed * 1000:8.1f}ms")
+
+    print(f"\n{'command':<56}{'time':>10}{'overhead':>10}  heavy modules executed")
+    failures = []
+    for path in LIGHT_PATHS:
+        command = ' '.join(path)
+        elapsed = best_of(args.repeats, [sys.executable, '-m', 'archero_pipeline', *path])
+        overhead = (elapsed - bare) * 1000
+        loaded = loaded_heavy_modules(path)
+        print(f"{command:<56}{elapsed * 1000:8.1f}ms{overhead:8.1f}ms  {', '.join(loaded) or '-'}")
+        if loaded:
+            failures.append(f"{command} executes {', '.join(loaded)}")
+        if overhead > args.target_ms:
+            failures.append(f"{command} starts {overhead:.0f}ms slower than a bare interpreter "
+                            f"(target {args.target_ms:.0f}ms)")
+
+    if failures:
+        sys.exit("❌ " + "\n❌ ".join(failures))
+    print(f"\n✅ Every light path starts within {args.target_ms:.0f}ms of a bare interpreter")
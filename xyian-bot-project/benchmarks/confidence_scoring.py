@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-entry vs batch confidence scoring
+Scores a synthetic corpus with ArcheroDataCleaner.extract_confidence_score one
+entry at a time and with score_confidences over a whole frame, checks that the
+scores are identical and reports the speedup
+"""
+
+import argparse
+import importlib.util
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+
+WORDS = ['the', 'oracle', 'spear', 'build', 'meteor', 'rune', 'damage', 'crit', 'thor', 'arena', 'guide',
+         'attack', 'defense', 'gold', 'gems', 'shards', 'upgrade', 'legendary', 'chest', 'boss', 'Strategy',
+         'DAMAGE', 'is', 'best', 'with', 'and', 'for', 'mythic', 'dragoon', 'otta', 'stage', 'wave']
+SOURCES = ['discord', 'Discord-chat', 'wiki', 'archero2-wiki', 'reddit', 'forum', '']
+
+
+def load_cleaner_class():
+    spec = importlib.util.spec_from_file_location('data_cleaner', PROJECT_DIR / 'data-cleaner.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.ArcheroDataCleaner
+
+
+def synthetic_entries(count, seed=0):
+    """Entries of 3 to 400 words with occasional percentages and original confidences"""
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(3, 400))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), f"{rng.randint(1, 300)}%")
+        entry = {'content': ' '.join(words), 'source': rng.choice(SOURCES)}
+        if rng.random() < 0.5:
+            entry['confidence'] = rng.random()
+        entries.append(entry)
+    return entries
+
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-entry and batch confidence scoring")
+    parser.add_argument('--entries', type=int, default=100_000, help='synthetic entries to score')
+    parser.add_argument('--repeats', type=int, default=3, help='runs per variant; the fastest is reported')
+    parser.add_argument('--batch-size', type=int, default=None, help='entries per frame (default: SCORE_BATCH_SIZE)')
+    args = parser.parse_args()
+
+    ArcheroDataCleaner = load_cleaner_class()
+    args.batch_size = args.batch_size or ArcheroDataCleaner.SCORE_BATCH_SIZE
+    with tempfile.TemporaryDirectory() as data_dir:
+        cleaner = ArcheroDataCleaner(data_dir)
+    entries = synthetic_entries(args.entries)
+
+    scalar_time, scalar = best_of(args.repeats, lambda: [cleaner.extract_confidence_score(e) for e in entries])
+
+    # The pipeline scores SCORE_BATCH_SIZE entries at a time
+    batches = [entries[i:i + args.batch_size] for i in range(0, len(entries), args.batch_size)]
+    frames_time, frames = best_of(args.repeats, lambda: [cleaner.confidence_frame(batch) for batch in batches])
+    batch_time, batch = best_of(args.repeats, lambda: np.concatenate([cleaner.score_confidences(frame)
+                                                                      for frame in frames]))
+
+    if not np.array_equal(np.array(scalar), batch):
+        sys.exit("❌ Batch scores differ from per-entry scores")
+
+    print(f"entries:            {args.entries} (batches of {args.batch_size})")
+    # Totals for all entries, and what that comes to per entry
+    per_entry = 1e6 / args.entries
+    print(f"per-entry scorer:   {scalar_time:.3f}s total ({scalar_time * per_entry:.1f}µs/entry)")
+    print(f"frame construction: {frames_time:.3f}s total ({frames_time * per_entry:.1f}µs/entry)")
+    print(f"batch scoring:      {batch_time:.3f}s total ({batch_time * per_entry:.1f}µs/entry)")
+    print(f"speedup:            {scalar_time / batch_time:.1f}x scoring, "
+          f"{scalar_time / (frames_time + batch_time):.1f}x including the frames")
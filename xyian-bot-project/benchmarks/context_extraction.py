@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: keyword search vs span-based context extraction
+Times the former get_context (lowercase the whole entry, then find the keyword)
+against slicing context windows at the spans the pattern matcher reports, on
+entries of doubling size, and counts the mentions whose searched context lands
+on a different occurrence than the one that was matched
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from archero_pipeline.bigrams import BigramMatcher, number_before, word_after, word_before
+
+CONTEXT_LENGTH = 50
+
+WORDS = ['the', 'fire', 'ice', 'rune', 'meteor', 'circle', 'sprite', 'practice', 'price', 'oracle', 'spear',
+         'dragoon', 'ring', 'boots', 'with', 'and', 'crit', '12%', 'damage', 'stage', 'Fire', 'nice', 'is']
+
+MATCHER = BigramMatcher({
+    'runes': [word_before('rune'), word_after('rune', colons=True), word_before('meteor'), word_after('meteor'),
+              word_before('circle'), word_after('circle'), word_before('sprite'), word_after('sprite')],
+    'gear': [word_before('spear'), word_before('ring'), word_before('boots')],
+    'stats': [number_before('crit'), number_before('damage', 'dmg')]
+})
+
+
+def legacy_get_context(text, keyword, context_length=CONTEXT_LENGTH):
+    """The former ArcheroDataExtractor.get_context"""
+    keyword_lower = keyword.lower()
+    text_lower = text.lower()
+
+    start = text_lower.find(keyword_lower)
+    if start == -1:
+        return ""
+
+    context_start = max(0, start - context_length)
+    context_end = min(len(text), start + len(keyword) + context_length)
+
+    return text[context_start:context_end]
+
+
+def span_context(text, start, end, context_length=CONTEXT_LENGTH):
+    return text[max(0, start - context_length):min(len(text), end + context_length)]
+
+
+def synthetic_entry(size, seed=0):
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        words.append(rng.choice(WORDS))
+        length += len(words[-1]) + 1
+    return ' '.join(words)
+
+
+def matched_spans(text):
+    """(start, end) of every match, as extraction records them"""
+    return [span for spans in MATCHER.scan(text).values() for span in spans]
+
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare keyword-search and span-based context extraction")
+    parser.add_argument('--min-bytes', type=int, default=1 << 10, help='smallest entry size')
+    parser.add_argument('--max-bytes', type=int, default=1 << 17, help='largest entry size')
+    parser.add_argument('--repeats', type=int, default=3, help='runs per measurement; the fastest is reported')
+    args = parser.parse_args()
+
+    print(f"{'bytes':>8}  {'mentions':>8}  {'get_context':>12}  {'span slices':>12}  {'speedup':>8}  "
+          f"{'misplaced':>9}")
+    size = args.min_bytes
+    while size <= args.max_bytes:
+        text = synthetic_entry(size)
+        spans = matched_spans(text)
+
+        legacy_time, legacy = best_of(args.repeats, lambda: [legacy_get_context(text, text[start:end])
+                                                              for start, end in spans])
+        span_time, contexts = best_of(args.repeats, lambda: [span_context(text, start, end)
+                                                              for start, end in spans])
+
+        for (start, end), context in zip(spans, contexts):
+            if not context[min(start, CONTEXT_LENGTH):].startswith(text[start:end]):
+                sys.exit(f"❌ Context of the match at {start} does not contain it")
+
+        # A searched context is misplaced when an earlier occurrence of the
+        # keyword (or of a word containing it) shadows the matched one
+        misplaced = sum(old != new for old, new in zip(legacy, contexts))
+        print(f"{len(text):>8}  {len(spans):>8}  {legacy_time * 1000:10.2f}ms  {span_time * 1000:10.2f}ms  "
+              f"{legacy_time / span_time:7.0f}x  {misplaced:>9}")
+        size *= 2
+
+    print("\n✅ Every span context holds its own match; slicing cost does not grow with the entry")
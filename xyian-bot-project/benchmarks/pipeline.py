@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cleaning and extraction pipelines on a seeded synthetic corpus
+Generates knowledge-base files of Discord chat blobs that mention gear, runes,
+characters, percentages and costs, then runs ArcheroDataCleaner and
+ArcheroDataExtractor on them, each size and tool in a fresh process, and
+writes per-stage seconds, entries/sec and MB/sec plus each run's peak RSS as
+JSON, so results from different commits can be compared
+
+Streamed stages (load, dedup, ...) are timed by the time spent producing their
+items minus the time spent in the stage feeding them.
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
+from archero_pipeline.parallel import chunked
+
+GENERATOR_VERSION = 1
+ENTRIES_PER_FILE = 10000
+
+CATEGORIES = ['gear_details', 'rune_details', 'character_stats', 'pve_strategies', 'boss_guides']
+USERS = ['Sebiias', 'Hybridreamer', 'WetTissue69', 'M1LO', 'Awesomethanu', 'Tryhard Cat', 'Kaz', 'Lumi']
+RANKS = ['Junior Archer', 'Senior Archer', 'Range Master', 'Moderator']
+SETS = ['oracle', 'dragoon', 'griffin', 'chromatic', 'mythic']
+PIECES = ['xbow', 'spear', 'staff', 'amulet', 'ring', 'chestplate', 'boots', 'helmet']
+RUNES = ['meteor', 'sprite', 'etched', 'circle', 'freeze', 'fire', 'lightning', 'shield']
+CHARACTERS = ['thor', 'otta', 'helix', 'drac', 'rolla', 'loki', 'atreus', 'nyanja']
+MODES = ['pvp', 'pve', 'arena', 'gvg']
+STATS = ['crit', 'damage', 'attack', 'defense']
+MESSAGES = [
+    "full {set} is better than mixed for {mode}",
+    "{set} {piece} with {set2} {piece2} is my {mode} build",
+    "{rune} rune gives {pct}% {stat} at max level",
+    "is {rune} rune worth it over {rune2} etched",
+    "upgrading the {set} {piece} costs {n} gems and {m} {set} shards",
+    "{char} build guide: {set} {piece}, {rune} rune, {pct}% {stat}",
+    "{char} or {char2} for {mode}?",
+    "need {m} stones and {k} gold for the next level",
+    "got {n} lures from the event, {m} keys left",
+    "thanks bro",
+    "lol same",
+    "what about arena though",
+]
+
+# Share of entries that repeat an earlier one, as cross-posted chat does
+DUPLICATE_RATE = 0.05
+
+
+def synthetic_message(rng):
+    text = rng.choice(MESSAGES).format(
+        set=rng.choice(SETS), set2=rng.choice(SETS), piece=rng.choice(PIECES), piece2=rng.choice(PIECES),
+        rune=rng.choice(RUNES), rune2=rng.choice(RUNES), char=rng.choice(CHARACTERS),
+        char2=rng.choice(CHARACTERS), mode=rng.choice(MODES), stat=rng.choice(STATS),
+        pct=rng.choice([5, 8, 10, 12.5, 15, 20, 25, 40]), n=f"{rng.randrange(1, 40) * 100:,}",
+        m=rng.randrange(1, 200), k=rng.randrange(1, 50) * 1000)
+    return (f"{rng.choice(USERS)} {rng.choice(RANKS)} Yesterday at {rng.randrange(1, 13)}:"
+            f"{rng.randrange(60):02d} PM {text}")
+
+
+def synthetic_entry(rng, category):
+    # Chat blobs of a few to a few dozen messages (real entries: median ~1.3KB)
+    messages = [synthetic_message(rng) for _ in range(int(rng.lognormvariate(2.4, 0.6)) + 1)]
+    return {
+        'content': ' '.join(messages),
+        'source': f"{category}-discord-data.json",
+        'category': category,
+        'confidence': round(rng.uniform(0.3, 1.0), 3),
+        'extractedAt': '2025-10-08T05:32:39.834Z'
+    }
+
+
+def generate_corpus(corpus_dir, entries, seed):
+    """Write `entries` synthetic entries into knowledge-base files under
+    corpus_dir/comprehensive-knowledge-base, streaming one entry at a time;
+    an existing corpus of the same size, seed and generator is reused"""
+    corpus_dir = Path(corpus_dir)
+    meta_path = corpus_dir / "corpus.json"
+    meta = {'generator': GENERATOR_VERSION, 'entries': entries, 'seed': seed}
+    if meta_path.exists():
+        existing = json.loads(meta_path.read_text())
+        if {key: existing.get(key) for key in meta} == meta:
+            return existing
+        shutil.rmtree(corpus_dir)
+
+    kb_dir = corpus_dir / "comprehensive-knowledge-base"
+    kb_dir.mkdir(parents=True)
+    rng = random.Random(seed)
+    recent = []
+    file_bytes = content_bytes = 0
+    for file_number, start in enumerate(range(0, entries, ENTRIES_PER_FILE)):
+        category = CATEGORIES[file_number % len(CATEGORIES)]
+        path = kb_dir / f"synthetic_{file_number:05d}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'name': category, 'description': 'synthetic', 'priority': 'high'})[:-1])
+            f.write(', "data": [')
+            for i in range(min(ENTRIES_PER_FILE, entries - start)):
+                if recent and rng.random() < DUPLICATE_RATE:
+                    entry = rng.choice(recent)
+                else:
+                    entry = synthetic_entry(rng, category)
+                    recent = (recent + [entry])[-100:]
+                f.write((', ' if i else '') + json.dumps(entry, ensure_ascii=False))
+                content_bytes += len(entry['content'].encode('utf-8'))
+            f.write(']}')
+        file_bytes += path.stat().st_size
+
+    meta.update(file_bytes=file_bytes, content_bytes=content_bytes)
+    meta_path.write_text(json.dumps(meta))
+    return meta
+
+
+def load_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timed(clock, name, iterable):
+    """Yield the items of iterable, adding the time spent producing them to clock[name]"""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            clock[name] += time.perf_counter() - start
+            return
+        clock[name] += time.perf_counter() - start
+        yield item
+
+
+def stopwatch(clock, name, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    clock[name] += time.perf_counter() - start
+    return result
+
+
+def measure_cleaner(corpus_dir, output_dir):
+    """Stage times of the fused cleaning pass; mirrors prepare_entries and
+    extract_all_information with a clock around every step"""
+    module = load_script(PROJECT_DIR / "data-cleaner.py", "data_cleaner")
+    cleaner = module.ArcheroDataCleaner(corpus_dir)
+    cleaner.cleaned_data_dir = Path(output_dir)
+    clock = defaultdict(float)
+
+    entries = timed(clock, 'load', cleaner.load_all_raw_data())
+    unique = timed(clock, 'dedup', cleaner._iter_unique_entries(cleaner.iter_units(entries)))
+    extractors = cleaner.category_extractors()
+    states = {category: new_state() for category, (new_state, _, _) in extractors.items()}
+    for batch in chunked(unique, cleaner.SCORE_BATCH_SIZE):
+        cleaner.quality_metrics['cleaned_entries'] += len(batch)
+        records = stopwatch(clock, 'score_and_scan', cleaner._prepare_batch, batch)
+        for category, (_, collect, _) in extractors.items():
+            start = time.perf_counter()
+            for record in records:
+                collect(states[category], record)
+            clock[f"extract:{category}"] += time.perf_counter() - start
+    clock['dedup'] -= clock['load']
+
+    results = {}
+    for category, (_, _, finalize) in extractors.items():
+        results[category] = stopwatch(clock, f"extract:{category}", finalize, states[category])
+    cleaner._store_results(results)
+    cleaner.quality_metrics['confidence'] = cleaner.confidence_sketch.summary()
+    stopwatch(clock, 'save', cleaner.save_clean_database)
+    return clock
+
+
+def measure_extractor(corpus_dir, output_dir):
+    """Stage times of a full extraction, the table build and save"""
+    module = load_script(PROJECT_DIR / "research-tools" / "comprehensive-data-extractor.py", "data_extractor")
+    extractor = module.ArcheroDataExtractor(Path(corpus_dir) / "comprehensive-knowledge-base")
+    extractor.raw_data_dir = Path(output_dir) / "no-raw-data"
+    clock = defaultdict(float)
+
+    stopwatch(clock, 'extract_structured_data', extractor.extract_structured_data,
+              timed(clock, 'load', extractor.load_all_data()))
+    clock['extract_structured_data'] -= clock['load']
+    # save_tables builds the mention frame and all four tables once, in the
+    # extractor's own build_tables stage, then writes them
+    stopwatch(clock, 'save_tables', extractor.save_tables, output_dir)
+    clock['build_tables'] = extractor.instrumentation.report()['stages']['build_tables']['wall_seconds']
+    clock['save_tables'] -= clock['build_tables']
+    return clock
+
+
+MEASURES = {'cleaner': measure_cleaner, 'extractor': measure_extractor}
+
+
+def measure(tool, corpus_dir):
+    """Run one tool on a corpus in this process; returns its result record"""
+    logging.disable(logging.INFO)
+    meta = json.loads((Path(corpus_dir) / "corpus.json").read_text())
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        clock = MEASURES[tool](corpus_dir, output_dir)
+        total = time.perf_counter() - start
+
+    megabytes = meta['file_bytes'] / 1e6
+    stages = {
+        name: {'seconds': round(seconds, 6),
+               'entries_per_sec': round(meta['entries'] / seconds, 1) if seconds > 0 else None,
+               'mb_per_sec': round(megabytes / seconds, 3) if seconds > 0 else None}
+        for name, seconds in clock.items()
+    }
+    return {
+        'tool': tool,
+        'entries': meta['entries'],
+        'corpus_mb': round(megabytes, 3),
+        'total_seconds': round(total, 6),
+        'entries_per_sec': round(meta['entries'] / total, 1),
+        'mb_per_sec': round(megabytes / total, 3),
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'stages': stages
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cleaning and extraction pipelines")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='corpus sizes in entries (up to 10,000,000)')
+    parser.add_argument('--tools', nargs='+', choices=list(MEASURES), default=list(MEASURES))
+    parser.add_argument('--seed', type=int, default=0, help='corpus generator seed')
+    parser.add_argument('--corpus-dir', type=Path,
+                        help='keep generated corpora here and reuse them across runs (default: a temporary directory)')
+    parser.add_argument('--output', type=Path, default=Path('pipeline-benchmark.json'), help='results JSON file')
+    parser.add_argument('--measure', choices=list(MEASURES), help=argparse.SUPPRESS)
+    parser.add_argument('--corpus', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        # Child process: one tool on one corpus, result on stdout
+        print(json.dumps(measure(args.measure, args.corpus)))
+        sys.exit(0)
+
+    if any(size < 1 or size > 10_000_000 for size in args.sizes):
+        parser.error('--sizes must be between 1 and 10,000,000 entries')
+
+    corpus_root = args.corpus_dir or Path(tempfile.mkdtemp(prefix='archero-bench-'))
+    runs = []
+    try:
+        print(f"{'tool':>10}  {'entries':>9}  {'MB':>8}  {'seconds':>9}  {'entries/s':>10}  {'MB/s':>7}  "
+              f"{'peak RSS':>9}  slowest stage")
+        for size in args.sizes:
+            corpus_dir = corpus_root / f"{size}-seed{args.seed}"
+            generate_corpus(corpus_dir, size, args.seed)
+            for tool in args.tools:
+                child = subprocess.run([sys.executable, __file__, '--measure', tool, '--corpus', str(corpus_dir)],
+                                       capture_output=True, text=True)
+                if child.returncode != 0:
+                    sys.exit(f"❌ {tool} failed on {size} entries:\n{child.stderr}")
+                run = json.loads(child.stdout.splitlines()[-1])
+                runs.append(run)
+                slowest = max(run['stages'], key=lambda name: run['stages'][name]['seconds'])
+                print(f"{tool:>10}  {size:>9}  {run['corpus_mb']:8.1f}  {run['total_seconds']:9.2f}  "
+                      f"{run['entries_per_sec']:10.0f}  {run['mb_per_sec']:7.2f}  {run['peak_rss_mb']:7.0f}MB  "
+                      f"{slowest} ({run['stages'][slowest]['seconds']:.2f}s)")
+    finally:
+        if args.corpus_dir is None:
+            shutil.rmtree(corpus_root, ignore_errors=True)
+
+    report = {'commit': git_commit(), 'python': sys.version.split()[0], 'seed': args.seed, 'runs': runs}
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\n✅ Results written to {args.output}")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worst-case inputs for quantity extraction
+Times the former material regexes and the linear QuantityParser on inputs of
+doubling size built to make the regexes backtrack (numbers followed by long
+runs of words and no unit), and checks that the parser's time per byte stays
+bounded as the input grows
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from archero_pipeline.quantities import GAME_UNITS, QuantityParser
+
+# The material patterns ArcheroDataExtractor used before the quantity parser
+LEGACY_MATERIAL_PATTERNS = [
+    re.compile(r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:shards?|fragments?)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:cores?|essence)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:stones?|crystals?)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:dust|powder)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:keys?|tokens?)', re.IGNORECASE)
+]
+
+
+def repeated(text):
+    return lambda size: text * (size // len(text))
+
+
+# Input builders by name, each taking a size in bytes
+WORST_CASES = {
+    'numbers in a long word run': repeated('1 epic '),
+    'one number, then words': lambda size: '7 ' + 'legendary ' * (size // 10),
+    'dense quantities': repeated('40 epic shards and 1,200 gems, '),
+}
+
+
+def best_of(repeats, fn):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worst-case quantity extraction benchmark")
+    parser.add_argument('--min-bytes', type=int, default=1 << 10, help='smallest input size')
+    parser.add_argument('--max-bytes', type=int, default=1 << 20, help='largest input size')
+    parser.add_argument('--legacy-max-bytes', type=int, default=1 << 14,
+                        help='largest input the (quadratic) legacy regexes are run on')
+    parser.add_argument('--repeats', type=int, default=3, help='runs per measurement; the fastest is reported')
+    parser.add_argument('--max-growth', type=float, default=2.5,
+                        help='fail if the parser\'s time per byte grows by more than this factor')
+    args = parser.parse_args()
+
+    quantity_parser = QuantityParser(GAME_UNITS)
+
+    bounded = True
+    for name, build_input in WORST_CASES.items():
+        print(f"\n{name}")
+        print(f"{'bytes':>10}  {'legacy regexes':>16}  {'quantity parser':>16}  {'parser ns/byte':>14}")
+        per_byte = []
+        size = args.min_bytes
+        while size <= args.max_bytes:
+            text = build_input(size)
+            parser_time = best_of(args.repeats, lambda: list(quantity_parser.parse(text)))
+            per_byte.append(parser_time / len(text))
+            if size <= args.legacy_max_bytes:
+                legacy_time = best_of(args.repeats, lambda: [p.findall(text) for p in LEGACY_MATERIAL_PATTERNS])
+                legacy = f"{legacy_time * 1000:14.2f}ms"
+            else:
+                legacy = f"{'skipped':>16}"
+            print(f"{len(text):>10}  {legacy}  {parser_time * 1000:14.2f}ms  {per_byte[-1] * 1e9:14.1f}")
+            size *= 2
+
+        growth = max(per_byte) / min(per_byte)
+        print(f"parser time per byte varies by {growth:.2f}x across sizes")
+        bounded &= growth <= args.max_growth
+
+    if not bounded:
+        sys.exit(f"❌ Parser time per byte grew by more than {args.max_growth}x")
+    print("\n✅ Parser time per byte is bounded")
@@ -5,36 +5,201 @@ Cleans scraped data and creates proper database for AI/RAG systems
 Based on best practices for RAG and vector databases
 """
 
+from __future__ import annotations
+
 import json
 import re
-import pandas as pd
-import numpy as np
 from pathlib import Path
 from collections import defaultdict, Counter
 import logging
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Callable, Tuple, Iterable, Iterator, NamedTuple
+import argparse
 import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+
+from archero_pipeline.aggregates import ScoreSketch, TopK
+from archero_pipeline.bm25 import BM25Index, term_counts
+from archero_pipeline.corpus_db import write_corpus_db
+from archero_pipeline.ingest import iter_json_entries
+from archero_pipeline.gazetteer import GAME_DATA_SCRIPT, Gazetteer, Mention, seed_game_entities
+from archero_pipeline.instrument import Instrumentation, content_bytes, entry_label, run_profiled
+from archero_pipeline.lazy import lazy_import
+from archero_pipeline.manifest import SourceManifest, code_fingerprint, file_digest
+from archero_pipeline.ndjson import NdjsonWriter, iter_ndjson
+from archero_pipeline.packed import write_packed
+from archero_pipeline.segmenter import segment_messages
+from archero_pipeline.parallel import chunked, imap_ordered, merge_into, to_plain
+from archero_pipeline.stage_cache import StageCache, stage_key
+
+# Loaded on first use, so --help, argument errors and fully cached reruns skip
+# them; minhash builds numpy constants at import
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+minhash = lazy_import('archero_pipeline.minhash')
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class PreparedEntry(NamedTuple):
+    """A deduplicated entry that has been cleaned, scored and scanned exactly once"""
+    content: str
+    confidence: float
+    source_file: str
+    mentions: Tuple[Mention, ...] = ()
+
+# Cleaner shared by the tasks of one worker process (see --workers)
+_worker_cleaner = None
+
+def _init_worker(cleaner):
+    global _worker_cleaner
+    _worker_cleaner = cleaner
+
+def _clean_chunk(entries: List[Dict]) -> List[Tuple]:
+    return [(unit,) + _worker_cleaner._clean_hash_and_sign(unit) for unit in _worker_cleaner.iter_units(entries)]
+
+def _collect_chunk(pairs: List[Tuple[Dict, str]]) -> Tuple[Dict, Dict[str, int]]:
+    # The shard's match counts go back with its aggregates; a worker's own
+    # instrumentation is never reported
+    instrumentation = _worker_cleaner.instrumentation = Instrumentation()
+    return _worker_cleaner.collect_partial(pairs), instrumentation.matches
+
 class ArcheroDataCleaner:
-    def __init__(self, data_dir="data"):
+    # Entity vocabulary; the curated names and aliases from
+    # scripts/parse-real-game-data.py are added on top of these
+    GEAR_SET_NAMES = ['oracle', 'dragoon', 'griffin', 'chromatic', 'mythic']
+
+    # Words that must follow a set name for it to count as a gear mention
+    GEAR_WORDS = ['set', 'gear', 'armor', 'weapon', 'amulet', 'ring', 'chest', 'boots', 'helmet']
+
+    PIECE_WORDS = {
+        'weapon': ['crossbow', 'xbow', 'spear', 'staff', 'bow'],
+        'amulet': ['amulet', 'necklace'],
+        'ring': ['ring', 'band'],
+        'chest': ['chest', 'chestplate', 'armor', 'plate'],
+        'boots': ['boots', 'shoes'],
+        'helmet': ['helmet', 'helm', 'hat']
+    }
+
+    RUNE_NAMES = ['meteor', 'sprite', 'elemental', 'etched', 'circles', 'potion', 'sword', 'shield', 'freeze', 'ice', 'fire', 'lightning']
+
+    # Words that must follow a rune name for it to count as a rune mention
+    RUNE_WORDS = ['rune', 'etched']
+
+    CHARACTER_NAMES = ['thor', 'otta', 'helix', 'drac', 'rolla', 'loki', 'atreus', 'nyanja', 'dracoola']
+
+    # Spellings seen in chat mapped onto the canonical names
+    ENTITY_ALIASES = {
+        'rune': {'circle': 'circles'},
+        'character': {'atreyus': 'atreus'}
+    }
+
+    EFFECT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*%')
+    USAGE_PATTERN = re.compile(r'\b(pvp|pve|arena|gvg)\b', re.IGNORECASE)
+    BUILD_PATTERN = re.compile(r'\b(build|strategy|guide)\b', re.IGNORECASE)
+    FOLLOWING_SPACE = re.compile(r'\s+')
+
+    # Confidence scoring signals (see extract_confidence_score)
+    QUALITY_KEYWORDS = ['damage', 'crit', 'attack', 'defense']
+    STRATEGY_KEYWORDS = ['build', 'strategy', 'guide']
+    PERCENTAGE_PATTERN = re.compile(r'\d+%')
+    # Same matches as PERCENTAGE_PATTERN, but the leading literal lets the
+    # regex engine skip straight from one '%' to the next
+    PERCENTAGE_SEARCH = re.compile(r'%(?<=\d%)')
+
+    RUNE_COST_PATTERNS = [
+        re.compile(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gems?|gem)'),
+        re.compile(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gold|g)'),
+        re.compile(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lures?|lure)')
+    ]
+
+    MATERIAL_PATTERNS = {
+        'shards': re.compile(r'(\d+)\s*(?:shards?|fragments?)'),
+        'gems': re.compile(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gems?|gem)'),
+        'gold': re.compile(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gold|g)'),
+        'lures': re.compile(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lures?|lure)'),
+        'keys': re.compile(r'(\d+)\s*(?:keys?|tokens?)'),
+        'cores': re.compile(r'(\d+)\s*(?:cores?|essence)'),
+        'stones': re.compile(r'(\d+)\s*(?:stones?|crystals?)')
+    }
+
+    # Entries per task handed to a worker process
+    SHARD_SIZE = 256
+
+    # Entries scored together by score_confidences
+    SCORE_BATCH_SIZE = 4096
+
+    # Per-entity retention: best contexts by confidence then length, best pieces
+    # per gear slot, and the first builds per character
+    CONTEXT_LIMIT = 10
+    PIECE_LIMIT = 5
+    BUILD_LIMIT = 5
+
+    # Methods and class constants each cached stage depends on (see --stage-cache);
+    # editing one recomputes that stage and the stages fed by it. The entity
+    # vocabulary compiles into the gazetteer, so it belongs to the prepare stage
+    PREPARE_DEPENDENCIES = (
+        'load_all_raw_data', '_iter_file_entries', 'segment_entries', 'iter_units', 'clean_text_content',
+        'confidence_frame', '_contains_any', 'score_confidences', '_clean_and_hash', '_clean_hash_and_sign',
+        '_new_near_duplicate_index', '_duplicate_kind', '_count_duplicate', '_iter_unique_entries',
+        'prepare_entries', '_prepare_batch', 'build_gazetteer',
+        'GEAR_SET_NAMES', 'GEAR_WORDS', 'PIECE_WORDS', 'RUNE_NAMES', 'RUNE_WORDS', 'CHARACTER_NAMES',
+        'ENTITY_ALIASES', 'QUALITY_KEYWORDS', 'STRATEGY_KEYWORDS', 'PERCENTAGE_SEARCH'
+    )
+    ENTITY_DEPENDENCIES = ('_qualified_names', 'FOLLOWING_SPACE', '_add_mention', '_count_values',
+                           '_finalize_mentions', 'CONTEXT_LIMIT')
+    CATEGORY_DEPENDENCIES = {
+        'gear_sets': ENTITY_DEPENDENCIES + ('_new_gear_data', '_collect_gear', '_finalize_gear',
+                                            'PIECE_WORDS', 'PIECE_LIMIT'),
+        'runes': ENTITY_DEPENDENCIES + ('_new_rune_data', '_collect_runes', '_finalize_runes',
+                                        'EFFECT_PATTERN', 'RUNE_COST_PATTERNS'),
+        'characters': ENTITY_DEPENDENCIES + ('_new_character_data', '_collect_characters', '_finalize_characters',
+                                             'USAGE_PATTERN', 'BUILD_PATTERN', 'BUILD_LIMIT'),
+        'materials': ENTITY_DEPENDENCIES + ('_new_material_data', '_collect_materials', '_finalize_materials',
+                                            'MATERIAL_PATTERNS'),
+        'search_index': ('_new_index_data', '_collect_index', '_finalize_index'),
+        'corpus': ('_new_corpus_data', '_collect_corpus', '_finalize_corpus', '_qualified_names',
+                   'FOLLOWING_SPACE', 'MATERIAL_PATTERNS')
+    }
+    SAVE_DEPENDENCIES = ('save_clean_database', 'entity_rows')
+
+    def __init__(self, data_dir="data", fused=True, workers=1, incremental=False,
+                 near_duplicate_threshold=None, segment=False, sqlite=False, ndjson=False, stage_cache=False):
         self.data_dir = Path(data_dir)
+        self.fused = fused
+        self.segment = segment
+        self.sqlite = sqlite
+        self.ndjson = ndjson
+        self.workers = workers
+        self.incremental = incremental
+        self.stage_cache = stage_cache
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.minhasher = minhash.MinHasher() if near_duplicate_threshold is not None else None
         self.raw_data_dir = self.data_dir / "comprehensive-knowledge-base"
         self.cleaned_data_dir = self.data_dir / "cleaned-database"
+        self.manifest_dir = self.data_dir / "cleaned-database.manifest"
+        self.stage_cache_dir = self.data_dir / "cleaned-database.stages"
         self.cleaned_data_dir.mkdir(exist_ok=True)
+        self.gazetteer = self.build_gazetteer()
         
         # Data quality metrics
         self.quality_metrics = {
             'total_entries': 0,
+            'segmented_messages': 0,
             'cleaned_entries': 0,
             'duplicates_removed': 0,
+            'near_duplicates_removed': 0,
             'invalid_entries': 0,
-            'confidence_scores': []
+            'confidence': ScoreSketch().summary()
         }
         
+        # Confidence of every entity mention, filled as the categories are finalized
+        self.confidence_sketch = ScoreSketch()
+        
+        # Stage timings and pattern match counts for the quality report
+        self.instrumentation = Instrumentation()
+        
         # Clean data storage
         self.clean_data = {
             'gear_sets': {},
@@ -46,30 +211,98 @@ class ArcheroDataCleaner:
             'events': {}
         }
         
+        # BM25 index over the cleaned entries, saved next to the database
+        self.search_index = None
+        
+        # Cleaned entries and their entity mentions for the SQLite export (see --sqlite)
+        self.corpus = None
+        
+        # Cache keys of the stages computed or reused by this run (see --stage-cache)
+        self.stage_keys = {}
+        
         logger.info("🧹 Advanced Data Cleaner initialized")
 
-    def load_all_raw_data(self) -> List[Dict]:
-        """Load all raw scraped data from various sources"""
-        all_data = []
+    def build_gazetteer(self) -> Gazetteer:
+        """Compile the entity scanner from the cleaner vocabulary and the curated game data"""
+        gazetteer = Gazetteer()
+        
+        for name in self.GEAR_SET_NAMES:
+            gazetteer.add(name, 'gear_set')
+        for name in self.RUNE_NAMES:
+            gazetteer.add(name, 'rune')
+        for name in self.CHARACTER_NAMES:
+            gazetteer.add(name, 'character')
+        for kind, aliases in self.ENTITY_ALIASES.items():
+            for alias, name in aliases.items():
+                gazetteer.add(alias, kind, name)
+        seed_game_entities(gazetteer)
         
-        # Load from knowledge base JSON files
+        # Qualifier words and gear pieces, with simple plurals
+        for word in self.GEAR_WORDS:
+            gazetteer.add(word, 'gear_word')
+            gazetteer.add(word + 's', 'gear_word', word)
+        for word in self.RUNE_WORDS:
+            gazetteer.add(word, 'rune_word')
+        gazetteer.add('runes', 'rune_word', 'rune')
+        for piece_type, words in self.PIECE_WORDS.items():
+            for word in words:
+                gazetteer.add(word, 'piece', piece_type)
+                if not word.endswith('s'):
+                    gazetteer.add(word + 's', 'piece', piece_type)
+        
+        return gazetteer.compile()
+
+    def load_all_raw_data(self, read_entries: Callable[[Path], Iterable[Dict]] = None) -> Iterator[Dict]:
+        """Stream all raw scraped entries from the knowledge base JSON files;
+        read_entries(json_file) replaces the default reader of a file's "data"
+        list (archero_pipeline.scan shares one parse with the extractors)"""
+        file_count = 0
+        
+        # Entries are yielded as they are parsed, so whole dumps never sit in memory
         for json_file in self.raw_data_dir.glob("*.json"):
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, dict) and 'data' in data:
-                        for entry in data['data']:
-                            entry['source_file'] = json_file.name
-                            all_data.append(entry)
-                    elif isinstance(data, list):
-                        for entry in data:
-                            entry['source_file'] = json_file.name
-                            all_data.append(entry)
-            except Exception as e:
-                logger.error(f"Error loading {json_file}: {e}")
-        
-        logger.info(f"Loaded {len(all_data)} raw entries from {len(list(self.raw_data_dir.glob('*.json')))} files")
-        return all_data
+            file_count += 1
+            for entry in self._iter_file_entries(json_file, read_entries):
+                self.quality_metrics['total_entries'] += 1
+                yield entry
+        
+        logger.info(f"Loaded {self.quality_metrics['total_entries']} raw entries from {file_count} files")
+
+    def _iter_file_entries(self, json_file: Path,
+                           read_entries: Callable[[Path], Iterable[Dict]] = None) -> Iterator[Dict]:
+        """Stream the entries of one knowledge base file, tagged with its name"""
+        try:
+            entries = read_entries(json_file) if read_entries else iter_json_entries(json_file, keys=('data',))
+            for entry in entries:
+                entry['source_file'] = json_file.name
+                yield entry
+        except Exception as e:
+            logger.error(f"Error loading {json_file}: {e}")
+
+    def segment_entries(self, entries: Iterable[Dict]) -> Iterator[Dict]:
+        """Split chat-dump entries into one entry per message, keeping the
+        source metadata and adding speaker, role, timestamp and message_index"""
+        for entry in entries:
+            content = entry.get('content', '')
+            if not isinstance(content, str):
+                yield entry
+                continue
+            
+            for index, message in enumerate(segment_messages(content)):
+                self.quality_metrics['segmented_messages'] += 1
+                unit = dict(entry)
+                unit.update({
+                    'content': message.text,
+                    'speaker': message.speaker,
+                    'role': message.role,
+                    'timestamp': message.timestamp,
+                    'message_index': index
+                })
+                yield unit
+
+    def iter_units(self, entries: Iterable[Dict]) -> Iterable[Dict]:
+        """The units deduplication and extraction work on: messages when
+        segmenting, whole entries otherwise"""
+        return self.segment_entries(entries) if self.segment else entries
 
     def clean_text_content(self, text: str) -> str:
         """Clean and normalize text content"""
@@ -100,19 +333,20 @@ class ArcheroDataCleaner:
         if len(content) > 200:
             score += 0.2
         
-        # Source quality indicators
-        source = entry.get('source', '')
-        if 'wiki' in source.lower():
+        # Source quality indicators (a missing or non-text source counts as none)
+        source = entry.get('source')
+        source = source.lower() if isinstance(source, str) else ''
+        if 'wiki' in source:
             score += 0.3
-        elif 'discord' in source.lower():
+        elif 'discord' in source:
             score += 0.1
         
         # Content quality indicators
-        if any(keyword in content.lower() for keyword in ['damage', 'crit', 'attack', 'defense']):
+        if any(keyword in content.lower() for keyword in self.QUALITY_KEYWORDS):
             score += 0.2
-        if any(keyword in content.lower() for keyword in ['build', 'strategy', 'guide']):
+        if any(keyword in content.lower() for keyword in self.STRATEGY_KEYWORDS):
             score += 0.2
-        if re.search(r'\d+%', content):  # Contains percentages
+        if self.PERCENTAGE_PATTERN.search(content):  # Contains percentages
             score += 0.1
         
         # Confidence from original data
@@ -121,328 +355,960 @@ class ArcheroDataCleaner:
         
         return min(score, 1.0)
 
-    def deduplicate_entries(self, entries: List[Dict]) -> List[Dict]:
-        """Remove duplicate entries based on content similarity"""
+    @staticmethod
+    def confidence_frame(entries: List[Dict]) -> pd.DataFrame:
+        """Columns the confidence score depends on, one row per entry"""
+        return pd.DataFrame({
+            'content': pd.Series([entry.get('content', '') for entry in entries], dtype=object),
+            'source': pd.Series([entry.get('source', '') for entry in entries], dtype=object),
+            'has_confidence': np.array(['confidence' in entry for entry in entries], dtype=bool),
+            'confidence': np.array([float(entry['confidence']) if 'confidence' in entry else 0.0
+                                    for entry in entries], dtype=np.float64)
+        })
+
+    @staticmethod
+    def _contains_any(column: pd.Series, keywords: List[str]) -> np.ndarray:
+        mask = np.zeros(len(column), dtype=bool)
+        for keyword in keywords:
+            mask |= column.str.contains(keyword, regex=False).to_numpy(dtype=bool)
+        return mask
+
+    def score_confidences(self, frame: pd.DataFrame) -> np.ndarray:
+        """extract_confidence_score for a whole confidence_frame() at once
+        
+        Each signal becomes a boolean mask and the increments are added in the
+        same order as the per-entry scorer, so the scores are bit-identical.
+        Contents are lowercased once instead of once per keyword group, and
+        sources once per distinct source; null and non-text sources lowercase
+        to NaN and score as no source.
+        """
+        content = frame['content']
+        lowered = content.str.lower()
+        length = content.str.len().to_numpy()
+        
+        source_codes, unique_sources = pd.factorize(frame['source'].str.lower().fillna(''))
+        unique_sources = pd.Series(unique_sources, dtype=object)
+        wiki = unique_sources.str.contains('wiki', regex=False).to_numpy(dtype=bool)[source_codes]
+        discord = unique_sources.str.contains('discord', regex=False).to_numpy(dtype=bool)[source_codes]
+        
+        score = np.zeros(len(frame), dtype=np.float64)
+        score += np.where(length > 50, 0.3, 0.0)
+        score += np.where(length > 200, 0.2, 0.0)
+        score += np.where(wiki, 0.3, np.where(discord, 0.1, 0.0))
+        score += np.where(self._contains_any(lowered, self.QUALITY_KEYWORDS), 0.2, 0.0)
+        score += np.where(self._contains_any(lowered, self.STRATEGY_KEYWORDS), 0.2, 0.0)
+        score += np.where(content.str.contains(self.PERCENTAGE_SEARCH).to_numpy(dtype=bool), 0.1, 0.0)
+        score += np.where(frame['has_confidence'].to_numpy(), frame['confidence'].to_numpy() * 0.2, 0.0)
+        
+        return np.minimum(score, 1.0)
+
+    def _clean_and_hash(self, entry: Dict) -> Tuple[str, str]:
+        """Cleaned content of an entry and its hash ('' and None when nothing is left)"""
+        content = self.clean_text_content(entry.get('content', ''))
+        if not content:
+            return content, None
+        
+        # Create hash of cleaned content
+        return content, hashlib.md5(content.encode()).hexdigest()
+
+    def _clean_hash_and_sign(self, entry: Dict) -> Tuple:
+        """Cleaned content, its hash and its MinHash signature (None unless
+        near-duplicate detection is enabled)"""
+        content, content_hash = self._clean_and_hash(entry)
+        if content_hash is None or self.minhasher is None:
+            return content, content_hash, None
+        return content, content_hash, self.minhasher.signature(content)
+
+    def _new_near_duplicate_index(self):
+        if self.near_duplicate_threshold is None:
+            return None
+        return minhash.NearDuplicateIndex(self.near_duplicate_threshold, self.minhasher.num_perm)
+
+    def _duplicate_kind(self, content_hash: str, signature, seen_hashes: set, near_duplicates) -> str:
+        """'exact' or 'near' when the entry repeats a kept one (None otherwise),
+        recording it as seen either way"""
+        if content_hash in seen_hashes:
+            return 'exact'
+        seen_hashes.add(content_hash)
+        if near_duplicates is not None and near_duplicates.check_and_add(signature):
+            return 'near'
+        return None
+
+    def _count_duplicate(self, kind: str):
+        if kind == 'near':
+            self.quality_metrics['near_duplicates_removed'] += 1
+        else:
+            self.quality_metrics['duplicates_removed'] += 1
+
+    def _iter_unique_entries(self, entries: Iterable[Dict]) -> Iterator[Tuple[Dict, str]]:
+        """Yield (entry, cleaned content) for each entry whose cleaned text is new
+        (and, in near-duplicate mode, not a near copy of an earlier entry)"""
         seen_hashes = set()
-        unique_entries = []
+        near_duplicates = self._new_near_duplicate_index()
         
         for entry in entries:
-            content = self.clean_text_content(entry.get('content', ''))
-            if not content:
+            content, content_hash, signature = self._clean_hash_and_sign(entry)
+            if content_hash is None:
                 continue
-                
-            # Create hash of cleaned content
-            content_hash = hashlib.md5(content.encode()).hexdigest()
             
-            if content_hash not in seen_hashes:
-                seen_hashes.add(content_hash)
-                unique_entries.append(entry)
+            kind = self._duplicate_kind(content_hash, signature, seen_hashes, near_duplicates)
+            if kind is None:
+                yield entry, content
             else:
-                self.quality_metrics['duplicates_removed'] += 1
+                self._count_duplicate(kind)
+
+    def deduplicate_entries(self, entries: List[Dict]) -> List[Dict]:
+        """Remove duplicate entries based on content similarity"""
+        unique_entries = [entry for entry, _ in self._iter_unique_entries(entries)]
         
-        logger.info(f"Removed {self.quality_metrics['duplicates_removed']} duplicate entries")
+        self._log_duplicates()
         return unique_entries
 
-    def extract_gear_information(self, entries: List[Dict]) -> Dict:
-        """Extract and clean gear set information"""
-        gear_patterns = {
-            'oracle': r'(?i)\b(oracle)\s+(?:set|gear|armor|weapon|amulet|ring|chest|boots|helmet)',
-            'dragoon': r'(?i)\b(dragoon)\s+(?:set|gear|armor|weapon|amulet|ring|chest|boots|helmet)',
-            'griffin': r'(?i)\b(griffin)\s+(?:set|gear|armor|weapon|amulet|ring|chest|boots|helmet)',
-            'chromatic': r'(?i)\b(chromatic)\s+(?:set|gear|armor|weapon|amulet|ring|chest|boots|helmet)',
-            'mythic': r'(?i)\b(mythic)\s+(?:set|gear|armor|weapon|amulet|ring|chest|boots|helmet)'
-        }
-        
-        gear_data = defaultdict(lambda: {
-            'pieces': defaultdict(list),
-            'mentions': 0,
-            'contexts': [],
-            'confidence_scores': []
-        })
+    def prepare_entries(self, entries: Iterable[Dict]) -> Iterator[PreparedEntry]:
+        """Deduplicate entries, cleaning and scoring each survivor exactly once"""
+        unique = self.instrumentation.iterate('dedup', self._iter_unique_entries(entries))
+        for batch in chunked(unique, self.SCORE_BATCH_SIZE):
+            self.quality_metrics['cleaned_entries'] += len(batch)
+            with self.instrumentation.stage('score_and_scan', entries=len(batch)):
+                records = self._prepare_batch(batch)
+            yield from records
         
+        self._log_duplicates()
+
+    def _log_duplicates(self):
+        logger.info(f"Removed {self.quality_metrics['duplicates_removed']} duplicate entries")
+        if self.near_duplicate_threshold is not None:
+            logger.info(f"Removed {self.quality_metrics['near_duplicates_removed']} near-duplicate entries "
+                        f"(Jaccard >= {self.near_duplicate_threshold})")
+
+    def iter_prepared_entries(self, entries: Iterable[Dict]) -> Iterator[PreparedEntry]:
+        """Clean and score entries one by one, skipping those without usable text"""
         for entry in entries:
             content = self.clean_text_content(entry.get('content', ''))
             if not content:
                 continue
             
-            confidence = self.extract_confidence_score(entry)
+            yield self._prepare(entry, content)
+
+    def _prepare(self, entry: Dict, content: str) -> PreparedEntry:
+        """Score and scan one cleaned entry"""
+        return PreparedEntry(
+            content,
+            self.extract_confidence_score(entry),
+            entry.get('source_file', 'unknown'),
+            tuple(self.gazetteer.scan(content))
+        )
+
+    def _prepare_batch(self, pairs: List[Tuple[Dict, str]]) -> List[PreparedEntry]:
+        """Score a batch of (entry, cleaned content) pairs together, then scan each"""
+        scores = self.score_confidences(self.confidence_frame([entry for entry, _ in pairs])).tolist()
+        return [
+            PreparedEntry(content, score, entry.get('source_file', 'unknown'), tuple(self.gazetteer.scan(content)))
+            for (entry, content), score in zip(pairs, scores)
+        ]
+
+    def _qualified_names(self, record: PreparedEntry, kind: str, qualifier: str) -> set:
+        """Names of `kind` mentions directly followed by a `qualifier` word
+        (or whose own phrase already ends with one, as in "mixed set")"""
+        qualifier_starts = set()
+        qualifier_spans = {}
+        for mention in record.mentions:
+            if mention.kind == qualifier:
+                qualifier_starts.add(mention.start)
+                qualifier_spans[mention.end] = mention.start
+        
+        names = set()
+        for mention in record.mentions:
+            if mention.kind != kind or mention.name in names:
+                continue
+            if qualifier_spans.get(mention.end, mention.start) > mention.start:
+                names.add(mention.name)
+                continue
+            gap = self.FOLLOWING_SPACE.match(record.content, mention.end)
+            if gap and gap.end() in qualifier_starts:
+                names.add(mention.name)
+        return names
+
+    @staticmethod
+    def _add_mention(data: Dict, record: PreparedEntry):
+        """Count a mention, fold its confidence into the running stats and offer
+        its context to the bounded best-contexts heap"""
+        context = record.content[:200]
+        data['mentions'] += 1
+        data['confidence_stats'].add(record.confidence)
+        data['contexts'].add((record.confidence, len(context), context), context)
+
+    @staticmethod
+    def _count_values(counts: Dict, values: Iterable[str]):
+        for value in values:
+            counts[value] = counts.get(value, 0) + 1
+
+    def _finalize_mentions(self, data: Dict):
+        """Replace the bounded aggregates of an entity with their JSON form and
+        fold its confidences into the quality metrics sketch"""
+        stats = data['confidence_stats']
+        self.confidence_sketch.merge(stats)
+        data['contexts'] = data['contexts'].items()
+        data['confidence_stats'] = stats.summary()
+        data['avg_confidence'] = stats.mean
+
+    @staticmethod
+    def _new_gear_data() -> Dict:
+        return defaultdict(lambda: {
+            'pieces': defaultdict(lambda: TopK(ArcheroDataCleaner.PIECE_LIMIT)),
+            'mentions': 0,
+            'contexts': TopK(ArcheroDataCleaner.CONTEXT_LIMIT),
+            'confidence_stats': ScoreSketch()
+        })
+
+    def _collect_gear(self, gear_data: Dict, record: PreparedEntry):
+        """Accumulate gear set mentions from one prepared entry"""
+        content = record.content
+        confidence = record.confidence
+        set_names = self._qualified_names(record, 'gear_set', 'gear_word')
+        if not set_names:
+            return
+        
+        pieces = {mention.name for mention in record.mentions if mention.kind == 'piece'}
+        for set_name in self.gazetteer.names('gear_set'):
+            if set_name not in set_names:
+                continue
+            self._add_mention(gear_data[set_name], record)
             
-            for set_name, pattern in gear_patterns.items():
-                if re.search(pattern, content):
-                    gear_data[set_name]['mentions'] += 1
-                    gear_data[set_name]['contexts'].append(content[:200])
-                    gear_data[set_name]['confidence_scores'].append(confidence)
-                    
-                    # Extract specific pieces
-                    piece_patterns = {
-                        'weapon': r'(?:crossbow|spear|staff|bow)',
-                        'amulet': r'(?:amulet|necklace)',
-                        'ring': r'(?:ring|band)',
-                        'chest': r'(?:chest|armor|plate)',
-                        'boots': r'(?:boots|shoes)',
-                        'helmet': r'(?:helmet|helm|hat)'
-                    }
-                    
-                    for piece_type, piece_pattern in piece_patterns.items():
-                        if re.search(piece_pattern, content):
-                            gear_data[set_name]['pieces'][piece_type].append({
-                                'content': content[:100],
-                                'confidence': confidence,
-                                'source': entry.get('source_file', 'unknown')
-                            })
-        
-        # Calculate average confidence and clean up
+            # Record which specific pieces the entry talks about
+            for piece_type in self.PIECE_WORDS:
+                if piece_type in pieces:
+                    snippet = content[:100]
+                    gear_data[set_name]['pieces'][piece_type].add(
+                        (confidence, len(snippet), snippet, record.source_file),
+                        {'content': snippet, 'confidence': confidence, 'source': record.source_file}
+                    )
+
+    def _finalize_gear(self, gear_data: Dict) -> Dict:
+        """Summarize confidences and drop low-confidence pieces"""
         for set_name, data in gear_data.items():
-            if data['confidence_scores']:
-                data['avg_confidence'] = np.mean(data['confidence_scores'])
-            else:
-                data['avg_confidence'] = 0.0
+            self._finalize_mentions(data)
             
             # Keep only high-confidence pieces
             for piece_type, pieces in data['pieces'].items():
                 data['pieces'][piece_type] = [
-                    p for p in pieces if p['confidence'] > 0.3
+                    p for p in pieces.items() if p['confidence'] > 0.3
                 ]
         
         return dict(gear_data)
 
-    def extract_rune_information(self, entries: List[Dict]) -> Dict:
-        """Extract and clean rune information"""
-        rune_patterns = {
-            'meteor': r'(?i)\b(meteor)\s+(?:rune|etched)',
-            'sprite': r'(?i)\b(sprite)\s+(?:rune|etched)',
-            'elemental': r'(?i)\b(elemental)\s+(?:rune|etched)',
-            'etched': r'(?i)\b(etched)\s+(?:rune)',
-            'circle': r'(?i)\b(circle)\s+(?:rune|etched)',
-            'potion': r'(?i)\b(potion)\s+(?:rune|etched)',
-            'sword': r'(?i)\b(sword)\s+(?:rune|etched)',
-            'shield': r'(?i)\b(shield)\s+(?:rune|etched)',
-            'freeze': r'(?i)\b(freeze)\s+(?:rune|etched)',
-            'ice': r'(?i)\b(ice)\s+(?:rune|etched)',
-            'fire': r'(?i)\b(fire)\s+(?:rune|etched)',
-            'lightning': r'(?i)\b(lightning)\s+(?:rune|etched)'
-        }
+    def extract_gear_information(self, entries: List[Dict]) -> Dict:
+        """Extract and clean gear set information"""
+        gear_data = self._new_gear_data()
         
-        rune_data = defaultdict(lambda: {
+        for record in self.iter_prepared_entries(entries):
+            self._collect_gear(gear_data, record)
+        
+        return self._finalize_gear(gear_data)
+
+    @staticmethod
+    def _new_rune_data() -> Dict:
+        return defaultdict(lambda: {
             'mentions': 0,
-            'effects': [],
-            'contexts': [],
-            'confidence_scores': [],
-            'costs': []
+            'effects': {},
+            'contexts': TopK(ArcheroDataCleaner.CONTEXT_LIMIT),
+            'confidence_stats': ScoreSketch(),
+            'costs': {}
         })
+
+    def _collect_runes(self, rune_data: Dict, record: PreparedEntry):
+        """Accumulate rune mentions, effects and costs from one prepared entry"""
+        content = record.content
+        rune_names = self._qualified_names(record, 'rune', 'rune_word')
+        if not rune_names:
+            return
         
-        for entry in entries:
-            content = self.clean_text_content(entry.get('content', ''))
-            if not content:
+        # Effects (percentages) and costs are properties of the whole entry
+        effects = self.EFFECT_PATTERN.findall(content)
+        costs = [cost for cost_pattern in self.RUNE_COST_PATTERNS for cost in cost_pattern.findall(content)]
+        self.instrumentation.count('rune_effects', len(effects))
+        self.instrumentation.count('rune_costs', len(costs))
+        
+        for rune_name in self.gazetteer.names('rune'):
+            if rune_name not in rune_names:
                 continue
-            
-            confidence = self.extract_confidence_score(entry)
-            
-            for rune_name, pattern in rune_patterns.items():
-                if re.search(pattern, content):
-                    rune_data[rune_name]['mentions'] += 1
-                    rune_data[rune_name]['contexts'].append(content[:200])
-                    rune_data[rune_name]['confidence_scores'].append(confidence)
-                    
-                    # Extract effects (percentages)
-                    effects = re.findall(r'(\d+(?:\.\d+)?)\s*%', content)
-                    rune_data[rune_name]['effects'].extend(effects)
-                    
-                    # Extract costs
-                    cost_patterns = [
-                        r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gems?|gem)',
-                        r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gold|g)',
-                        r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lures?|lure)'
-                    ]
-                    
-                    for cost_pattern in cost_patterns:
-                        costs = re.findall(cost_pattern, content)
-                        rune_data[rune_name]['costs'].extend(costs)
-        
-        # Clean up and calculate averages
+            self._add_mention(rune_data[rune_name], record)
+            self._count_values(rune_data[rune_name]['effects'], effects)
+            self._count_values(rune_data[rune_name]['costs'], costs)
+
+    def _finalize_runes(self, rune_data: Dict) -> Dict:
+        """Summarize confidences and list distinct effects and costs"""
         for rune_name, data in rune_data.items():
-            if data['confidence_scores']:
-                data['avg_confidence'] = np.mean(data['confidence_scores'])
-            else:
-                data['avg_confidence'] = 0.0
+            self._finalize_mentions(data)
             
-            # Remove duplicates from effects and costs
-            data['effects'] = list(set(data['effects']))
-            data['costs'] = list(set(data['costs']))
+            # Distinct effects and costs in first-seen order
+            data['effects'] = list(data['effects'])
+            data['costs'] = list(data['costs'])
         
         return dict(rune_data)
 
-    def extract_character_information(self, entries: List[Dict]) -> Dict:
-        """Extract and clean character information"""
-        character_names = ['thor', 'otta', 'helix', 'drac', 'rolla', 'loki', 'atreyus', 'nyanja', 'dracoola']
+    def extract_rune_information(self, entries: List[Dict]) -> Dict:
+        """Extract and clean rune information"""
+        rune_data = self._new_rune_data()
+        
+        for record in self.iter_prepared_entries(entries):
+            self._collect_runes(rune_data, record)
         
-        character_data = defaultdict(lambda: {
+        return self._finalize_runes(rune_data)
+
+    @staticmethod
+    def _new_character_data() -> Dict:
+        return defaultdict(lambda: {
             'mentions': 0,
-            'contexts': [],
-            'confidence_scores': [],
-            'usage_types': [],
+            'contexts': TopK(ArcheroDataCleaner.CONTEXT_LIMIT),
+            'confidence_stats': ScoreSketch(),
+            'usage_types': {},
             'builds': []
         })
+
+    def _collect_characters(self, character_data: Dict, record: PreparedEntry):
+        """Accumulate character mentions, usage types and builds from one prepared entry"""
+        content = record.content
+        char_names = {mention.name for mention in record.mentions if mention.kind == 'character'}
+        if not char_names:
+            return
         
-        for entry in entries:
-            content = self.clean_text_content(entry.get('content', ''))
-            if not content:
+        usage_matches = self.USAGE_PATTERN.findall(content)
+        is_build = self.BUILD_PATTERN.search(content) is not None
+        self.instrumentation.count('usage_types', len(usage_matches))
+        self.instrumentation.count('builds', is_build)
+        
+        for char_name in self.gazetteer.names('character'):
+            if char_name not in char_names:
                 continue
+            self._add_mention(character_data[char_name], record)
+            self._count_values(character_data[char_name]['usage_types'], usage_matches)
             
-            confidence = self.extract_confidence_score(entry)
-            
-            for char_name in character_names:
-                if re.search(rf'\b{char_name}\b', content, re.IGNORECASE):
-                    character_data[char_name]['mentions'] += 1
-                    character_data[char_name]['contexts'].append(content[:200])
-                    character_data[char_name]['confidence_scores'].append(confidence)
-                    
-                    # Extract usage types
-                    if re.search(r'\b(pvp|pve|arena|gvg)\b', content, re.IGNORECASE):
-                        usage_matches = re.findall(r'\b(pvp|pve|arena|gvg)\b', content, re.IGNORECASE)
-                        character_data[char_name]['usage_types'].extend(usage_matches)
-                    
-                    # Extract build information
-                    if re.search(r'\b(build|strategy|guide)\b', content, re.IGNORECASE):
-                        character_data[char_name]['builds'].append(content[:150])
-        
-        # Clean up and calculate averages
+            # Extract build information
+            if is_build and len(character_data[char_name]['builds']) < self.BUILD_LIMIT:
+                character_data[char_name]['builds'].append(content[:150])
+
+    def _finalize_characters(self, character_data: Dict) -> Dict:
+        """Summarize confidences, list distinct usage types and trim builds"""
         for char_name, data in character_data.items():
-            if data['confidence_scores']:
-                data['avg_confidence'] = np.mean(data['confidence_scores'])
-            else:
-                data['avg_confidence'] = 0.0
+            self._finalize_mentions(data)
             
-            # Remove duplicates
-            data['usage_types'] = list(set(data['usage_types']))
-            data['builds'] = data['builds'][:5]  # Keep top 5 builds
+            data['usage_types'] = list(data['usage_types'])
+            # Merged shards may each contribute up to BUILD_LIMIT builds
+            data['builds'] = data['builds'][:self.BUILD_LIMIT]
         
         return dict(character_data)
 
-    def extract_material_information(self, entries: List[Dict]) -> Dict:
-        """Extract and clean upgrade material information"""
-        material_patterns = {
-            'shards': r'(\d+)\s*(?:shards?|fragments?)',
-            'gems': r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gems?|gem)',
-            'gold': r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gold|g)',
-            'lures': r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lures?|lure)',
-            'keys': r'(\d+)\s*(?:keys?|tokens?)',
-            'cores': r'(\d+)\s*(?:cores?|essence)',
-            'stones': r'(\d+)\s*(?:stones?|crystals?)'
-        }
+    def extract_character_information(self, entries: List[Dict]) -> Dict:
+        """Extract and clean character information"""
+        character_data = self._new_character_data()
+        
+        for record in self.iter_prepared_entries(entries):
+            self._collect_characters(character_data, record)
         
-        material_data = defaultdict(lambda: {
+        return self._finalize_characters(character_data)
+
+    @staticmethod
+    def _new_material_data() -> Dict:
+        return defaultdict(lambda: {
             'total_quantity': 0,
             'mentions': 0,
-            'contexts': [],
-            'confidence_scores': [],
-            'sources': []
+            'contexts': TopK(ArcheroDataCleaner.CONTEXT_LIMIT),
+            'confidence_stats': ScoreSketch(),
+            'sources': {}
         })
+
+    def _collect_materials(self, material_data: Dict, record: PreparedEntry):
+        """Accumulate material mentions and quantities from one prepared entry"""
+        content = record.content
         
-        for entry in entries:
-            content = self.clean_text_content(entry.get('content', ''))
-            if not content:
+        for material_type, pattern in self.MATERIAL_PATTERNS.items():
+            matches = pattern.findall(content)
+            self.instrumentation.count(f"materials:{material_type}", len(matches))
+            if matches:
+                self._add_mention(material_data[material_type], record)
+                self._count_values(material_data[material_type]['sources'], [record.source_file])
+                
+                # Sum up quantities
+                for match in matches:
+                    try:
+                        quantity = int(match.replace(',', ''))
+                        material_data[material_type]['total_quantity'] += quantity
+                    except ValueError:
+                        continue
+
+    def _finalize_materials(self, material_data: Dict) -> Dict:
+        """Summarize confidences per material"""
+        for material_type, data in material_data.items():
+            self._finalize_mentions(data)
+        
+        return dict(material_data)
+
+    def extract_material_information(self, entries: List[Dict]) -> Dict:
+        """Extract and clean upgrade material information"""
+        material_data = self._new_material_data()
+        
+        for record in self.iter_prepared_entries(entries):
+            self._collect_materials(material_data, record)
+        
+        return self._finalize_materials(material_data)
+
+    @staticmethod
+    def _new_index_data() -> Dict:
+        return {'documents': []}
+
+    def _collect_index(self, index_data: Dict, record: PreparedEntry):
+        """Add one prepared entry to the search index as a document"""
+        index_data['documents'].append({
+            'terms': term_counts(record.content),
+            'source_file': record.source_file,
+            'confidence': record.confidence,
+            'preview': record.content[:200]
+        })
+
+    def _finalize_index(self, index_data: Dict) -> BM25Index:
+        return BM25Index.build(index_data['documents'])
+
+    def extract_search_index(self, entries: List[Dict]) -> BM25Index:
+        """Build the BM25 index over the cleaned entries"""
+        index_data = self._new_index_data()
+        
+        for record in self.iter_prepared_entries(entries):
+            self._collect_index(index_data, record)
+        
+        return self._finalize_index(index_data)
+
+    @staticmethod
+    def _new_corpus_data() -> Dict:
+        return {'entries': []}
+
+    def _collect_corpus(self, corpus_data: Dict, record: PreparedEntry):
+        """Keep one prepared entry with the first span of every entity the
+        categories count for it"""
+        counted = {
+            'gear_set': ('gear_sets', self._qualified_names(record, 'gear_set', 'gear_word')),
+            'rune': ('runes', self._qualified_names(record, 'rune', 'rune_word')),
+            'character': ('characters', None)
+        }
+        mentions, seen = [], set()
+        for mention in record.mentions:
+            if mention.kind not in counted or (mention.kind, mention.name) in seen:
                 continue
+            category, names = counted[mention.kind]
+            if names is None or mention.name in names:
+                seen.add((mention.kind, mention.name))
+                mentions.append([category, mention.name, mention.start, mention.end])
+        
+        for material_type, pattern in self.MATERIAL_PATTERNS.items():
+            match = pattern.search(record.content)
+            if match:
+                mentions.append(['materials', material_type, match.start(), match.end()])
+        
+        corpus_data['entries'].append([record.source_file, record.confidence, record.content, mentions])
+
+    def _finalize_corpus(self, corpus_data: Dict) -> List:
+        return corpus_data['entries']
+
+    def extract_corpus(self, entries: List[Dict]) -> List:
+        """Collect the cleaned entries and their mentions for the SQLite export"""
+        corpus_data = self._new_corpus_data()
+        
+        for record in self.iter_prepared_entries(entries):
+            self._collect_corpus(corpus_data, record)
+        
+        return self._finalize_corpus(corpus_data)
+
+    def category_extractors(self) -> Dict[str, Tuple]:
+        """Map each category (and the search index, and with --sqlite the corpus)
+        to its (new state, collect, finalize) hooks"""
+        extractors = {
+            'gear_sets': (self._new_gear_data, self._collect_gear, self._finalize_gear),
+            'runes': (self._new_rune_data, self._collect_runes, self._finalize_runes),
+            'characters': (self._new_character_data, self._collect_characters, self._finalize_characters),
+            'materials': (self._new_material_data, self._collect_materials, self._finalize_materials),
+            'search_index': (self._new_index_data, self._collect_index, self._finalize_index)
+        }
+        if self.sqlite:
+            extractors['corpus'] = (self._new_corpus_data, self._collect_corpus, self._finalize_corpus)
+        return extractors
+
+    def _store_results(self, results: Dict):
+        """Keep the search index and the corpus apart from the JSON categories"""
+        self.search_index = results.pop('search_index', None)
+        self.corpus = results.pop('corpus', None)
+        self.clean_data.update(results)
+
+    def _collect_all(self, records: Iterable[PreparedEntry], categories: Iterable[str] = None) -> Dict:
+        """Feed prepared entries through every category collector (or those of
+        `categories`) in a single loop"""
+        extractors = self.category_extractors()
+        if categories is not None:
+            extractors = {category: extractors[category] for category in categories}
+        states = {category: new_state() for category, (new_state, _, _) in extractors.items()}
+        collectors = [(f"extract:{category}", states[category], collect)
+                      for category, (_, collect, _) in extractors.items()]
+        instrumentation = self.instrumentation
+        
+        for record in records:
+            for kind, matches in Counter(mention.kind for mention in record.mentions).items():
+                instrumentation.count(f"gazetteer:{kind}", matches)
+            size = len(record.content.encode('utf-8'))
+            label = entry_label(record.source_file, record.content)
+            for stage, state, collect in collectors:
+                with instrumentation.stage(stage, 1, size, label):
+                    collect(state, record)
+        
+        return states
+
+    def _finalize_all(self, states: Dict) -> Dict:
+        results = {}
+        for category, (_, _, finalize) in self.category_extractors().items():
+            with self.instrumentation.stage(f"extract:{category}"):
+                results[category] = finalize(states[category])
+        return results
+
+    def extract_all_information(self, records: Iterable[PreparedEntry]) -> Dict:
+        """Run every category extractor over prepared entries in a single loop"""
+        return self._finalize_all(self._collect_all(records))
+
+    def collect_partial(self, pairs: List[Tuple[Dict, str]]) -> Dict:
+        """Unfinalized category aggregates for one shard of (entry, cleaned content) pairs"""
+        states = self._collect_all(self._prepare_batch(pairs) if pairs else [])
+        return to_plain(states)
+
+    def _iter_unique_shards(self, pool, entries: Iterable[Dict]) -> Iterator[List[Tuple[Dict, str]]]:
+        """Clean and hash shards in the pool, deduplicating in input order in this process"""
+        seen_hashes = set()
+        near_duplicates = self._new_near_duplicate_index()
+        window = 2 * self.workers
+        
+        for _, cleaned in imap_ordered(pool, _clean_chunk, chunked(entries, self.SHARD_SIZE), window):
+            # Workers segment the shard; their metric counters are not shared
+            if self.segment:
+                self.quality_metrics['segmented_messages'] += len(cleaned)
             
-            confidence = self.extract_confidence_score(entry)
+            unique = []
+            for entry, content, content_hash, signature in cleaned:
+                if content_hash is None:
+                    continue
+                kind = self._duplicate_kind(content_hash, signature, seen_hashes, near_duplicates)
+                if kind is None:
+                    unique.append((entry, content))
+                else:
+                    self._count_duplicate(kind)
             
-            for material_type, pattern in material_patterns.items():
-                matches = re.findall(pattern, content)
-                if matches:
-                    material_data[material_type]['mentions'] += 1
-                    material_data[material_type]['contexts'].append(content[:200])
-                    material_data[material_type]['confidence_scores'].append(confidence)
-                    material_data[material_type]['sources'].append(entry.get('source_file', 'unknown'))
-                    
-                    # Sum up quantities
-                    for match in matches:
-                        try:
-                            quantity = int(match.replace(',', ''))
-                            material_data[material_type]['total_quantity'] += quantity
-                        except ValueError:
-                            continue
-        
-        # Calculate averages
-        for material_type, data in material_data.items():
-            if data['confidence_scores']:
-                data['avg_confidence'] = np.mean(data['confidence_scores'])
+            self.quality_metrics['cleaned_entries'] += len(unique)
+            if unique:
+                yield unique
+
+    def extract_all_information_parallel(self, entries: Iterable[Dict]) -> Dict:
+        """Shard cleaning and extraction across worker processes
+        
+        Shards are cleaned and deduplicated in order, every worker builds partial
+        aggregates for its shards, and the partials are merged in shard order, so
+        the result is identical to the serial pass for any number of workers.
+        """
+        extractors = self.category_extractors()
+        states = {category: new_state() for category, (new_state, _, _) in extractors.items()}
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self,)) as pool:
+            shards = self._iter_unique_shards(pool, entries)
+            for _, (partial, matches) in imap_ordered(pool, _collect_chunk, shards, 2 * self.workers):
+                for category, partial_state in partial.items():
+                    merge_into(states[category], partial_state)
+                for family, count in matches.items():
+                    self.instrumentation.count(family, count)
+        
+        self._log_duplicates()
+        return self._finalize_all(states)
+
+    def code_fingerprint(self) -> str:
+        """Hash of the code and vocabulary that cached contributions depend on"""
+        return code_fingerprint(Path(__file__), Path(inspect.getfile(Gazetteer)),
+                                Path(inspect.getfile(minhash.MinHasher)), Path(inspect.getfile(segment_messages)),
+                                Path(inspect.getfile(TopK)), GAME_DATA_SCRIPT, settings={'segment': self.segment, 'sqlite': self.sqlite})
+
+    def _scan_file(self, json_file: Path) -> Tuple[List[Tuple], int, int, int]:
+        """Clean, hash and sign the units of one source file, dropping its internal
+        exact duplicates; returns the unique (unit, content, hash, signature) rows
+        and the entry, unit and duplicate counts"""
+        file_hashes = set()
+        unique = []
+        entries = units = duplicates = 0
+        
+        def counted(file_entries):
+            nonlocal entries
+            for entry in file_entries:
+                entries += 1
+                yield entry
+        
+        for entry in self.iter_units(counted(self._iter_file_entries(json_file))):
+            units += 1
+            content, content_hash, signature = self._clean_hash_and_sign(entry)
+            if content_hash is None:
+                continue
+            if content_hash in file_hashes:
+                duplicates += 1
+                continue
+            file_hashes.add(content_hash)
+            unique.append((entry, content, content_hash, signature))
+        
+        return unique, entries, units, duplicates
+
+    def extract_all_information_incremental(self) -> Dict:
+        """Rebuild the aggregates from cached per-file contributions, reprocessing
+        only new or changed source files
+        
+        Contributions are merged in file order, so the result equals a full run.
+        Deduplication across files is replayed from the hashes (and signatures)
+        stored per file; a cached contribution is only reused while it dropped
+        exactly the entries the replay drops. Removed files simply drop out.
+        """
+        manifest = SourceManifest(self.manifest_dir, self.code_fingerprint())
+        extractors = self.category_extractors()
+        states = {category: new_state() for category, (new_state, _, _) in extractors.items()}
+        seen_hashes = set()
+        near_duplicates = self._new_near_duplicate_index()
+        keys = []
+        reused = rebuilt = 0
+        
+        for json_file in self.raw_data_dir.glob("*.json"):
+            key = json_file.name
+            keys.append(key)
+            digest = file_digest(json_file)
+            metadata = manifest.lookup(key, digest)
+            if metadata is not None and near_duplicates is not None and 'signatures' not in metadata:
+                metadata = None
+            
+            unique = None
+            scanned = metadata is None
+            if metadata is None:
+                unique, entries, units, duplicates = self._scan_file(json_file)
+                hashes = [row[2] for row in unique]
+                signatures = [row[3] for row in unique]
             else:
-                data['avg_confidence'] = 0.0
+                entries, units, duplicates = metadata['entries'], metadata['units'], metadata['duplicates']
+                hashes = metadata['hashes']
+                signatures = [minhash.signature_from_text(text) for text in metadata.get('signatures', [None] * len(hashes))]
+            
+            # Replay deduplication against everything kept from earlier files
+            excluded, near_excluded = [], []
+            for content_hash, signature in zip(hashes, signatures):
+                kind = self._duplicate_kind(content_hash, signature, seen_hashes, near_duplicates)
+                if kind == 'exact':
+                    excluded.append(content_hash)
+                elif kind == 'near':
+                    near_excluded.append(content_hash)
+            
+            if unique is None and metadata['excluded'] == excluded and metadata.get('near_excluded', []) == near_excluded:
+                contribution = manifest.load_contribution(key)
+                reused += 1
+            else:
+                if unique is None:
+                    unique, entries, units, duplicates = self._scan_file(json_file)
+                    scanned = True
+                dropped = set(excluded).union(near_excluded)
+                contribution = self.collect_partial([
+                    (entry, content) for entry, content, content_hash, _ in unique if content_hash not in dropped
+                ])
+                metadata = {'entries': entries, 'units': units, 'duplicates': duplicates, 'hashes': hashes,
+                            'excluded': excluded, 'near_excluded': near_excluded}
+                if near_duplicates is not None:
+                    metadata['signatures'] = [minhash.signature_to_text(signature) for signature in signatures]
+                manifest.store(key, digest, contribution, **metadata)
+                rebuilt += 1
+            
+            for category, partial_state in contribution.items():
+                merge_into(states[category], partial_state)
+            
+            self.quality_metrics['total_entries'] += entries
+            if self.segment and not scanned:
+                # Freshly scanned files were counted while being segmented
+                self.quality_metrics['segmented_messages'] += units
+            self.quality_metrics['duplicates_removed'] += duplicates + len(excluded)
+            self.quality_metrics['near_duplicates_removed'] += len(near_excluded)
+            self.quality_metrics['cleaned_entries'] += len(hashes) - len(excluded) - len(near_excluded)
         
-        return dict(material_data)
+        removed = manifest.prune(keys)
+        manifest.save()
+        
+        logger.info(f"♻️ Reused {reused} unchanged files, reprocessed {rebuilt}, dropped {len(removed)} removed")
+        self._log_duplicates()
+        return self._finalize_all(states)
+
+    def _stage_dependencies(self, names: Iterable[str]) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in names}
+
+    def _prepare_stage_key(self) -> str:
+        """Key of the prepare stage: the source files in load order, the code
+        and vocabulary that clean, deduplicate, score and scan, and the settings"""
+        sources = [[json_file.name, file_digest(json_file)] for json_file in self.raw_data_dir.glob("*.json")]
+        modules = [Path(inspect.getfile(module)) for module in (iter_json_entries, Gazetteer, minhash.MinHasher, segment_messages)]
+        return stage_key('prepare', sources, self._stage_dependencies(self.PREPARE_DEPENDENCIES),
+                         modules + [GAME_DATA_SCRIPT],
+                         {'segment': self.segment, 'near_duplicates': self.near_duplicate_threshold})
+
+    def _category_stage_key(self, category: str, prepare_key: str) -> str:
+        modules = [Path(inspect.getfile(TopK))]
+        if category == 'search_index':
+            modules.append(Path(inspect.getfile(BM25Index)))
+        return stage_key(category, prepare_key, self._stage_dependencies(self.CATEGORY_DEPENDENCIES[category]), modules)
+
+    def _run_prepare_stage(self, cache: StageCache, key: str, entries: Iterable[Dict]) -> Iterator[PreparedEntry]:
+        """Prepare entries, writing each record to the cache as it streams by;
+        the stage is only marked complete once every entry went through"""
+        with NdjsonWriter(cache.path('prepare', key, '.ndjson')) as writer:
+            for record in self.prepare_entries(self.iter_units(entries)):
+                writer.write({'content': record.content, 'confidence': record.confidence,
+                              'source_file': record.source_file,
+                              'mentions': [list(mention) for mention in record.mentions]})
+                yield record
+        metrics = {name: value for name, value in self.quality_metrics.items() if name != 'confidence'}
+        cache.store('prepare', key, records=writer.count, metrics=metrics)
+
+    @staticmethod
+    def _iter_cached_records(path: Path) -> Iterator[PreparedEntry]:
+        for item in iter_ndjson(path):
+            yield PreparedEntry(item['content'], item['confidence'], item['source_file'],
+                                tuple(Mention(*mention) for mention in item['mentions']))
+
+    def _finalize_stage(self, category: str, state: Dict) -> Tuple[Any, ScoreSketch]:
+        """Finalize one category, returning the confidences it folded into the
+        quality metrics sketch apart so they can be cached with it"""
+        finalize = self.category_extractors()[category][2]
+        overall, self.confidence_sketch = self.confidence_sketch, ScoreSketch()
+        try:
+            with self.instrumentation.stage(f"extract:{category}"):
+                result = finalize(state)
+            return result, self.confidence_sketch
+        finally:
+            overall.merge(self.confidence_sketch)
+            self.confidence_sketch = overall
+
+    def extract_all_information_cached(self, entries: Iterable[Dict]) -> Dict:
+        """Run the fused pass as cached stages
+        
+        prepare (load, segment, deduplicate, score and scan) is keyed by the
+        source file hashes and its code; each category is keyed by the prepare
+        key and its own code. Only categories whose key changed are collected,
+        in one pass over the cached prepared entries, so editing the rune
+        patterns recomputes just the runes.
+        """
+        cache = StageCache(self.stage_cache_dir)
+        extractors = self.category_extractors()
+        prepare_key = self._prepare_stage_key()
+        self.stage_keys = {'prepare': prepare_key}
+        self.stage_keys.update({category: self._category_stage_key(category, prepare_key) for category in extractors})
+        
+        results, missing = {}, []
+        for category in extractors:
+            key = self.stage_keys[category]
+            metadata = cache.lookup(category, key)
+            if metadata is None:
+                missing.append(category)
+                continue
+            with self.instrumentation.stage('stage_cache'):
+                if category == 'search_index':
+                    results[category] = BM25Index.load(cache.path(category, key, '.bm25'))
+                else:
+                    results[category] = metadata['result']
+            self.confidence_sketch.merge(metadata['sketch'])
+        
+        prepared = cache.lookup('prepare', prepare_key)
+        if prepared is None:
+            records = self._run_prepare_stage(cache, prepare_key, entries)
+        else:
+            self.quality_metrics.update(prepared['metrics'])
+            records = self.instrumentation.iterate(
+                'stage_cache', self._iter_cached_records(cache.path('prepare', prepare_key, '.ndjson')))
+        
+        if missing or prepared is None:
+            states = self._collect_all(records, missing)
+            for category in missing:
+                key = self.stage_keys[category]
+                results[category], sketch = self._finalize_stage(category, states[category])
+                if category == 'search_index':
+                    results[category].save(cache.path(category, key, '.bm25'))
+                    cache.store(category, key, sketch=sketch)
+                else:
+                    cache.store(category, key, result=results[category], sketch=sketch)
+        
+        for stage, key in self.stage_keys.items():
+            cache.prune(stage, key)
+        
+        reused = [category for category in extractors if category not in missing]
+        logger.info(f"♻️ Stage cache: {'reused' if prepared else 'ran'} prepare, "
+                    f"reused {', '.join(reused) or 'no categories'}, recomputed {', '.join(missing) or 'nothing'}")
+        return {category: results[category] for category in extractors}
 
-    def create_clean_database(self) -> Dict:
+    def create_clean_database(self, read_entries: Callable[[Path], Iterable[Dict]] = None) -> Dict:
         """Create the final clean database"""
         logger.info("🧹 Starting comprehensive data cleaning...")
         
-        # Load all raw data
-        raw_entries = self.load_all_raw_data()
-        self.quality_metrics['total_entries'] = len(raw_entries)
+        # Raw entries are streamed from disk
+        raw_entries = self.instrumentation.iterate('load', self.load_all_raw_data(read_entries), size=content_bytes)
+        self.confidence_sketch = ScoreSketch()
+        
+        if self.incremental:
+            logger.info("⚡ Refreshing categories from the source manifest...")
+            with self.instrumentation.stage('incremental_refresh'):
+                self._store_results(self.extract_all_information_incremental())
+        elif self.stage_cache:
+            logger.info("⚡ Running the cached pipeline stages...")
+            self._store_results(self.extract_all_information_cached(raw_entries))
+        elif self.fused and self.workers > 1:
+            # Per-category stages run (and are timed) in the worker processes
+            logger.info(f"⚡ Extracting all categories across {self.workers} worker processes...")
+            with self.instrumentation.stage('parallel_extract'):
+                self._store_results(self.extract_all_information_parallel(raw_entries))
+        elif self.fused:
+            # Clean, score and deduplicate once, then extract every category in one pass
+            records = self.prepare_entries(self.iter_units(raw_entries))
+            
+            logger.info("⚡ Extracting gear, rune, character and material information...")
+            self._store_results(self.extract_all_information(records))
+        else:
+            # The legacy extractors each walk the entries, so materialize them once
+            self._extract_each_category(list(self.iter_units(raw_entries)))
+        
+        # Calculate final quality metrics from the merged confidence sketch
+        self.quality_metrics['confidence'] = self.confidence_sketch.summary()
+        
+        logger.info("✅ Data cleaning complete!")
+        return self.clean_data
+
+    def _extract_each_category(self, raw_entries: List[Dict]):
+        """Legacy path: every extractor cleans and scores the entries on its own"""
+        stage = self.instrumentation.stage
         
         # Clean and deduplicate
-        cleaned_entries = self.deduplicate_entries(raw_entries)
+        with stage('dedup', entries=len(raw_entries)):
+            cleaned_entries = self.deduplicate_entries(raw_entries)
         self.quality_metrics['cleaned_entries'] = len(cleaned_entries)
         
         # Extract structured information
         logger.info("⚔️ Extracting gear information...")
-        self.clean_data['gear_sets'] = self.extract_gear_information(cleaned_entries)
+        with stage('extract:gear_sets', entries=len(cleaned_entries)):
+            self.clean_data['gear_sets'] = self.extract_gear_information(cleaned_entries)
         
         logger.info("🔮 Extracting rune information...")
-        self.clean_data['runes'] = self.extract_rune_information(cleaned_entries)
+        with stage('extract:runes', entries=len(cleaned_entries)):
+            self.clean_data['runes'] = self.extract_rune_information(cleaned_entries)
         
         logger.info("👥 Extracting character information...")
-        self.clean_data['characters'] = self.extract_character_information(cleaned_entries)
+        with stage('extract:characters', entries=len(cleaned_entries)):
+            self.clean_data['characters'] = self.extract_character_information(cleaned_entries)
         
         logger.info("💎 Extracting material information...")
-        self.clean_data['materials'] = self.extract_material_information(cleaned_entries)
+        with stage('extract:materials', entries=len(cleaned_entries)):
+            self.clean_data['materials'] = self.extract_material_information(cleaned_entries)
         
-        # Calculate final quality metrics
-        all_confidence_scores = []
-        for category in self.clean_data.values():
-            if isinstance(category, dict):
-                for item in category.values():
-                    if isinstance(item, dict) and 'confidence_scores' in item:
-                        all_confidence_scores.extend(item['confidence_scores'])
+        logger.info("🔎 Building search index...")
+        with stage('extract:search_index', entries=len(cleaned_entries)):
+            self.search_index = self.extract_search_index(cleaned_entries)
         
-        self.quality_metrics['confidence_scores'] = all_confidence_scores
-        
-        logger.info("✅ Data cleaning complete!")
-        return self.clean_data
+        if self.sqlite:
+            logger.info("🗄️ Collecting entries for the SQLite export...")
+            with stage('extract:corpus', entries=len(cleaned_entries)):
+                self.corpus = self.extract_corpus(cleaned_entries)
 
-    def save_clean_database(self):
-        """Save the clean database to files"""
-        # Save main database
-        db_path = self.cleaned_data_dir / "clean-archero-database.json"
-        with open(db_path, 'w', encoding='utf-8') as f:
-            json.dump(self.clean_data, f, indent=2, ensure_ascii=False)
+    def save_clean_database(self) -> List[Path]:
+        """Save the clean database to files; returns the paths written"""
+        outputs = []
+        if self.ndjson:
+            # One entity record per line, streamed instead of the JSON files
+            ndjson_path = self.cleaned_data_dir / "clean-archero-database.ndjson"
+            with NdjsonWriter(ndjson_path) as writer:
+                for category, entities in self.clean_data.items():
+                    for name, data in entities.items():
+                        writer.write({'record': 'entity', 'category': category, 'name': name, 'data': data})
+            outputs.append(ndjson_path)
+            logger.info(f"📜 Streamed {writer.count} entity records")
+        else:
+            # Save main database
+            db_path = self.cleaned_data_dir / "clean-archero-database.json"
+            with open(db_path, 'w', encoding='utf-8') as f:
+                json.dump(self.clean_data, f, indent=2, ensure_ascii=False)
+            outputs.append(db_path)
+            
+            # Save individual category files for easier access
+            for category, data in self.clean_data.items():
+                category_path = self.cleaned_data_dir / f"{category}.json"
+                with open(category_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                outputs.append(category_path)
         
         # Save quality metrics
         metrics_path = self.cleaned_data_dir / "data-quality-metrics.json"
         with open(metrics_path, 'w', encoding='utf-8') as f:
             json.dump(self.quality_metrics, f, indent=2, ensure_ascii=False)
+        outputs.append(metrics_path)
         
-        # Save individual category files for easier access
-        for category, data in self.clean_data.items():
-            category_path = self.cleaned_data_dir / f"{category}.json"
-            with open(category_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        # Save every entity once more in a single file indexed by byte offset,
+        # for readers that need single entities (archero_pipeline.packed)
+        packed_path = self.cleaned_data_dir / "clean-archero-database.pack"
+        write_packed(packed_path, self.clean_data)
+        outputs.append(packed_path)
+        
+        # Save the BM25 index for retrieval
+        if self.search_index is not None:
+            index_path = self.cleaned_data_dir / "search-index.bm25"
+            self.search_index.save(index_path)
+            outputs.append(index_path)
+        
+        # Save the normalized SQLite database with its full-text index
+        if self.corpus is not None:
+            sqlite_path = self.cleaned_data_dir / "clean-archero-database.sqlite"
+            write_corpus_db(sqlite_path, self.corpus, self.entity_rows())
+            outputs.append(sqlite_path)
+            logger.info(f"🗄️ SQLite database written with {len(self.corpus)} entries")
         
         logger.info(f"💾 Clean database saved to {self.cleaned_data_dir}")
+        return outputs
+
+    def save_clean_database_cached(self):
+        """Save stage of the cached pipeline: skipped while its key (the keys of
+        every extraction stage, the save code and the output settings) is
+        unchanged and the files it wrote are still there as written"""
+        cache = StageCache(self.stage_cache_dir)
+        modules = [Path(inspect.getfile(module)) for module in (write_packed, write_corpus_db, NdjsonWriter, BM25Index)]
+        key = stage_key('save', self.stage_keys, self._stage_dependencies(self.SAVE_DEPENDENCIES), modules,
+                        {'ndjson': self.ndjson, 'sqlite': self.sqlite})
+        
+        metadata = cache.lookup('save', key)
+        if metadata is not None and all(
+                (self.cleaned_data_dir / name).exists() and file_digest(self.cleaned_data_dir / name) == digest
+                for name, digest in metadata['outputs'].items()):
+            logger.info(f"♻️ Stage cache: outputs in {self.cleaned_data_dir} are up to date, skipping save")
+            return
+        
+        outputs = self.save_clean_database()
+        cache.store('save', key, outputs={path.name: file_digest(path) for path in outputs})
+        cache.prune('save', key)
+
+    def entity_rows(self) -> Iterator[Tuple]:
+        """(category, name, mentions, average confidence) of every extracted entity"""
+        for category in ('gear_sets', 'runes', 'characters', 'materials'):
+            for name, data in self.clean_data[category].items():
+                yield category, name, data['mentions'], data['avg_confidence']
 
     def generate_quality_report(self):
         """Generate a comprehensive quality report"""
         total_entries = self.quality_metrics['total_entries']
         cleaned_entries = self.quality_metrics['cleaned_entries']
         duplicates_removed = self.quality_metrics['duplicates_removed']
+        # Segmenting cleans messages, so they are kept out of the messages the
+        # entries split into rather than out of the raw entries
+        total_units = self.quality_metrics['segmented_messages'] if self.segment else total_entries
         
-        avg_confidence = np.mean(self.quality_metrics['confidence_scores']) if self.quality_metrics['confidence_scores'] else 0
+        avg_confidence = self.quality_metrics['confidence']['mean']
         
         report = {
             'summary': {
                 'total_raw_entries': total_entries,
                 'cleaned_entries': cleaned_entries,
                 'duplicates_removed': duplicates_removed,
-                'cleaning_efficiency': f"{(cleaned_entries/total_entries)*100:.1f}%" if total_entries > 0 else "0%",
+                'cleaning_efficiency': f"{(cleaned_entries/total_units)*100:.1f}%" if total_units > 0 else "0%",
                 'average_confidence': f"{avg_confidence:.3f}"
             },
             'categories': {
@@ -451,7 +1317,8 @@ class ArcheroDataCleaner:
                 'characters': len(self.clean_data['characters']),
                 'materials': len(self.clean_data['materials'])
             },
-            'quality_metrics': self.quality_metrics
+            'quality_metrics': self.quality_metrics,
+            'instrumentation': self.instrumentation.report()
         }
         
         report_path = self.cleaned_data_dir / "quality-report.json"
@@ -461,15 +1328,19 @@ class ArcheroDataCleaner:
         logger.info(f"📊 Quality report saved to {report_path}")
         return report
 
-    def run_cleaning_pipeline(self):
-        """Run the complete data cleaning pipeline"""
+    def run_cleaning_pipeline(self, read_entries: Callable[[Path], Iterable[Dict]] = None):
+        """Run the complete data cleaning pipeline (read_entries: see load_all_raw_data)"""
         logger.info("🚀 Starting Archero Data Cleaning Pipeline")
         
         # Create clean database
-        self.create_clean_database()
+        self.create_clean_database(read_entries)
         
         # Save results
-        self.save_clean_database()
+        with self.instrumentation.stage('save'):
+            if self.stage_cache:
+                self.save_clean_database_cached()
+            else:
+                self.save_clean_database()
         
         # Generate quality report
         report = self.generate_quality_report()
@@ -481,18 +1352,69 @@ class ArcheroDataCleaner:
         logger.info(f"📊 Total raw entries: {report['summary']['total_raw_entries']}")
         logger.info(f"✅ Cleaned entries: {report['summary']['cleaned_entries']}")
         logger.info(f"🗑️ Duplicates removed: {report['summary']['duplicates_removed']}")
+        if self.near_duplicate_threshold is not None:
+            logger.info(f"🧬 Near-duplicates removed: {self.quality_metrics['near_duplicates_removed']}")
         logger.info(f"📈 Cleaning efficiency: {report['summary']['cleaning_efficiency']}")
         logger.info(f"🎯 Average confidence: {report['summary']['average_confidence']}")
         logger.info(f"⚔️ Gear sets: {report['categories']['gear_sets']}")
         logger.info(f"🔮 Runes: {report['categories']['runes']}")
         logger.info(f"👥 Characters: {report['categories']['characters']}")
         logger.info(f"💎 Materials: {report['categories']['materials']}")
+        stages = report['instrumentation']['stages']
+        if stages:
+            slowest = max(stages, key=lambda name: stages[name]['wall_seconds'])
+            logger.info(f"⏱️ Slowest stage: {slowest} ({stages[slowest]['wall_seconds']:.2f}s of "
+                        f"{report['instrumentation']['wall_seconds']:.2f}s)")
         logger.info("="*50)
         
         return report
 
-if __name__ == "__main__":
-    cleaner = ArcheroDataCleaner()
-    cleaner.run_cleaning_pipeline()
-
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean scraped Archero 2 data into a RAG-ready database")
+    parser.add_argument('--data-dir', default='data', help='directory containing comprehensive-knowledge-base/')
+    parser.add_argument('--unfused', action='store_true',
+                        help='run each category extractor separately instead of the single fused pass')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='shard cleaning and extraction across N worker processes')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only reprocess source files that changed since the last --incremental run')
+    parser.add_argument('--near-duplicates', type=float, nargs='?', const=0.8, default=None, metavar='JACCARD',
+                        help='also drop entries whose word shingles overlap an earlier entry by at least '
+                             'this Jaccard similarity (MinHash/LSH, default 0.8)')
+    parser.add_argument('--segment', action='store_true',
+                        help='split chat-dump entries into individual messages before deduplication')
+    parser.add_argument('--sqlite', action='store_true',
+                        help='also write clean-archero-database.sqlite with entry, entity and mention '
+                             'tables and an FTS5 index over the cleaned text')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='stream the database as clean-archero-database.ndjson (one entity per line) '
+                             'instead of the JSON database and category files')
+    parser.add_argument('--stage-cache', action='store_true',
+                        help='cache every stage output under cleaned-database.stages/, keyed by its inputs '
+                             'and code, and rerun only the stages whose key changed')
+    parser.add_argument('--profile', type=Path, metavar='PATH',
+                        help='run under cProfile and dump the stats to PATH (pstats format)')
+    args = parser.parse_args(argv)
+    if args.near_duplicates is not None and not 0 < args.near_duplicates <= 1:
+        parser.error('--near-duplicates must be in (0, 1]')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.unfused and (args.workers > 1 or args.incremental or args.stage_cache):
+        parser.error('--workers, --incremental and --stage-cache require the fused pass')
+    if args.incremental and args.workers > 1:
+        parser.error('--incremental processes changed files serially; drop --workers')
+    if args.stage_cache and (args.workers > 1 or args.incremental):
+        parser.error('--stage-cache runs the serial fused pass; drop --workers and --incremental')
+    
+    cleaner = ArcheroDataCleaner(args.data_dir, fused=not args.unfused, workers=args.workers,
+                                 incremental=args.incremental, near_duplicate_threshold=args.near_duplicates,
+                                 segment=args.segment, sqlite=args.sqlite,
+                                 ndjson=args.ndjson, stage_cache=args.stage_cache)
+    if args.profile:
+        run_profiled(cleaner.run_cleaning_pipeline, args.profile)
+        logger.info(f"🔬 Profile written to {args.profile} (python -m pstats {args.profile})")
+    else:
+        cleaner.run_cleaning_pipeline()
 
+if __name__ == "__main__":
+    main()
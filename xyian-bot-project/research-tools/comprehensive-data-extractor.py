@@ -4,84 +4,165 @@ Comprehensive Data Extractor for Archero 2 Bot
 Extracts structured data from scraped Discord, Wiki, and Reddit content
 """
 
+import hashlib
 import json
 import re
-import pandas as pd
 import os
 from pathlib import Path
 from collections import defaultdict
 import logging
+import argparse
+import inspect
+import sys
+from typing import NamedTuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from archero_pipeline.aggregates import TopK
+from archero_pipeline.bigrams import BigramMatcher, fold, number_before, word_after, word_before
+from archero_pipeline.columnar import require_pyarrow, write_parquet
+from archero_pipeline.ingest import iter_json_entries
+from archero_pipeline.instrument import Instrumentation, content_bytes, entry_label, run_profiled
+from archero_pipeline.lazy import lazy_import
+from archero_pipeline.ndjson import NdjsonWriter
+from archero_pipeline.manifest import SourceManifest, code_fingerprint, file_digest
+from archero_pipeline.parallel import merge_into, to_plain
+from archero_pipeline.quantities import GAME_UNITS, QuantityParser
+
+# Loaded on first use, so --help and argument errors return immediately
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Default locations resolve from this file, so the tool reads and writes the
+# same directories from research-tools/ and through python -m archero_pipeline
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+RAW_DATA_DIR = Path(__file__).resolve().parent / "raw-scraped-data"
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class Mention(NamedTuple):
+    """Where an entity is mentioned: an entry-table ID and a span of its content"""
+    entry_id: int
+    entity: str
+    start: int
+    end: int
+    quantity: str = ''
+
 class ArcheroDataExtractor:
-    def __init__(self, data_dir="../data/comprehensive-knowledge-base"):
+    # Per-entity buckets filled by extract_structured_data
+    BUCKETS = ['rune_data', 'gear_data', 'character_data', 'upgrade_materials',
+               'stats_data', 'build_data', 'event_data']
+
+    # Buckets summarized as CSV tables, and the columns of each table
+    TABLE_BUCKETS = {'gear': 'gear_data', 'rune': 'rune_data', 'character': 'character_data',
+                     'material': 'upgrade_materials'}
+    TABLE_COLUMNS = {
+        'gear': ['name', 'set', 'piece_type', 'mention_count', 'best_context', 'sources'],
+        'rune': ['name', 'mention_count', 'best_context', 'potential_effects', 'sources'],
+        'character': ['name', 'mention_count', 'best_context', 'sources'],
+        'material': ['name', 'total_quantity_mentioned', 'mention_count', 'best_context', 'sources']
+    }
+    TABLE_FILES = {'gear': 'gear_table', 'rune': 'rune_table', 'character': 'character_table',
+                   'material': 'upgrade_materials_table'}
+    # Columns written as Arrow lists and dictionary-encoded strings in Parquet output
+    LIST_COLUMNS = ['sources', 'potential_effects']
+    CATEGORICAL_COLUMNS = ['set', 'piece_type']
+    
+    # Gear piece types by the words that mark them, checked in order
+    PIECE_TYPES = {
+        'weapon': ['crossbow', 'spear', 'staff', 'bow'],
+        'amulet': ['amulet', 'necklace'],
+        'ring': ['ring', 'band'],
+        'chest': ['chest', 'armor', 'plate'],
+        'boots': ['boots', 'shoes'],
+        'helmet': ['helmet', 'helm', 'hat']
+    }
+
+    # Mentions kept per entity, longest context first
+    ENTRY_LIMIT = 10
+    
+    # Characters of context on each side of a mention
+    CONTEXT_LENGTH = 50
+    
+    # Entries extracted between drops of table rows no kept mention refers to
+    COMPACT_EVERY = 64
+
+    def __init__(self, data_dir=DATA_DIR / "comprehensive-knowledge-base", incremental=False, parquet=False,
+                 ndjson=False):
+        if parquet:
+            require_pyarrow()
         self.data_dir = Path(data_dir)
-        self.raw_data_dir = Path("raw-scraped-data")
-        
-        # Data buckets for structured information
-        self.rune_data = defaultdict(list)
-        self.gear_data = defaultdict(list)
-        self.character_data = defaultdict(list)
-        self.upgrade_materials = defaultdict(list)
-        self.stats_data = defaultdict(list)
-        self.build_data = defaultdict(list)
-        self.event_data = defaultdict(list)
-        
-        # Pattern definitions for extraction
+        self.raw_data_dir = RAW_DATA_DIR
+        self.output_dir = self.data_dir.parent / "structured-tables"
+        self.incremental = incremental
+        self.parquet = parquet
+        self.ndjson = ndjson
+        self.manifest_dir = self.data_dir.parent / "structured-tables.manifest"
+        
+        # Each source entry is stored once, under an integer ID; the buckets'
+        # mentions refer to it by ID and span, and their contexts live with it
+        self.entry_table = {}
+        self.entry_ids = {}
+        self.next_entry_id = 0
+        self.extracted_entries = 0
+        
+        # Stage timings and pattern match counts for the quality report
+        self.instrumentation = Instrumentation()
+        
+        # Data buckets for structured information: per entity a mention count,
+        # per-source counts and the ENTRY_LIMIT mentions with the longest contexts
+        self.rune_data = defaultdict(lambda: dict(self._new_entity(), effects={}))
+        self.gear_data = defaultdict(self._new_entity)
+        self.character_data = defaultdict(self._new_entity)
+        self.upgrade_materials = defaultdict(lambda: dict(self._new_entity(), total_quantity=0))
+        self.stats_data = defaultdict(self._new_entity)
+        self.build_data = defaultdict(self._new_entity)
+        self.event_data = defaultdict(self._new_entity)
+        
+        # Pattern families for extraction, matched together in one token pass;
+        # each rule stands for the regex noted next to it
         self.patterns = {
             'runes': [
-                r'(\w+)\s+rune',
-                r'rune[:\s]+(\w+)',
-                r'(\w+)\s+etched',
-                r'etched\s+(\w+)',
-                r'(\w+)\s+circle',
-                r'circle\s+(\w+)',
-                r'(\w+)\s+meteor',
-                r'meteor\s+(\w+)',
-                r'(\w+)\s+sprite',
-                r'sprite\s+(\w+)',
-                r'(\w+)\s+elemental',
-                r'elemental\s+(\w+)'
+                word_before('rune'),                # (\w+)\s+rune
+                word_after('rune', colons=True),    # rune[:\s]+(\w+)
+                word_before('etched'),
+                word_after('etched'),               # etched\s+(\w+)
+                word_before('circle'),
+                word_after('circle'),
+                word_before('meteor'),
+                word_after('meteor'),
+                word_before('sprite'),
+                word_after('sprite'),
+                word_before('elemental'),
+                word_after('elemental')
             ],
             'gear': [
-                r'(\w+)\s+(?:crossbow|spear|staff|bow)',
-                r'(\w+)\s+(?:amulet|necklace)',
-                r'(\w+)\s+(?:ring|band)',
-                r'(\w+)\s+(?:chest|armor|plate)',
-                r'(\w+)\s+(?:boots|shoes)',
-                r'(\w+)\s+(?:helmet|helm|hat)',
-                r'(\w+)\s+(?:gloves|gauntlets)',
-                r'(\w+)\s+(?:belt|waist)'
+                word_before('crossbow', 'spear', 'staff', 'bow'),   # (\w+)\s+(?:crossbow|spear|staff|bow)
+                word_before('amulet', 'necklace'),
+                word_before('ring', 'band'),
+                word_before('chest', 'armor', 'plate'),
+                word_before('boots', 'shoes'),
+                word_before('helmet', 'helm', 'hat'),
+                word_before('gloves', 'gauntlets'),
+                word_before('belt', 'waist')
             ],
             'stats': [
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:crit|critical)',
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:damage|dmg)',
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:attack|atk)',
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:defense|def)',
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:health|hp)',
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:speed|spd)',
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:dodge)',
-                r'(\d+(?:\.\d+)?)\s*%?\s*(?:block)'
-            ],
-            'costs': [
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gems?|gem)',
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gold|g)',
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:coins?|coin)',
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lures?|lure)',
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:kg|kilograms?)',
-                r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:xp|experience)'
-            ],
-            'materials': [
-                r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:shards?|fragments?)',
-                r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:cores?|essence)',
-                r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:stones?|crystals?)',
-                r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:dust|powder)',
-                r'(\d+)\s*(\w+(?:\s+\w+)*)\s*(?:keys?|tokens?)'
+                number_before('crit', 'critical'),  # (\d+(?:\.\d+)?)\s*%?\s*(?:crit|critical)
+                number_before('damage', 'dmg'),
+                number_before('attack', 'atk'),
+                number_before('defense', 'def'),
+                number_before('health', 'hp'),
+                number_before('speed', 'spd'),
+                number_before('dodge'),
+                number_before('block')
             ]
         }
+        self.matcher = BigramMatcher(self.patterns)
+        
+        # Costs ("1,200 gems") and materials ("40 shards", "40 epic shards") are
+        # found by one linear pass of the quantity parser
+        self.quantity_parser = QuantityParser(GAME_UNITS)
         
         # Known gear sets
         self.gear_sets = ['oracle', 'dragoon', 'griffin', 'chromatic', 'mythic', 'legendary', 'epic', 'rare']
@@ -92,307 +173,497 @@ class ArcheroDataExtractor:
         # Known characters
         self.characters = ['thor', 'otta', 'helix', 'drac', 'rolla', 'loki', 'atreyus', 'nyanja', 'dracoola']
 
-    def load_all_data(self):
-        """Load all scraped data from various sources"""
-        logger.info("Loading all scraped data...")
-        
-        all_data = []
-        
-        # Load from knowledge base
+    @classmethod
+    def _new_entity(cls):
+        return {'mentions': 0, 'sources': {}, 'entries': TopK(cls.ENTRY_LIMIT)}
+
+    def add_entry(self, source, category, content):
+        """ID of an entry in the entry table, storing it if it is not there yet
+
+        A row keeps the entry's source, category, a 200-character preview and
+        its length, plus the context windows of its kept mentions, sliced from
+        the content when a mention is kept; the full content is not held.
+        """
+        digest = hashlib.md5(f"{source}\0{category}\0{content}".encode()).hexdigest()
+        return self._add_row({'source': source, 'category': category, 'preview': content[:200],
+                              'length': len(content), 'digest': digest, 'contexts': {}})
+    
+    def _add_row(self, row):
+        entry_id = self.entry_ids.get(row['digest'])
+        if entry_id is None:
+            entry_id = self.entry_ids[row['digest']] = self.next_entry_id
+            self.next_entry_id += 1
+            self.entry_table[entry_id] = row
+        else:
+            self.entry_table[entry_id]['contexts'].update(row['contexts'])
+        return entry_id
+    
+    def _record(self, entity, mention, content):
+        """Count a mention and offer it to the entity's bounded best mentions"""
+        row = self.entry_table[mention.entry_id]
+        entity['mentions'] += 1
+        entity['sources'][row['source']] = entity['sources'].get(row['source'], 0) + 1
+        # Keys name the entry by its digest, so the kept mentions do not depend
+        # on the order IDs were handed out in
+        window = self.context_span(row['length'], mention)
+        key = (window[1] - window[0], row['digest'], mention.start, mention.end, mention.quantity)
+        entity['entries'].add(key, mention)
+        if key in entity['entries'].keys:
+            row['contexts'].setdefault(window, content[window[0]:window[1]])
+    
+    def iter_mentions(self):
+        """Every mention kept in the buckets"""
+        for name in self.BUCKETS:
+            for entity in getattr(self, name).values():
+                yield from entity['entries'].items()
+    
+    def compact_entries(self):
+        """Drop the table rows and context windows no kept mention refers to any more"""
+        windows = defaultdict(set)
+        for mention in self.iter_mentions():
+            windows[mention.entry_id].add(self.context_span(self.entry_table[mention.entry_id]['length'], mention))
+        for entry_id in list(self.entry_table):
+            row = self.entry_table[entry_id]
+            if entry_id in windows:
+                row['contexts'] = {window: text for window, text in row['contexts'].items()
+                                   if window in windows[entry_id]}
+            else:
+                del self.entry_ids[row['digest']]
+                del self.entry_table[entry_id]
+    
+    def entry_table_json(self):
+        """The entry table as JSON-compatible [ID, row] pairs"""
+        return [[entry_id, dict(row, contexts=[[start, end, text] for (start, end), text in row['contexts'].items()])]
+                for entry_id, row in self.entry_table.items()]
+    
+    def adopt_entries(self, contribution):
+        """Give the entries of another extractor's contribution IDs in this table
+        and point its mentions at them"""
+        ids = {}
+        for entry_id, row in contribution['entry_table']:
+            contexts = {(start, end): text for start, end, text in row['contexts']}
+            ids[entry_id] = self._add_row(dict(row, contexts=contexts))
+        for name in self.BUCKETS:
+            for entity in contribution[name].values():
+                adopted = TopK(entity['entries'].k)
+                for key, item in entity['entries'].pairs():
+                    mention = Mention(*item)
+                    adopted.add(key, mention._replace(entry_id=ids[mention.entry_id]))
+                entity['entries'] = adopted
+
+    def iter_sources(self):
+        """Yield (file path, JSON layout) for every source file"""
+        # Knowledge base files keep their entries under "data"
         if self.data_dir.exists():
             for file_path in self.data_dir.glob("*.json"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if isinstance(data, dict) and 'data' in data:
-                            all_data.extend(data['data'])
-                        elif isinstance(data, list):
-                            all_data.extend(data)
-                except Exception as e:
-                    logger.error(f"Error loading {file_path}: {e}")
-        
-        # Load from raw scraped data
+                yield file_path, {'keys': ('data',)}
+        yield from self.iter_raw_sources()
+
+    def iter_raw_sources(self):
+        """Yield (file path, JSON layout) for the raw scraped files, which are
+        either lists of entries or single entries"""
         if self.raw_data_dir.exists():
             for file_path in self.raw_data_dir.rglob("*.json"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        if isinstance(data, list):
-                            all_data.extend(data)
-                        elif isinstance(data, dict):
-                            all_data.append(data)
-                except Exception as e:
-                    logger.error(f"Error loading {file_path}: {e}")
-        
-        logger.info(f"Loaded {len(all_data)} total entries")
-        return all_data
-
-    def extract_patterns(self, text, pattern_type):
-        """Extract patterns from text using regex"""
-        if pattern_type not in self.patterns:
-            return []
+                yield file_path, {'depth': 0}
+
+    def iter_file_entries(self, file_path, layout):
+        """Stream the entries of one source file"""
+        try:
+            yield from iter_json_entries(file_path, **layout)
+        except Exception as e:
+            logger.error(f"Error loading {file_path}: {e}")
+
+    def load_all_data(self, sources=None):
+        """Stream all scraped entries from various sources (default: iter_sources())"""
+        logger.info("Loading all scraped data...")
         
-        matches = []
-        for pattern in self.patterns[pattern_type]:
-            found = re.findall(pattern, text, re.IGNORECASE)
-            matches.extend(found)
+        loaded = 0
+        for file_path, layout in self.iter_sources() if sources is None else sources:
+            for entry in self.iter_file_entries(file_path, layout):
+                loaded += 1
+                yield entry
         
-        return list(set(matches))  # Remove duplicates
+        logger.info(f"Loaded {loaded} total entries")
+
+    def extract_incremental(self):
+        """Fill the buckets from cached per-file contributions, re-extracting only
+        new or changed source files; contributions merge in file order, so the
+        buckets equal those of a full extraction"""
+        modules = [Path(inspect.getfile(cls)) for cls in (TopK, BigramMatcher, QuantityParser)]
+        manifest = SourceManifest(self.manifest_dir, code_fingerprint(Path(__file__), *modules))
+        keys = []
+        reused = rebuilt = 0
+        
+        for file_path, layout in self.iter_sources():
+            key = str(file_path)
+            keys.append(key)
+            digest = file_digest(file_path)
+            
+            if manifest.lookup(key, digest) is not None:
+                contribution = manifest.load_contribution(key)
+                reused += 1
+            else:
+                # A fresh extractor collects just this file's buckets
+                file_extractor = ArcheroDataExtractor(self.data_dir)
+                file_extractor.instrumentation = self.instrumentation
+                file_extractor.extract_structured_data(self.iter_file_entries(file_path, layout))
+                contribution = {name: to_plain(getattr(file_extractor, name)) for name in self.BUCKETS}
+                contribution['entry_table'] = file_extractor.entry_table_json()
+                manifest.store(key, digest, contribution)
+                rebuilt += 1
+            
+            self.adopt_entries(contribution)
+            for name in self.BUCKETS:
+                merge_into(getattr(self, name), contribution[name])
+            self.compact_entries()
+        
+        removed = manifest.prune(keys)
+        manifest.save()
+        logger.info(f"Reused {reused} unchanged files, re-extracted {rebuilt}, dropped {len(removed)} removed")
+
+    def extract_patterns(self, text):
+        """Distinct words and numbers captured by each pattern family, with the
+        span of their first match, from one pass over the text's tokens"""
+        found = {}
+        for pattern_type, spans in self.matcher.scan(text).items():
+            found[pattern_type] = first = {}
+            for start, end in spans:
+                first.setdefault(text[start:end], (start, end))
+        return found
 
     def extract_structured_data(self, data):
         """Extract structured data from all entries"""
         logger.info("Extracting structured data from all entries...")
         
         for entry in data:
-            if not isinstance(entry, dict) or 'content' not in entry:
-                continue
-                
-            content = entry['content']
-            source = entry.get('source', 'unknown')
-            category = entry.get('category', 'unknown')
-            
-            # Extract runes
-            runes = self.extract_patterns(content, 'runes')
-            for rune in runes:
-                if rune.lower() in self.rune_types:
-                    self.rune_data[rune.lower()].append({
-                        'content': content[:200],
-                        'source': source,
-                        'category': category,
-                        'context': self.get_context(content, rune)
-                    })
-            
-            # Extract gear
-            gear = self.extract_patterns(content, 'gear')
-            for item in gear:
-                if any(set_name in item.lower() for set_name in self.gear_sets):
-                    self.gear_data[item.lower()].append({
-                        'content': content[:200],
-                        'source': source,
-                        'category': category,
-                        'context': self.get_context(content, item)
-                    })
-            
-            # Extract stats
-            stats = self.extract_patterns(content, 'stats')
-            for stat in stats:
-                self.stats_data[stat].append({
-                    'content': content[:200],
-                    'source': source,
-                    'category': category,
-                    'context': self.get_context(content, stat)
-                })
-            
-            # Extract costs
-            costs = self.extract_patterns(content, 'costs')
-            for cost in costs:
-                self.stats_data[f"cost_{cost}"].append({
-                    'content': content[:200],
-                    'source': source,
-                    'category': category,
-                    'context': self.get_context(content, cost)
-                })
-            
-            # Extract materials
-            materials = self.extract_patterns(content, 'materials')
-            for material in materials:
-                if isinstance(material, tuple) and len(material) == 2:
-                    quantity, material_name = material
-                    self.upgrade_materials[material_name.lower()].append({
-                        'quantity': quantity,
-                        'content': content[:200],
-                        'source': source,
-                        'category': category,
-                        'context': self.get_context(content, material_name)
-                    })
-            
-            # Extract characters
-            for char in self.characters:
-                if char in content.lower():
-                    self.character_data[char].append({
-                        'content': content[:200],
-                        'source': source,
-                        'category': category,
-                        'context': self.get_context(content, char)
-                    })
-
-    def get_context(self, text, keyword, context_length=50):
-        """Get context around a keyword"""
-        keyword_lower = keyword.lower()
-        text_lower = text.lower()
-        
-        start = text_lower.find(keyword_lower)
-        if start == -1:
-            return ""
-        
-        context_start = max(0, start - context_length)
-        context_end = min(len(text), start + len(keyword) + context_length)
-        
-        return text[context_start:context_end]
+            self.extract_raw_entry(entry)
+        
+        with self.instrumentation.stage('compact_entries'):
+            self.compact_entries()
+
+    def extract_raw_entry(self, entry):
+        """Store and extract one scraped entry, skipping entries without content;
+        pending entries are compacted every COMPACT_EVERY entries"""
+        if not isinstance(entry, dict) or 'content' not in entry:
+            return
+        
+        content = entry['content']
+        source = entry.get('source', 'unknown')
+        with self.instrumentation.stage('extract_structured_data', 1, len(content.encode('utf-8')),
+                                        entry_label(source, content)):
+            entry_id = self.add_entry(source, entry.get('category', 'unknown'), content)
+            self.extract_entry(entry_id, content)
+        
+        self.extracted_entries += 1
+        if self.extracted_entries % self.COMPACT_EVERY == 0:
+            with self.instrumentation.stage('compact_entries'):
+                self.compact_entries()
+
+    def extract_entry(self, entry_id, content):
+        """Record the rune, gear, stat, cost, material and character mentions of one stored entry"""
+        matches = self.extract_patterns(content)
+        for family, captures in matches.items():
+            self.instrumentation.count(family, len(captures))
+        
+        # Extract runes
+        for rune, span in matches['runes'].items():
+            if rune.lower() in self.rune_types:
+                rune_entry = self.rune_data[rune.lower()]
+                mention = Mention(entry_id, rune.lower(), *span)
+                self._record(rune_entry, mention, content)
+                # Look for percentage values near the rune name
+                start, end = self.context_span(len(content), mention)
+                for percentage in re.findall(r'(\d+(?:\.\d+)?)\s*%', content[start:end]):
+                    rune_entry['effects'][percentage] = rune_entry['effects'].get(percentage, 0) + 1
+        
+        # Extract gear
+        for item, span in matches['gear'].items():
+            if any(set_name in item.lower() for set_name in self.gear_sets):
+                self._record(self.gear_data[item.lower()], Mention(entry_id, item.lower(), *span), content)
+        
+        # Extract stats
+        for stat, span in matches['stats'].items():
+            self._record(self.stats_data[stat], Mention(entry_id, stat, *span), content)
+        
+        quantities = list(self.quantity_parser.parse(content))
+        
+        # Extract costs
+        costs = {}
+        for q in quantities:
+            if q.kind == 'cost':
+                costs.setdefault(q.number, (q.start, q.start + len(q.number)))
+        self.instrumentation.count('costs', len(costs))
+        for cost, span in costs.items():
+            self._record(self.stats_data[f"cost_{cost}"], Mention(entry_id, f"cost_{cost}", *span), content)
+        
+        # Extract materials
+        materials = {}
+        for q in quantities:
+            if q.kind == 'material':
+                materials.setdefault((q.number.replace(',', ''), q.name.lower()), (q.start, q.end))
+        self.instrumentation.count('materials', len(materials))
+        for (quantity, material_name), span in materials.items():
+            material_entry = self.upgrade_materials[material_name]
+            if quantity.isdigit():
+                material_entry['total_quantity'] += int(quantity)
+            self._record(material_entry, Mention(entry_id, material_name, *span, quantity), content)
+        
+        # Extract characters (case-insensitively, anywhere in the text)
+        folded = fold(content)
+        for char in self.characters:
+            start = folded.find(char)
+            if start != -1:
+                self.instrumentation.count('characters')
+                self._record(self.character_data[char], Mention(entry_id, char, start, start + len(char)), content)
+
+    def context_span(self, length, mention):
+        """Offsets of the context window around a mention in a text of the given length"""
+        return max(0, mention.start - self.CONTEXT_LENGTH), min(length, mention.end + self.CONTEXT_LENGTH)
+
+    def context(self, mention):
+        """Context around a kept mention, from its entry's row"""
+        row = self.entry_table[mention.entry_id]
+        return row['contexts'][self.context_span(row['length'], mention)]
+
+    def best_context(self, entity):
+        """Longest context kept for an entity"""
+        mentions = entity['entries'].items()
+        return self.context(mentions[0]) if mentions else ""
+
+    def entity_json(self, entity, entry_numbers):
+        """JSON form of an entity: counts, totals and its best mentions, which
+        refer to the written entry table by number"""
+        mentions = []
+        for mention in entity['entries'].items():
+            record = {'entry': entry_numbers.setdefault(mention.entry_id, len(entry_numbers)),
+                      'start': mention.start, 'end': mention.end, 'context': self.context(mention)}
+            if mention.quantity:
+                record['quantity'] = mention.quantity
+            mentions.append(record)
+        return dict(entity, entries=mentions)
+
+    def entry_json(self, entry_id):
+        """JSON form of a stored entry: its source, category and content preview"""
+        row = self.entry_table[entry_id]
+        return {'source': row['source'], 'category': row['category'], 'content': row['preview']}
+
+    @staticmethod
+    def first_contained(names, words):
+        """For each name, the first of the words it contains (None if none)"""
+        names = pd.Series(names, dtype=object)
+        if names.empty:
+            return pd.Series([], dtype=object)
+        masks = [names.str.contains(word, regex=False).to_numpy() for word in words]
+        return pd.Series(np.select(masks, words, default=None), index=names.index, dtype=object)
+
+    @staticmethod
+    def grouped_lists(groups, values):
+        """Values as one list per group (numbered 0 to n-1), in row order"""
+        if not len(groups):
+            return []
+        order = np.argsort(groups, kind='stable')
+        bounds = np.cumsum(np.bincount(groups))[:-1]
+        return [part.tolist() for part in np.split(values[order], bounds)]
+
+    def mention_frame(self):
+        """Long-form mention counts of the table buckets: one row per category,
+        entity and source, with categorical columns (gear rows also carry their
+        set and piece type) and the integer number of mentions"""
+        columns = {'category': [], 'entity': [], 'source': [], 'mentions': []}
+        for category, bucket_name in self.TABLE_BUCKETS.items():
+            for name, entity in getattr(self, bucket_name).items():
+                for source, count in entity['sources'].items():
+                    columns['category'].append(category)
+                    columns['entity'].append(name)
+                    columns['source'].append(source)
+                    columns['mentions'].append(count)
+        
+        frame = pd.DataFrame({
+            'category': pd.Categorical(columns['category'], categories=list(self.TABLE_BUCKETS)),
+            'entity': pd.Categorical(columns['entity']),
+            'source': pd.Categorical(columns['source']),
+            'mentions': np.array(columns['mentions'], dtype=np.int64)
+        })
+        
+        # Set and piece type are worked out once per distinct entity name
+        names = frame['entity'].cat.categories
+        gear = frame['category'] == 'gear'
+        frame['set'] = frame['entity'].map(dict(zip(names, self.first_contained(names, self.gear_sets))))
+        frame['set'] = frame['set'].where(gear).astype('category')
+        piece_words = [word for words in self.PIECE_TYPES.values() for word in words]
+        piece_of_word = {word: piece for piece, words in self.PIECE_TYPES.items() for word in words}
+        first_words = self.first_contained(names, piece_words)
+        frame['piece'] = frame['entity'].map(dict(zip(names, first_words.map(piece_of_word))))
+        frame['piece'] = frame['piece'].where(gear).astype('category')
+        return frame
+
+    def build_tables(self, frame=None):
+        """Gear, rune, character and materials tables, aggregated from the
+        mention frame by entity; best contexts, rune effects and material
+        totals come from the per-entity state"""
+        frame = self.mention_frame() if frame is None else frame
+        tables = {}
+        for category, bucket_name in self.TABLE_BUCKETS.items():
+            bucket = getattr(self, bucket_name)
+            rows = frame[frame['category'] == category]
+            grouped = rows.groupby('entity', observed=True, sort=False)
+            table = grouped.agg(
+                set=('set', 'first'),
+                piece_type=('piece', 'first'),
+                mention_count=('mentions', 'sum')
+            ).reset_index().rename(columns={'entity': 'name'})
+            table['sources'] = self.grouped_lists(grouped.ngroup().to_numpy(), rows['source'].to_numpy(dtype=object))
+            table['name'] = table['name'].astype(object)
+            table['best_context'] = [self.best_context(bucket[name]) for name in table['name']]
+            if category == 'material':
+                table['total_quantity_mentioned'] = np.array(
+                    [bucket[name]['total_quantity'] for name in table['name']], dtype=np.int64)
+            if category == 'rune':
+                table['potential_effects'] = [list(bucket[name]['effects']) for name in table['name']]
+            tables[category] = table[self.TABLE_COLUMNS[category]]
+        return tables
 
     def build_gear_tables(self):
         """Build comprehensive gear tables"""
         logger.info("Building gear tables...")
-        
-        gear_table = []
-        
-        for gear_name, entries in self.gear_data.items():
-            # Extract set information
-            set_name = None
-            for set_type in self.gear_sets:
-                if set_type in gear_name:
-                    set_name = set_type
-                    break
-            
-            # Extract piece type
-            piece_type = None
-            if any(piece in gear_name for piece in ['crossbow', 'spear', 'staff', 'bow']):
-                piece_type = 'weapon'
-            elif any(piece in gear_name for piece in ['amulet', 'necklace']):
-                piece_type = 'amulet'
-            elif any(piece in gear_name for piece in ['ring', 'band']):
-                piece_type = 'ring'
-            elif any(piece in gear_name for piece in ['chest', 'armor', 'plate']):
-                piece_type = 'chest'
-            elif any(piece in gear_name for piece in ['boots', 'shoes']):
-                piece_type = 'boots'
-            elif any(piece in gear_name for piece in ['helmet', 'helm', 'hat']):
-                piece_type = 'helmet'
-            
-            # Count mentions and get best context
-            mention_count = len(entries)
-            best_context = max(entries, key=lambda x: len(x['context']))['context'] if entries else ""
-            
-            gear_table.append({
-                'name': gear_name,
-                'set': set_name,
-                'piece_type': piece_type,
-                'mention_count': mention_count,
-                'best_context': best_context,
-                'sources': list(set(entry['source'] for entry in entries))
-            })
-        
-        return pd.DataFrame(gear_table)
+        return self.build_tables()['gear']
 
     def build_rune_tables(self):
         """Build comprehensive rune tables"""
         logger.info("Building rune tables...")
-        
-        rune_table = []
-        
-        for rune_name, entries in self.rune_data.items():
-            # Count mentions and get best context
-            mention_count = len(entries)
-            best_context = max(entries, key=lambda x: len(x['context']))['context'] if entries else ""
-            
-            # Extract potential effects from context
-            effects = []
-            for entry in entries:
-                context = entry['context']
-                # Look for percentage values near the rune name
-                percentages = re.findall(r'(\d+(?:\.\d+)?)\s*%', context)
-                effects.extend(percentages)
-            
-            rune_table.append({
-                'name': rune_name,
-                'mention_count': mention_count,
-                'best_context': best_context,
-                'potential_effects': list(set(effects)),
-                'sources': list(set(entry['source'] for entry in entries))
-            })
-        
-        return pd.DataFrame(rune_table)
+        return self.build_tables()['rune']
 
     def build_character_tables(self):
         """Build character information tables"""
         logger.info("Building character tables...")
-        
-        char_table = []
-        
-        for char_name, entries in self.character_data.items():
-            mention_count = len(entries)
-            best_context = max(entries, key=lambda x: len(x['context']))['context'] if entries else ""
-            
-            char_table.append({
-                'name': char_name,
-                'mention_count': mention_count,
-                'best_context': best_context,
-                'sources': list(set(entry['source'] for entry in entries))
-            })
-        
-        return pd.DataFrame(char_table)
+        return self.build_tables()['character']
 
     def build_upgrade_materials_table(self):
         """Build upgrade materials table"""
         logger.info("Building upgrade materials table...")
-        
-        materials_table = []
-        
-        for material_name, entries in self.upgrade_materials.items():
-            total_quantity = sum(int(entry['quantity']) for entry in entries if entry['quantity'].isdigit())
-            mention_count = len(entries)
-            best_context = max(entries, key=lambda x: len(x['context']))['context'] if entries else ""
-            
-            materials_table.append({
-                'name': material_name,
-                'total_quantity_mentioned': total_quantity,
-                'mention_count': mention_count,
-                'best_context': best_context,
-                'sources': list(set(entry['source'] for entry in entries))
-            })
-        
-        return pd.DataFrame(materials_table)
-
-    def save_tables(self, output_dir="../data/structured-tables"):
-        """Save all tables to CSV files"""
-        output_path = Path(output_dir)
+        return self.build_tables()['material']
+
+    def save_tables(self, output_dir=None):
+        """Save all tables to CSV files (default: structured-tables/ next to the data)"""
+        output_path = Path(output_dir) if output_dir else self.output_dir
         output_path.mkdir(exist_ok=True)
         
         logger.info(f"Saving tables to {output_path}")
         
-        # Build and save all tables
-        gear_df = self.build_gear_tables()
+        # Build all tables from one mention frame and save them
+        logger.info("Building tables from the mention frame...")
+        with self.instrumentation.stage('build_tables'):
+            frame = self.mention_frame()
+            tables = self.build_tables(frame)
+        
+        gear_df = tables['gear']
         gear_df.to_csv(output_path / "gear_table.csv", index=False)
         logger.info(f"Saved gear table with {len(gear_df)} entries")
         
-        rune_df = self.build_rune_tables()
+        rune_df = tables['rune']
         rune_df.to_csv(output_path / "rune_table.csv", index=False)
         logger.info(f"Saved rune table with {len(rune_df)} entries")
         
-        char_df = self.build_character_tables()
+        char_df = tables['character']
         char_df.to_csv(output_path / "character_table.csv", index=False)
         logger.info(f"Saved character table with {len(char_df)} entries")
         
-        materials_df = self.build_upgrade_materials_table()
+        materials_df = tables['material']
         materials_df.to_csv(output_path / "upgrade_materials_table.csv", index=False)
         logger.info(f"Saved materials table with {len(materials_df)} entries")
         
+        if self.parquet:
+            # Typed columnar copies: lists and categoricals stay as such, and
+            # readers can load single columns (archero_pipeline.columnar.read_columns)
+            for category, table in tables.items():
+                write_parquet(table, output_path / f"{self.TABLE_FILES[category]}.parquet",
+                              self.LIST_COLUMNS, self.CATEGORICAL_COLUMNS)
+            write_parquet(frame, output_path / "mentions.parquet")
+            logger.info(f"Saved Parquet tables and {len(frame)} mention rows")
+        
         # Save raw extracted data as JSON for further processing
-        extracted_data = {
-            'runes': dict(self.rune_data),
-            'gear': dict(self.gear_data),
-            'characters': dict(self.character_data),
-            'materials': dict(self.upgrade_materials),
-            'stats': dict(self.stats_data)
+        buckets = {
+            'runes': self.rune_data,
+            'gear': self.gear_data,
+            'characters': self.character_data,
+            'materials': self.upgrade_materials,
+            'stats': self.stats_data
         }
-        
-        with open(output_path / "extracted_data.json", 'w', encoding='utf-8') as f:
-            json.dump(extracted_data, f, indent=2, ensure_ascii=False)
+        # Entries are written once, numbered in order of first reference, with
+        # a 200-character preview of their content
+        entry_numbers = {}
+        if self.ndjson:
+            self.stream_extracted_data(output_path / "extracted_data.ndjson", buckets, entry_numbers)
+        else:
+            extracted_data = {
+                category: {name: self.entity_json(entity, entry_numbers) for name, entity in bucket.items()}
+                for category, bucket in buckets.items()
+            }
+            extracted_data['entry_table'] = [self.entry_json(entry_id) for entry_id in entry_numbers]
+            
+            with open(output_path / "extracted_data.json", 'w', encoding='utf-8') as f:
+                json.dump(extracted_data, f, indent=2, ensure_ascii=False)
         
         logger.info("All tables saved successfully!")
 
+    def stream_extracted_data(self, path, buckets, entry_numbers):
+        """Write the extracted data as NDJSON, one record per line as each entity
+        is converted: an 'entry' record for every entry the first time it is
+        referenced, then the 'entity' record that refers to it"""
+        with NdjsonWriter(path) as writer:
+            for category, bucket in buckets.items():
+                for name, entity in bucket.items():
+                    new_entries = dict.fromkeys(mention.entry_id for mention in entity['entries'].items()
+                                                if mention.entry_id not in entry_numbers)
+                    data = self.entity_json(entity, entry_numbers)
+                    for entry_id in new_entries:
+                        writer.write({'record': 'entry', 'entry': entry_numbers[entry_id], **self.entry_json(entry_id)})
+                    writer.write({'record': 'entity', 'category': category, 'name': name, 'data': data})
+        logger.info(f"Streamed {writer.count} records to {path}")
+
+    def save_quality_report(self, output_dir=None):
+        """Write entity counts and the run's instrumentation to quality-report.json"""
+        report = {
+            'summary': {
+                'entries': len(self.entry_ids),
+                'runes': len(self.rune_data),
+                'gear': len(self.gear_data),
+                'characters': len(self.character_data),
+                'materials': len(self.upgrade_materials),
+                'stats': len(self.stats_data)
+            },
+            'instrumentation': self.instrumentation.report()
+        }
+        
+        output_path = Path(output_dir) if output_dir else self.output_dir
+        with open(output_path / "quality-report.json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        
+        logger.info("Quality report saved")
+        return report
+
     def run_extraction(self):
         """Run the complete data extraction process"""
         logger.info("Starting comprehensive data extraction...")
         
-        # Load all data
-        all_data = self.load_all_data()
-        
-        # Extract structured data
-        self.extract_structured_data(all_data)
+        if self.incremental:
+            # Only re-extract source files that changed since the last run
+            with self.instrumentation.stage('incremental_refresh'):
+                self.extract_incremental()
+        else:
+            # Stream all data
+            all_data = self.instrumentation.iterate('load', self.load_all_data(), size=content_bytes)
+            
+            # Extract structured data
+            self.extract_structured_data(all_data)
         
-        # Save tables
-        self.save_tables()
+        self.save_results()
+
+    def save_results(self, output_dir=None):
+        """Save the tables and the quality report, then log the summary"""
+        with self.instrumentation.stage('save_tables'):
+            self.save_tables(output_dir)
+        report = self.save_quality_report(output_dir)
         
         # Print summary
         logger.info("\n" + "="*50)
@@ -403,8 +674,39 @@ class ArcheroDataExtractor:
         logger.info(f"Characters found: {len(self.character_data)}")
         logger.info(f"Materials found: {len(self.upgrade_materials)}")
         logger.info(f"Stats found: {len(self.stats_data)}")
+        stages = report['instrumentation']['stages']
+        if stages:
+            slowest = max(stages, key=lambda name: stages[name]['wall_seconds'])
+            logger.info(f"Slowest stage: {slowest} ({stages[slowest]['wall_seconds']:.2f}s of "
+                        f"{report['instrumentation']['wall_seconds']:.2f}s)")
         logger.info("="*50)
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract structured Archero 2 tables from scraped data")
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='directory containing comprehensive-knowledge-base/; the tables go to its '
+                             'structured-tables/ (default: the project data directory)')
+    parser.add_argument('--raw-data-dir', type=Path, default=RAW_DATA_DIR,
+                        help='raw scraped files to extract as well (default: research-tools/raw-scraped-data)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-extract source files that changed since the last --incremental run')
+    parser.add_argument('--parquet', action='store_true',
+                        help='also write zstd-compressed Parquet tables (needs pyarrow)')
+    parser.add_argument('--ndjson', action='store_true',
+                        help='stream extracted_data.ndjson (one entry or entity record per line) '
+                             'instead of extracted_data.json')
+    parser.add_argument('--profile', type=Path, metavar='PATH',
+                        help='run under cProfile and dump the stats to PATH (pstats format)')
+    args = parser.parse_args(argv)
+    
+    extractor = ArcheroDataExtractor(args.data_dir / "comprehensive-knowledge-base", incremental=args.incremental,
+                                     parquet=args.parquet, ndjson=args.ndjson)
+    extractor.raw_data_dir = args.raw_data_dir
+    if args.profile:
+        run_profiled(extractor.run_extraction, args.profile)
+        logger.info(f"Profile written to {args.profile} (python -m pstats {args.profile})")
+    else:
+        extractor.run_extraction()
+
 if __name__ == "__main__":
-    extractor = ArcheroDataExtractor()
-    extractor.run_extraction()
+    main()
@@ -4,18 +4,13 @@ Archero 2 Bot - Local Model Training
 Fine-tune a small model for Archero 2 Q&A
 """
 
+import argparse
 import json
 import os
 from pathlib import Path
-from transformers import (
-    AutoTokenizer, 
-    AutoModelForCausalLM, 
-    TrainingArguments, 
-    Trainer,
-    DataCollatorForLanguageModeling
-)
-from datasets import Dataset
-import torch
+
+# transformers, datasets and torch take seconds to import, so they are
+# imported inside the methods that use them
 
 class ArcheroTrainer:
     def __init__(self):
@@ -83,6 +78,9 @@ class ArcheroTrainer:
     
     def create_training_dataset(self):
         """Create training dataset in the right format"""
+        from datasets import Dataset
+        from transformers import AutoTokenizer
+        
         print("🔄 Creating training dataset...")
         
         # Format as conversations for DialoGPT
@@ -112,6 +110,13 @@ class ArcheroTrainer:
     
     def train_model(self, dataset):
         """Train the model"""
+        from transformers import (
+            AutoModelForCausalLM,
+            DataCollatorForLanguageModeling,
+            Trainer,
+            TrainingArguments
+        )
+        
         print("🚀 Starting model training...")
         
         # Load model
@@ -160,6 +165,9 @@ class ArcheroTrainer:
             print("❌ Model not loaded. Train first.")
             return
         
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        
         # Load trained model
         self.model = AutoModelForCausalLM.from_pretrained("./archero-model")
         self.tokenizer = AutoTokenizer.from_pretrained("./archero-model")
@@ -181,7 +189,10 @@ class ArcheroTrainer:
         response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
         return response
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fine-tune a small model for Archero 2 Q&A")
+    parser.parse_args(argv)
+    
     print("🎮 Archero 2 Bot - Local Model Training")
     print("=" * 50)
     
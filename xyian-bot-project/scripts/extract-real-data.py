@@ -4,11 +4,20 @@ Extract REAL structured game data from raw Discord messages
 Remove all chat noise and create clean tables
 """
 
+import argparse
 import json
 import re
+import sys
 from pathlib import Path
 from collections import defaultdict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from archero_pipeline.ingest import iter_json_entries
+
+# Resolved from this file, so the script runs the same from scripts/ and
+# through python -m archero_pipeline
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+
 class RealDataExtractor:
     def __init__(self):
         self.gear_sets = {
@@ -49,113 +58,122 @@ class RealDataExtractor:
             'blade': {'damage': '', 'type': 'melee', 'best_for': []}
         }
         
+        self.entries_loaded = 0
+        
     def load_raw_data(self, data_dir):
-        """Load all raw JSON files"""
-        raw_texts = []
+        """Stream entries from all raw JSON files"""
+        self.entries_loaded = 0
         data_path = Path(data_dir)
         
+        # Entries live in lists at most two dict levels down
         for json_file in data_path.glob('**/*.json'):
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        for key, value in data.items():
-                            if isinstance(value, list):
-                                raw_texts.extend(value)
-                            elif isinstance(value, dict):
-                                for subkey, subvalue in value.items():
-                                    if isinstance(subvalue, list):
-                                        raw_texts.extend(subvalue)
+                for entry in iter_json_entries(json_file, depth=2):
+                    self.entries_loaded += 1
+                    yield entry
             except Exception as e:
                 print(f"Error loading {json_file}: {e}")
-                
-        return raw_texts
+    
+    def extract_all(self, texts):
+        """Extract gear, rune and character data in a single pass over the texts"""
+        for text in texts:
+            self.extract_text(text)
+    
+    def extract_text(self, text):
+        """Extract gear, rune and character data from one raw entry (only text entries count)"""
+        if not isinstance(text, str):
+            return
+        
+        text_lower = text.lower()
+        self._extract_gear_text(text_lower)
+        self._extract_rune_text(text_lower)
+        self._extract_character_text(text_lower)
     
     def extract_gear_data(self, texts):
         """Extract actual gear set bonuses and pieces"""
         for text in texts:
-            if not isinstance(text, str):
-                continue
-                
-            text_lower = text.lower()
-            
-            # Extract gear set bonuses
-            if '2-piece' in text_lower or '4-piece' in text_lower:
-                for gear_name in self.gear_sets.keys():
-                    if gear_name in text_lower:
-                        # Extract bonus info
-                        bonus_match = re.search(r'(\d+)%?\s*(attack|hp|crit|damage)', text_lower)
-                        if bonus_match:
-                            value = bonus_match.group(1)
-                            stat = bonus_match.group(2)
-                            if '2-piece' in text_lower:
-                                self.gear_sets[gear_name]['bonuses']['2_piece'] = f"+{value}% {stat}"
-                            elif '4-piece' in text_lower:
-                                self.gear_sets[gear_name]['bonuses']['4_piece'] = f"+{value}% {stat}"
-            
-            # Extract gear recommendations
-            for gear_name in self.gear_sets.keys():
-                if gear_name in text_lower:
-                    if 'pvp' in text_lower or 'arena' in text_lower:
-                        if 'PvP' not in self.gear_sets[gear_name]['description']:
-                            self.gear_sets[gear_name]['description'] += 'Good for PvP. '
-                    if 'pve' in text_lower or 'boss' in text_lower:
-                        if 'PvE' not in self.gear_sets[gear_name]['description']:
-                            self.gear_sets[gear_name]['description'] += 'Good for PvE. '
+            if isinstance(text, str):
+                self._extract_gear_text(text.lower())
     
     def extract_rune_data(self, texts):
         """Extract rune effects and mechanics"""
         for text in texts:
-            if not isinstance(text, str):
-                continue
-                
-            text_lower = text.lower()
-            
-            for rune_name in self.runes.keys():
-                if rune_name in text_lower:
-                    # Extract damage percentages
-                    dmg_match = re.search(r'(\d+)%?\s*damage', text_lower)
-                    if dmg_match:
-                        self.runes[rune_name]['stats']['damage'] = f"{dmg_match.group(1)}%"
-                    
-                    # Extract effects
-                    if 'slow' in text_lower:
-                        self.runes[rune_name]['effect'] = 'Slows enemies'
-                    if 'burn' in text_lower or 'dot' in text_lower:
-                        self.runes[rune_name]['effect'] = 'Damage over time'
-                    if 'aoe' in text_lower or 'area' in text_lower:
-                        self.runes[rune_name]['effect'] = 'Area damage'
-                    if 'stun' in text_lower or 'freeze' in text_lower:
-                        self.runes[rune_name]['effect'] = 'Crowd control'
+            if isinstance(text, str):
+                self._extract_rune_text(text.lower())
     
     def extract_character_data(self, texts):
         """Extract character abilities and uses"""
         for text in texts:
-            if not isinstance(text, str):
-                continue
+            if isinstance(text, str):
+                self._extract_character_text(text.lower())
+    
+    def _extract_gear_text(self, text_lower):
+        """Gear set bonuses and recommendations from one lowercased text"""
+        # Extract gear set bonuses
+        if '2-piece' in text_lower or '4-piece' in text_lower:
+            for gear_name in self.gear_sets.keys():
+                if gear_name in text_lower:
+                    # Extract bonus info
+                    bonus_match = re.search(r'(\d+)%?\s*(attack|hp|crit|damage)', text_lower)
+                    if bonus_match:
+                        value = bonus_match.group(1)
+                        stat = bonus_match.group(2)
+                        if '2-piece' in text_lower:
+                            self.gear_sets[gear_name]['bonuses']['2_piece'] = f"+{value}% {stat}"
+                        elif '4-piece' in text_lower:
+                            self.gear_sets[gear_name]['bonuses']['4_piece'] = f"+{value}% {stat}"
+        
+        # Extract gear recommendations
+        for gear_name in self.gear_sets.keys():
+            if gear_name in text_lower:
+                if 'pvp' in text_lower or 'arena' in text_lower:
+                    if 'PvP' not in self.gear_sets[gear_name]['description']:
+                        self.gear_sets[gear_name]['description'] += 'Good for PvP. '
+                if 'pve' in text_lower or 'boss' in text_lower:
+                    if 'PvE' not in self.gear_sets[gear_name]['description']:
+                        self.gear_sets[gear_name]['description'] += 'Good for PvE. '
+    
+    def _extract_rune_text(self, text_lower):
+        """Rune effects and damage stats from one lowercased text"""
+        for rune_name in self.runes.keys():
+            if rune_name in text_lower:
+                # Extract damage percentages
+                dmg_match = re.search(r'(\d+)%?\s*damage', text_lower)
+                if dmg_match:
+                    self.runes[rune_name]['stats']['damage'] = f"{dmg_match.group(1)}%"
                 
-            text_lower = text.lower()
-            
-            for char_name in self.characters.keys():
-                if char_name in text_lower:
-                    # Extract role
-                    if 'tank' in text_lower:
-                        self.characters[char_name]['role'] = 'Tank'
-                    elif 'dps' in text_lower or 'damage' in text_lower:
-                        self.characters[char_name]['role'] = 'DPS'
-                    elif 'support' in text_lower:
-                        self.characters[char_name]['role'] = 'Support'
-                    
-                    # Extract best for
-                    if 'pvp' in text_lower or 'arena' in text_lower:
-                        if 'PvP' not in self.characters[char_name]['best_for']:
-                            self.characters[char_name]['best_for'].append('PvP')
-                    if 'pve' in text_lower or 'boss' in text_lower:
-                        if 'PvE' not in self.characters[char_name]['best_for']:
-                            self.characters[char_name]['best_for'].append('PvE')
-                    if 'guild' in text_lower:
-                        if 'Guild Battles' not in self.characters[char_name]['best_for']:
-                            self.characters[char_name]['best_for'].append('Guild Battles')
+                # Extract effects
+                if 'slow' in text_lower:
+                    self.runes[rune_name]['effect'] = 'Slows enemies'
+                if 'burn' in text_lower or 'dot' in text_lower:
+                    self.runes[rune_name]['effect'] = 'Damage over time'
+                if 'aoe' in text_lower or 'area' in text_lower:
+                    self.runes[rune_name]['effect'] = 'Area damage'
+                if 'stun' in text_lower or 'freeze' in text_lower:
+                    self.runes[rune_name]['effect'] = 'Crowd control'
+    
+    def _extract_character_text(self, text_lower):
+        """Character roles and best uses from one lowercased text"""
+        for char_name in self.characters.keys():
+            if char_name in text_lower:
+                # Extract role
+                if 'tank' in text_lower:
+                    self.characters[char_name]['role'] = 'Tank'
+                elif 'dps' in text_lower or 'damage' in text_lower:
+                    self.characters[char_name]['role'] = 'DPS'
+                elif 'support' in text_lower:
+                    self.characters[char_name]['role'] = 'Support'
+                
+                # Extract best for
+                if 'pvp' in text_lower or 'arena' in text_lower:
+                    if 'PvP' not in self.characters[char_name]['best_for']:
+                        self.characters[char_name]['best_for'].append('PvP')
+                if 'pve' in text_lower or 'boss' in text_lower:
+                    if 'PvE' not in self.characters[char_name]['best_for']:
+                        self.characters[char_name]['best_for'].append('PvE')
+                if 'guild' in text_lower:
+                    if 'Guild Battles' not in self.characters[char_name]['best_for']:
+                        self.characters[char_name]['best_for'].append('Guild Battles')
     
     def save_structured_data(self, output_dir):
         """Save clean structured data"""
@@ -184,22 +202,28 @@ class RealDataExtractor:
         print(f"👥 Characters: {len(self.characters)}")
         print(f"⚔️ Weapons: {len(self.weapons)}")
 
-if __name__ == '__main__':
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract clean gear, rune and character data from raw messages")
+    parser.add_argument('--data-dir', type=Path, default=DATA_DIR,
+                        help='directory containing comprehensive-knowledge-base/; the data goes to its '
+                             'structured-clean/ (default: the project data directory)')
+    args = parser.parse_args(argv)
     extractor = RealDataExtractor()
     
     print("🔍 Loading raw data...")
-    raw_data = extractor.load_raw_data('../data/comprehensive-knowledge-base')
-    print(f"✅ Loaded {len(raw_data)} raw entries")
+    raw_data = extractor.load_raw_data(args.data_dir / 'comprehensive-knowledge-base')
     
     print("\n🧹 Extracting structured data...")
-    extractor.extract_gear_data(raw_data)
-    extractor.extract_rune_data(raw_data)
-    extractor.extract_character_data(raw_data)
+    extractor.extract_all(raw_data)
+    print(f"✅ Processed {extractor.entries_loaded} raw entries")
     
     print("\n💾 Saving clean structured data...")
-    extractor.save_structured_data('../data/structured-clean')
+    extractor.save_structured_data(args.data_dir / 'structured-clean')
     
     print("\n✅ DONE! Real structured data extracted.")
 
+if __name__ == '__main__':
+    main()
+
 
 
@@ -4,6 +4,7 @@ Parse actual game data from Discord conversations
 Extract ONLY factual game information - no chat noise
 """
 
+import argparse
 import json
 import re
 from pathlib import Path
@@ -209,7 +210,9 @@ PEAK_ARENA_BUILDS = {
 
 def save_structured_data():
     """Save all structured data"""
-    output_dir = Path("../data/real-structured-data")
+    # Resolved from this file, so the script runs the same from scripts/ and
+    # through python -m archero_pipeline
+    output_dir = Path(__file__).resolve().parent.parent / "data" / "real-structured-data"
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Save each category
@@ -252,8 +255,13 @@ def save_structured_data():
     print(f"🛡️ Blessings: {len(BLESSINGS)}")
     print(f"🏆 Peak Arena Builds: {len(PEAK_ARENA_BUILDS)}")
 
-if __name__ == '__main__':
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Save the curated game data tables as structured JSON")
+    parser.parse_args(argv)
     save_structured_data()
 
+if __name__ == '__main__':
+    main()
+
 
 
@@ -244,8 +244,10 @@ class StructuredDataIntegration {
 
         // Process rune costs from extracted data
         if (this.extractedData.runes) {
-            Object.entries(this.extractedData.runes).forEach(([runeName, entries]) => {
-                entries.forEach(entry => {
+            Object.entries(this.extractedData.runes).forEach(([runeName, rune]) => {
+                // Only the best (longest-context) mentions of each rune are kept;
+                // entry_table holds the entries they point to
+                rune.entries.forEach(entry => {
                     const context = entry.context || '';
                     const gemMatch = context.match(/(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:gems?|gem)/);
                     if (gemMatch) {
@@ -260,12 +262,12 @@ class StructuredDataIntegration {
 
         // Process material costs
         if (this.extractedData.materials) {
-            Object.entries(this.extractedData.materials).forEach(([materialName, entries]) => {
-                const totalQuantity = entries.reduce((sum, entry) => sum + (parseInt(entry.quantity) || 0), 0);
+            Object.entries(this.extractedData.materials).forEach(([materialName, material]) => {
+                const totalQuantity = material.total_quantity || 0;
                 if (totalQuantity > 0) {
                     costs.materials[materialName] = {
                         totalQuantity: totalQuantity,
-                        averagePerMention: totalQuantity / entries.length
+                        averagePerMention: totalQuantity / material.mentions
                     };
                 }
             });